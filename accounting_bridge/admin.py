@@ -7,6 +7,7 @@ from accounting_bridge.models import (
     CrmServiceTypeLink,
     CrmSupplierLink,
     InvoiceSyncQueue,
+    InvoiceSyncState,
     LeadClientLink,
     PartyOpeningBalance,
 )
@@ -83,3 +84,10 @@ class InvoiceSyncQueueAdmin(AccountingAdminMixin, admin.ModelAdmin):
     list_filter = ('status',)
     search_fields = ('leadtask__lead__name', 'sales_invoice__invoice_no')
     readonly_fields = ('created_at', 'last_crm_snapshot_at', 'reviewed_at')
+
+
+@admin.register(InvoiceSyncState)
+class InvoiceSyncStateAdmin(AccountingAdminMixin, admin.ModelAdmin):
+    list_display = ('leadtask', 'status', 'dirty_at', 'attempts', 'next_attempt_at', 'last_synced_at', 'sync_count')
+    list_filter = ('status',)
+    readonly_fields = ('claim_token', 'claimed_until', 'last_error', 'last_lag_seconds')
@@ -21,8 +21,8 @@ def get_crm_lead_for_invoice(invoice):
 def crm_lead_selling_total(lead) -> Decimal | None:
     if lead is None:
         return None
-    total = parse_money(lead.selling_price)
-    if total <= 0:
+    total = lead.selling_price_amount
+    if total is None or total <= 0:
         return None
     return total
 
@@ -4,7 +4,6 @@ from __future__ import annotations
 
 from decimal import Decimal
 
-from tasks.constants import effective_service_net
 from tasks.models import Service
 
 from accounting_bridge.services.master_data import sync_destination, sync_service_type, sync_supplier
@@ -65,9 +64,13 @@ def crm_service_to_line_kwargs(
 
     issue_price = merge_issue_price_from_crm(service, existing_line)
     sent, issued = merge_line_flags_from_crm(service, existing_line)
-    cost_net = parse_money(effective_service_net(service))
-    if issue_price:
+    if (service.issue_price or '').strip():
+        cost_net = service.issue_price_amount
+    elif issue_price:
+        # Issue price kept on the accounting line only (no CRM value to read a column from).
         cost_net = parse_money(issue_price)
+    else:
+        cost_net = service.net_amount
 
     return {
         'service_type': service_type,
@@ -76,8 +79,8 @@ def crm_service_to_line_kwargs(
         'destination': destination,
         'service_date': service_date,
         'qty': Decimal('1'),
-        'sell_price': parse_money(service.selling),
-        'cost_price': cost_net,
+        'sell_price': service.selling_amount or Decimal('0.00'),
+        'cost_price': cost_net or Decimal('0.00'),
         'line_discount': Decimal('0'),
         'notes': build_crm_line_notes(service),
         'send_to_client': sent,
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting_bridge.services.sync_worker import SyncStats, drain_dirty, retry_failed, sync_metrics
+from reporting.dashboard_cache import cache_is_process_local
+
+
+class Command(BaseCommand):
+    help = (
+        "Sync CRM orders marked dirty into their accounting invoices, in batches with retry/backoff. "
+        "Runs until stopped; use --once from a scheduled task."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Sync what is due now, then exit")
+        parser.add_argument("--batch-size", type=int, default=None, help="Orders claimed per batch (default ACCOUNTING_SYNC_BATCH_SIZE)")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Seconds to wait when nothing is due")
+        parser.add_argument("--max-runtime", type=int, default=0, help="Exit after this many seconds (0 = no limit)")
+        parser.add_argument("--retry-failed", action="store_true", help="Queue failed orders again before starting")
+        parser.add_argument("--metrics", action="store_true", help="Print backlog, lag and throughput, then exit")
+
+    def handle(self, *args, **options):
+        if options["metrics"]:
+            for key, value in sync_metrics().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+        if cache_is_process_local():
+            # This process's accounting writes would only invalidate its own cache copy.
+            raise CommandError(
+                "The dashboard cache is per-process memory, so the web app would keep serving stale "
+                "reports after a sync. Set CRM_CACHE_BACKEND to a shared backend (see "
+                "docs/PYTHONANYWHERE_DEPLOY.md) or DASHBOARD_CACHE_TIMEOUT=0."
+            )
+        if options["retry_failed"]:
+            self.stdout.write(f"Re-queued {retry_failed()} failed order(s).")
+
+        started = time.monotonic()
+        total = SyncStats()
+        while True:
+            stats = drain_dirty(batch_size=options["batch_size"])
+            total.add(stats)
+            if stats.claimed:
+                self.stdout.write(self._summary(stats))
+            if options["once"]:
+                break
+            if options["max_runtime"] and time.monotonic() - started >= options["max_runtime"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Done — {self._summary(total)}."))
+
+    @staticmethod
+    def _summary(stats):
+        return f"{stats.claimed} claimed, {stats.synced} synced, {stats.retried} to retry, {stats.failed} failed"
@@ -3,6 +3,7 @@ from django.shortcuts import redirect
 from django.urls import reverse
 
 from accounting_bridge.permissions import user_is_accountant
+from accounting_bridge.services.deferred_sync import deferred_sync
 
 ACCOUNTING_PREFIX = '/accounting/'
 
@@ -22,3 +23,14 @@ class AccountingAccessMiddleware:
                 messages.error(request, 'Accounting access is restricted to main accountant users.')
                 return redirect('calendar')
         return self.get_response(request)
+
+
+class DeferredAccountingSyncMiddleware:
+    """Queue the CRM orders a request changed for the invoice sync worker, once, after the view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with deferred_sync():
+            return self.get_response(request)
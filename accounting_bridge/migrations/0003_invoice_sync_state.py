@@ -0,0 +1,37 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_bridge', '0002_partyopeningbalance_debit_credit'),
+        ('tasks', '0011_service_money_amounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSyncState',
+            fields=[
+                ('leadtask', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='accounting_sync_state', serialize=False, to='tasks.leadtask')),
+                ('status', models.CharField(choices=[('clean', 'In sync'), ('dirty', 'Waiting for sync'), ('failed', 'Failed')], default='dirty', max_length=10)),
+                ('dirty_at', models.DateTimeField(blank=True, null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim_token', models.CharField(blank=True, max_length=32)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_lag_seconds', models.FloatField(blank=True, null=True)),
+                ('sync_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'CRM invoice sync state',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='accounting__status_558a93_idx'), models.Index(fields=['last_synced_at'], name='accounting__last_sy_a1a202_idx')],
+            },
+        ),
+    ]
@@ -5,6 +5,8 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from common.field_tracking import TrackedFieldsMixin
+
 
 class AccountingConfig(models.Model):
     """Singleton settings for CRM ↔ accounting integration."""
@@ -95,7 +97,9 @@ class CrmEmployeeLink(models.Model):
         return f'{self.user.username} → {self.employee.name}'
 
 
-class PartyOpeningBalance(models.Model):
+class PartyOpeningBalance(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('client_id', 'supplier_id')
+
     class PartyType(models.TextChoices):
         CLIENT = 'CLIENT', 'Client'
         SUPPLIER = 'SUPPLIER', 'Supplier'
@@ -190,3 +194,45 @@ class InvoiceSyncQueue(models.Model):
 
     def __str__(self):
         return f'Invoice sync #{self.leadtask_id} ({self.status})'
+
+
+class InvoiceSyncState(models.Model):
+    """Whether a CRM order's accounting invoice is behind its CRM data.
+
+    CRM saves mark the order dirty (accounting_bridge.services.sync_worker.mark_dirty);
+    the invoice_sync_worker command claims dirty rows and runs
+    sync_crm_leadtask_to_accounting for them. Kept apart from InvoiceSyncQueue,
+    which only exists once an order has an accounting invoice and drives the
+    review workflow.
+    """
+
+    class Status(models.TextChoices):
+        CLEAN = 'clean', 'In sync'
+        DIRTY = 'dirty', 'Waiting for sync'
+        FAILED = 'failed', 'Failed'
+
+    leadtask = models.OneToOneField(
+        'tasks.LeadTask', on_delete=models.CASCADE, primary_key=True, related_name='accounting_sync_state'
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.DIRTY)
+    # First unsynced change, and the latest one (a sync only clears the changes it saw).
+    dirty_at = models.DateTimeField(null=True, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_lag_seconds = models.FloatField(null=True, blank=True)
+    sync_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'CRM invoice sync state'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['last_synced_at']),
+        ]
+
+    def __str__(self):
+        return f'Order #{self.leadtask_id} ({self.get_status_display()})'
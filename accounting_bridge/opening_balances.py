@@ -67,3 +67,65 @@ def client_opening_balance_usd(client, on_or_before=None) -> Decimal:
 def supplier_opening_balance_usd(supplier, on_or_before=None) -> Decimal:
     debit, credit = supplier_opening_balance_dr_cr(supplier, on_or_before=on_or_before)
     return (credit - debit).quantize(Decimal('0.01'))
+
+
+def _grouped_opening_dr_cr(*, party_type, party_field, party_ids=None, on_or_before=None):
+    qs = PartyOpeningBalance.objects.filter(party_type=party_type)
+    if party_ids is None:
+        qs = qs.filter(**{f'{party_field}__isnull': False})
+    else:
+        qs = qs.filter(**{f'{party_field}__in': party_ids})
+    if on_or_before is not None:
+        qs = qs.filter(as_of_date__lte=on_or_before)
+    grouped = qs.values(party_field).order_by().annotate(debit=Sum('debit_usd'), credit=Sum('credit_usd'))
+    out = {}
+    for row in grouped:
+        debit = (row['debit'] or Decimal('0.00')).quantize(Decimal('0.01'))
+        credit = (row['credit'] or Decimal('0.00')).quantize(Decimal('0.01'))
+        out[row[party_field]] = (debit, credit)
+    return out
+
+
+def client_opening_balances_dr_cr(client_ids=None, on_or_before=None) -> dict:
+    """(debit, credit) opening totals per client id in one grouped query (statement opening rows)."""
+    return _grouped_opening_dr_cr(
+        party_type=PartyOpeningBalance.PartyType.CLIENT,
+        party_field='client_id',
+        party_ids=client_ids,
+        on_or_before=on_or_before,
+    )
+
+
+def supplier_opening_balances_dr_cr(supplier_ids=None, on_or_before=None) -> dict:
+    """(debit, credit) opening totals per supplier id in one grouped query."""
+    return _grouped_opening_dr_cr(
+        party_type=PartyOpeningBalance.PartyType.SUPPLIER,
+        party_field='supplier_id',
+        party_ids=supplier_ids,
+        on_or_before=on_or_before,
+    )
+
+
+def client_opening_balances_usd(client_ids=None, on_or_before=None) -> dict:
+    """Net opening balance (debit − credit) per client id in one grouped query.
+
+    client_ids=None covers every client; parties without openings are omitted.
+    """
+    grouped = _grouped_opening_dr_cr(
+        party_type=PartyOpeningBalance.PartyType.CLIENT,
+        party_field='client_id',
+        party_ids=client_ids,
+        on_or_before=on_or_before,
+    )
+    return {pk: (debit - credit).quantize(Decimal('0.01')) for pk, (debit, credit) in grouped.items()}
+
+
+def supplier_opening_balances_usd(supplier_ids=None, on_or_before=None) -> dict:
+    """Net opening balance (credit − debit) per supplier id in one grouped query."""
+    grouped = _grouped_opening_dr_cr(
+        party_type=PartyOpeningBalance.PartyType.SUPPLIER,
+        party_field='supplier_id',
+        party_ids=supplier_ids,
+        on_or_before=on_or_before,
+    )
+    return {pk: (credit - debit).quantize(Decimal('0.01')) for pk, (debit, credit) in grouped.items()}
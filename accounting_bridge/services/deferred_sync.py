@@ -0,0 +1,73 @@
+"""
+Coalesce CRM → accounting invoice sync requests.
+
+CRM saves (an order, each of its services) only note the order here; the
+noted orders are handed to the sync worker queue (sync_worker.mark_dirty) in
+one go:
+
+- inside `deferred_sync()` (wrapped around every request by
+  DeferredAccountingSyncMiddleware): when the outermost scope exits, or on
+  commit if a transaction is still open then;
+- otherwise inside a transaction: on commit;
+- otherwise (autocommit, e.g. shell or management commands): immediately.
+
+Marks made in a transaction that rolls back stay pending until the next
+flush. Syncs read the current database state, so queueing that order again
+is harmless.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from accounting_bridge.models import AccountingConfig
+from accounting_bridge.services.sync_worker import mark_dirty
+
+_state = threading.local()
+
+
+def _pending() -> set:
+    if not hasattr(_state, 'pending'):
+        _state.pending = set()
+    return _state.pending
+
+
+def _depth() -> int:
+    return getattr(_state, 'depth', 0)
+
+
+def mark_leadtask_dirty(leadtask_id) -> None:
+    """Queue one accounting sync for this CRM order."""
+    if not leadtask_id:
+        return
+    _pending().add(leadtask_id)
+    if not _depth():
+        # Runs right away in autocommit mode; the first callback after commit flushes all marks.
+        transaction.on_commit(flush_pending)
+
+
+def flush_pending() -> int:
+    """Queue every noted order for the sync worker now; returns how many were queued."""
+    pending = _pending()
+    if not pending:
+        return 0
+    ids = set(pending)
+    pending.clear()
+    if not AccountingConfig.load().master_data_sync_enabled:
+        return 0
+    return mark_dirty(ids)
+
+
+@contextmanager
+def deferred_sync():
+    """Hold noted orders until the outermost scope exits, then queue them together."""
+    _state.depth = _depth() + 1
+    try:
+        yield
+    finally:
+        _state.depth = _depth() - 1
+        if not _state.depth and _pending():
+            if transaction.get_connection().in_atomic_block:
+                transaction.on_commit(flush_pending)
+            else:
+                flush_pending()
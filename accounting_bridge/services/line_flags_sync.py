@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from display.money import parse_money_amount
 from tasks.models import Service
 
 
@@ -41,5 +42,6 @@ def push_accounting_line_flags_to_crm(line) -> None:
         updates['send_to_client'] = bool(line.send_to_client)
     if (service.issue_price or '').strip() != issue:
         updates['issue_price'] = issue
+        updates['issue_price_amount'] = parse_money_amount(issue)
     if updates:
         Service.objects.filter(pk=service.pk).update(**updates)
@@ -0,0 +1,201 @@
+"""
+Background CRM → accounting invoice sync.
+
+CRM saves only mark orders dirty (mark_dirty, called once per request or
+transaction by services.deferred_sync); the invoice_sync_worker command claims
+dirty InvoiceSyncState rows in batches and runs sync_crm_leadtask_to_accounting
+for each, recording attempts, the last error and a backoff before the next
+try. Changes that arrive while an order is being synced keep it dirty, so the
+next batch picks them up.
+
+The worker's writes invalidate reporting.dashboard_cache through the cache
+backend, so it must share that backend with the web app; the command refuses
+to run against per-process memory while dashboard caching is on.
+"""
+import logging
+import traceback
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+
+from accounting_bridge.models import InvoiceSyncState
+from accounting_bridge.services.invoices import sync_crm_leadtask_to_accounting
+from tasks.models import LeadTask
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def mark_dirty(leadtask_ids, *, now=None) -> int:
+    """Flag orders as needing an accounting sync; a handful of queries for any number of orders."""
+    ids = {pk for pk in leadtask_ids if pk}
+    if not ids:
+        return 0
+    now = now or timezone.now()
+    existing = set(InvoiceSyncState.objects.filter(leadtask_id__in=ids).values_list('leadtask_id', flat=True))
+    # Clean or failed rows start a fresh dirty period; rows already dirty keep their first dirty_at.
+    InvoiceSyncState.objects.filter(leadtask_id__in=existing).exclude(status=InvoiceSyncState.Status.DIRTY).update(
+        status=InvoiceSyncState.Status.DIRTY, dirty_at=now, attempts=0, next_attempt_at=now, last_error='',
+    )
+    InvoiceSyncState.objects.filter(leadtask_id__in=existing).update(changed_at=now)
+    # Orders noted in a rolled-back transaction may not exist.
+    new_ids = ids - existing
+    if new_ids:
+        new_ids = set(LeadTask.objects.filter(pk__in=new_ids).values_list('pk', flat=True))
+        InvoiceSyncState.objects.bulk_create(
+            [InvoiceSyncState(leadtask_id=pk, dirty_at=now, changed_at=now, next_attempt_at=now) for pk in new_ids],
+            ignore_conflicts=True,
+        )
+    return len(existing) + len(new_ids)
+
+
+def retry_delay(attempts):
+    """Exponential backoff after the given number of failed attempts, capped."""
+    base = _setting('ACCOUNTING_SYNC_RETRY_BASE_SECONDS', 60)
+    cap = _setting('ACCOUNTING_SYNC_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(attempts - 1, 0)))
+
+
+@dataclass
+class SyncStats:
+    claimed: int = 0
+    synced: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    def add(self, other):
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+
+def _due(now):
+    return InvoiceSyncState.objects.filter(
+        status=InvoiceSyncState.Status.DIRTY, next_attempt_at__lte=now
+    ).exclude(claimed_until__gt=now)
+
+
+def claim_dirty(limit, *, lease_seconds=None):
+    """Lease up to `limit` due dirty rows to this worker and return them.
+
+    On databases with row locks the candidates are selected FOR UPDATE SKIP
+    LOCKED, so concurrent workers pick different rows; the lease itself is a
+    conditional UPDATE (all SQLite gets), and a dead worker's rows become due
+    again when it runs out.
+    """
+    now = timezone.now()
+    lease = lease_seconds or _setting('ACCOUNTING_SYNC_LEASE_SECONDS', 600)
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        candidates = _due(now).order_by('next_attempt_at', 'leadtask_id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        due_ids = list(candidates.values_list('leadtask_id', flat=True)[:limit])
+        if not due_ids:
+            return []
+        _due(now).filter(leadtask_id__in=due_ids).update(
+            claim_token=token, claimed_until=now + timedelta(seconds=lease),
+        )
+    return list(InvoiceSyncState.objects.filter(claim_token=token).order_by('next_attempt_at', 'leadtask_id'))
+
+
+def _record_success(state, started):
+    now = timezone.now()
+    released = {'claim_token': '', 'claimed_until': None, 'last_synced_at': now, 'sync_count': F('sync_count') + 1}
+    if state.dirty_at:
+        released['last_lag_seconds'] = (now - state.dirty_at).total_seconds()
+    mine = InvoiceSyncState.objects.filter(leadtask_id=state.leadtask_id, claim_token=state.claim_token)
+    # Only clear the changes this sync saw; a newer change leaves the row dirty for the next batch.
+    cleared = mine.filter(changed_at=state.changed_at).update(
+        status=InvoiceSyncState.Status.CLEAN, dirty_at=None, attempts=0, last_error='', **released
+    )
+    if not cleared:
+        mine.update(dirty_at=started, attempts=0, next_attempt_at=now, last_error='', **released)
+
+
+def _record_failure(state, error):
+    attempts = state.attempts + 1
+    failed = attempts >= _setting('ACCOUNTING_SYNC_MAX_ATTEMPTS', 5)
+    InvoiceSyncState.objects.filter(leadtask_id=state.leadtask_id, claim_token=state.claim_token).update(
+        status=InvoiceSyncState.Status.FAILED if failed else InvoiceSyncState.Status.DIRTY,
+        attempts=attempts,
+        next_attempt_at=timezone.now() + retry_delay(attempts),
+        last_error=error[-4000:],
+        claim_token='',
+        claimed_until=None,
+    )
+    return failed
+
+
+def process_claimed(states) -> SyncStats:
+    """Sync each claimed order in its own transaction and record the outcome."""
+    stats = SyncStats(claimed=len(states))
+    orders = LeadTask.objects.select_related('lead').in_bulk([s.leadtask_id for s in states])
+    for state in states:
+        leadtask = orders.get(state.leadtask_id)
+        if leadtask is None:
+            continue  # order deleted; its state row went with it
+        started = timezone.now()
+        try:
+            with transaction.atomic():
+                sync_crm_leadtask_to_accounting(leadtask)
+        except Exception:
+            logger.exception('Accounting sync failed for CRM order %s', leadtask.pk)
+            if _record_failure(state, traceback.format_exc()):
+                stats.failed += 1
+            else:
+                stats.retried += 1
+        else:
+            _record_success(state, started)
+            stats.synced += 1
+    return stats
+
+
+def drain_dirty(*, batch_size=None) -> SyncStats:
+    """Claim and sync batches until nothing is due; returns the combined stats."""
+    batch_size = batch_size or _setting('ACCOUNTING_SYNC_BATCH_SIZE', 50)
+    total = SyncStats()
+    while True:
+        states = claim_dirty(batch_size)
+        if not states:
+            return total
+        total.add(process_claimed(states))
+
+
+def retry_failed() -> int:
+    """Put failed orders back in the queue; returns how many."""
+    now = timezone.now()
+    return InvoiceSyncState.objects.filter(status=InvoiceSyncState.Status.FAILED).update(
+        status=InvoiceSyncState.Status.DIRTY, attempts=0, next_attempt_at=now, last_error='',
+    )
+
+
+def sync_metrics(*, window_minutes=60):
+    """Backlog, lag and throughput figures for the sync status page and `--metrics`."""
+    now = timezone.now()
+    since = now - timedelta(minutes=window_minutes)
+    dirty = Q(status=InvoiceSyncState.Status.DIRTY)
+    totals = InvoiceSyncState.objects.aggregate(
+        dirty=Count('pk', filter=dirty),
+        due=Count('pk', filter=dirty & Q(next_attempt_at__lte=now)),
+        in_progress=Count('pk', filter=dirty & Q(claimed_until__gt=now)),
+        failed=Count('pk', filter=Q(status=InvoiceSyncState.Status.FAILED)),
+        oldest_dirty_at=Min('dirty_at', filter=dirty),
+        synced_recently=Count('pk', filter=Q(last_synced_at__gte=since)),
+        avg_lag_seconds=Avg('last_lag_seconds', filter=Q(last_synced_at__gte=since)),
+        max_lag_seconds=Max('last_lag_seconds', filter=Q(last_synced_at__gte=since)),
+    )
+    oldest = totals.pop('oldest_dirty_at')
+    totals['current_lag_seconds'] = round((now - oldest).total_seconds(), 1) if oldest else 0
+    totals['window_minutes'] = window_minutes
+    totals['synced_per_minute'] = round(totals['synced_recently'] / window_minutes, 2)
+    for key in ('avg_lag_seconds', 'max_lag_seconds'):
+        totals[key] = round(totals[key], 1) if totals[key] is not None else None
+    return totals
@@ -8,7 +8,7 @@ from sales.models import SalesInvoiceLine
 from tasks.models import LeadTask, Service, ServiceType, Supplier
 
 from accounting_bridge.models import AccountingConfig
-from accounting_bridge.services.invoices import sync_crm_leadtask_to_accounting
+from accounting_bridge.services.deferred_sync import mark_leadtask_dirty
 from accounting_bridge.services.line_flags_sync import push_accounting_line_flags_to_crm
 from accounting_bridge.services.master_data import (
     sync_all_crm_master_data,
@@ -50,27 +50,20 @@ def sync_crm_service_type_row(sender, instance, **kwargs):
     _safe_sync('service_type', sync_service_type, instance.name)
 
 
+# Order and service saves only queue the order for invoice_sync_worker (see services.deferred_sync).
 @receiver(post_save, sender=LeadTask)
 def sync_on_leadtask_save(sender, instance, **kwargs):
-    _safe_sync('leadtask', sync_crm_leadtask_to_accounting, instance)
+    mark_leadtask_dirty(instance.pk)
 
 
 @receiver(post_save, sender=Service)
 def sync_on_service_change(sender, instance, **kwargs):
-    if not instance.leadtask_id:
-        return
-    _safe_sync('service', sync_crm_leadtask_to_accounting, instance.leadtask)
+    mark_leadtask_dirty(instance.leadtask_id)
 
 
 @receiver(post_delete, sender=Service)
 def sync_on_service_delete(sender, instance, **kwargs):
-    if not instance.leadtask_id:
-        return
-    try:
-        leadtask = LeadTask.objects.get(pk=instance.leadtask_id)
-    except LeadTask.DoesNotExist:
-        return
-    _safe_sync('service_delete', sync_crm_leadtask_to_accounting, leadtask)
+    mark_leadtask_dirty(instance.leadtask_id)
 
 
 @receiver(post_save, sender=SalesInvoiceLine)
@@ -1,15 +1,30 @@
 from datetime import date, timedelta
 from decimal import Decimal
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from unittest.mock import patch
+
+from django.db import transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
 
-from accounting_bridge.models import AccountingConfig, InvoiceSyncQueue
+from accounting_bridge.models import AccountingConfig, InvoiceSyncQueue, InvoiceSyncState
 from accounting_bridge.services.invoices import (
     approve_queue_item,
     force_sync_crm_leadtask_to_accounting,
     sync_crm_leadtask_to_accounting,
 )
+from accounting_bridge.services.sync_worker import (
+    claim_dirty,
+    drain_dirty,
+    mark_dirty,
+    process_claimed,
+    retry_failed,
+    sync_metrics,
+)
 from display.models import Lead
 from sales.models import SalesInvoice, SalesInvoiceLine
 from tasks.models import LeadTask, Service
@@ -74,6 +89,12 @@ class CrmInvoiceSyncTests(TestCase):
         self.assertIsNotNone(self.queue.sales_invoice_id)
         self.invoice = self.queue.sales_invoice
 
+    def save_and_sync(self, service):
+        """Save as a request would: the order is queued on commit, then the worker syncs it."""
+        with self.captureOnCommitCallbacks(execute=True):
+            service.save()
+        drain_dirty()
+
     def test_order_before_cutoff_does_not_create_invoice(self):
         config = AccountingConfig.load()
         config.invoice_sync_from = date.today() + timedelta(days=30)
@@ -117,7 +138,7 @@ class CrmInvoiceSyncTests(TestCase):
     def test_service_edit_updates_accounting_line(self):
         service = self.leadtask.service_set.get(service_name='Hotel')
         service.selling = '999'
-        service.save()
+        self.save_and_sync(service)
         line = SalesInvoiceLine.objects.get(invoice=self.invoice, crm_service=service)
         self.assertEqual(line.sell_price, Decimal('999'))
 
@@ -125,7 +146,7 @@ class CrmInvoiceSyncTests(TestCase):
         service = self.leadtask.service_set.get(service_name='Hotel')
         service.send_to_client = True
         service.is_checked = True
-        service.save()
+        self.save_and_sync(service)
         line = SalesInvoiceLine.objects.get(invoice=self.invoice, crm_service=service)
         self.assertTrue(line.send_to_client)
         self.assertTrue(line.crm_issued)
@@ -137,7 +158,7 @@ class CrmInvoiceSyncTests(TestCase):
         line.save(update_fields=['crm_issued'])
         service.selling = '888'
         service.is_checked = False
-        service.save()
+        self.save_and_sync(service)
         line.refresh_from_db()
         self.assertTrue(line.crm_issued)
         self.assertEqual(line.sell_price, Decimal('888'))
@@ -189,3 +210,136 @@ class CrmInvoiceSyncTests(TestCase):
         self.lead.refresh_from_db()
         self.assertEqual(self.lead.selling_price, '725')
         self.assertEqual(self.invoice.grand_total, Decimal('725.00'))
+
+
+class DeferredAccountingSyncTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('deferred_sync', password='test12345')
+        self.client.force_login(self.user)
+        config = AccountingConfig.load()
+        config.invoice_sync_from = date(2000, 1, 1)
+        config.master_data_sync_enabled = True
+        config.save()
+        lead = Lead.objects.create(name='Batch', phone='70111333', country_code='+961', assigned_to=self.user)
+        self.leadtask = LeadTask.objects.create(lead=lead, assigned_to=self.user, status='progress')
+        self.existing = [
+            Service.objects.create(leadtask=self.leadtask, service_name=f'Old {i}', supplier='S', selling='10')
+            for i in range(2)
+        ]
+
+    def test_request_saving_many_services_queues_one_sync(self):
+        post = {'service_name[]': ['A', 'B', 'C'], 'supplier[]': ['X', 'Y', 'Z'], 'selling[]': ['1', '2', '3']}
+        for service in self.existing:
+            post[f'service_{service.pk}_service_name'] = service.service_name + ' edited'
+            post[f'service_{service.pk}_selling'] = '20'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('save_all_services', args=[self.leadtask.pk]), post)
+        self.assertEqual(self.leadtask.service_set.count(), 5)
+        # Nothing synced inline; the order waits for the worker.
+        self.assertFalse(InvoiceSyncQueue.objects.filter(leadtask=self.leadtask).exists())
+        state = InvoiceSyncState.objects.get(leadtask=self.leadtask)
+        self.assertEqual(state.status, InvoiceSyncState.Status.DIRTY)
+
+        with patch('accounting_bridge.services.sync_worker.sync_crm_leadtask_to_accounting') as sync:
+            stats = drain_dirty()
+        self.assertEqual([call.args[0].pk for call in sync.call_args_list], [self.leadtask.pk])
+        self.assertEqual((stats.claimed, stats.synced), (1, 1))
+
+    def test_transaction_coalesces_and_invoice_reflects_all_saves(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for service in self.existing:
+                    service.selling = '30'
+                    service.save()
+                Service.objects.create(leadtask=self.leadtask, service_name='New', supplier='S', selling='40')
+        drain_dirty()
+        invoice = self.leadtask.accounting_sync.sales_invoice
+        self.assertEqual(
+            sorted(invoice.lines.values_list('sell_price', flat=True)),
+            [Decimal('30'), Decimal('30'), Decimal('40')],
+        )
+        state = InvoiceSyncState.objects.get(leadtask=self.leadtask)
+        self.assertEqual((state.status, state.sync_count), (InvoiceSyncState.Status.CLEAN, 1))
+
+    def test_rolled_back_transaction_does_not_queue(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.existing[0].save()
+                raise RuntimeError('abort')
+        self.assertEqual(callbacks, [])
+        self.assertFalse(InvoiceSyncState.objects.exists())
+
+
+class InvoiceSyncWorkerTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('sync_worker', password='test12345')
+        lead = Lead.objects.create(name='Worker', phone='70111444', country_code='+961', assigned_to=self.user)
+        self.leadtask = LeadTask.objects.create(lead=lead, assigned_to=self.user, status='progress')
+        mark_dirty([self.leadtask.pk])
+
+    def state(self):
+        return InvoiceSyncState.objects.get(leadtask=self.leadtask)
+
+    def test_failures_back_off_then_fail_and_can_be_retried(self):
+        with self.settings(ACCOUNTING_SYNC_MAX_ATTEMPTS=2), \
+                patch('accounting_bridge.services.sync_worker.sync_crm_leadtask_to_accounting',
+                      side_effect=RuntimeError('ledger locked')):
+            stats = drain_dirty()
+            self.assertEqual((stats.retried, stats.failed), (1, 0))
+            state = self.state()
+            self.assertEqual((state.status, state.attempts), (InvoiceSyncState.Status.DIRTY, 1))
+            self.assertIn('ledger locked', state.last_error)
+            self.assertGreater(state.next_attempt_at, timezone.now())
+            self.assertEqual(claim_dirty(10), [])  # backing off
+
+            InvoiceSyncState.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(drain_dirty().failed, 1)
+        self.assertEqual(self.state().status, InvoiceSyncState.Status.FAILED)
+
+        self.assertEqual(retry_failed(), 1)
+        with patch('accounting_bridge.services.sync_worker.sync_crm_leadtask_to_accounting'):
+            self.assertEqual(drain_dirty().synced, 1)
+        self.assertEqual(self.state().status, InvoiceSyncState.Status.CLEAN)
+
+    def test_change_during_sync_keeps_order_dirty(self):
+        def concurrent_edit(leadtask):
+            mark_dirty([leadtask.pk], now=timezone.now() + timedelta(seconds=1))
+
+        with patch('accounting_bridge.services.sync_worker.sync_crm_leadtask_to_accounting', side_effect=concurrent_edit):
+            states = claim_dirty(10)
+            self.assertEqual(claim_dirty(10), [])  # leased to this worker
+            process_claimed(states)
+        state = self.state()
+        self.assertEqual((state.status, state.sync_count), (InvoiceSyncState.Status.DIRTY, 1))
+        self.assertEqual(state.claim_token, '')
+
+        with patch('accounting_bridge.services.sync_worker.sync_crm_leadtask_to_accounting'):
+            drain_dirty()
+        self.assertEqual(self.state().status, InvoiceSyncState.Status.CLEAN)
+
+    def test_status_page_and_metrics_command(self):
+        metrics = sync_metrics()
+        self.assertEqual((metrics['dirty'], metrics['due'], metrics['failed']), (1, 1, 0))
+
+        accountant = get_user_model().objects.create_superuser('acct', password='test12345')
+        self.client.force_login(accountant)
+        response = self.client.get(reverse('accounting_bridge:sync_status'))
+        self.assertContains(response, 'Worker')
+        self.assertContains(response, 'Waiting for sync')
+
+        out = StringIO()
+        call_command('invoice_sync_worker', '--metrics', stdout=out)
+        self.assertIn('dirty: 1', out.getvalue())
+
+    def test_worker_refuses_process_local_dashboard_cache(self):
+        from django.core.management.base import CommandError
+
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with self.settings(CACHES=locmem, DASHBOARD_CACHE_TIMEOUT=600):
+            with self.assertRaisesMessage(CommandError, 'CRM_CACHE_BACKEND'):
+                call_command('invoice_sync_worker', '--once', stdout=StringIO())
+        with self.settings(CACHES=locmem, DASHBOARD_CACHE_TIMEOUT=0), \
+                patch('accounting_bridge.services.sync_worker.sync_crm_leadtask_to_accounting'):
+            call_command('invoice_sync_worker', '--once', stdout=StringIO())
+        self.assertEqual(self.state().status, InvoiceSyncState.Status.CLEAN)
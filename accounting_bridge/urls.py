@@ -9,6 +9,8 @@ urlpatterns = [
     path('review/<uuid:queue_id>/', views.review_detail, name='review_detail'),
     path('review/<uuid:queue_id>/approve/', views.review_approve, name='review_approve'),
     path('review/<uuid:queue_id>/reject/', views.review_reject, name='review_reject'),
+    path('sync-status/', views.sync_status, name='sync_status'),
+    path('sync-status/retry/', views.sync_retry_failed, name='sync_retry_failed'),
     path('opening-balances/', views.opening_balances_list, name='opening_balances'),
     path('opening-balances/new/', views.opening_balance_create, name='opening_balance_create'),
     path('opening-balances/<uuid:row_id>/edit/', views.opening_balance_edit, name='opening_balance_edit'),
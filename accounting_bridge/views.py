@@ -5,10 +5,11 @@ from django.utils import timezone
 from django.views.decorators.http import require_POST
 
 from accounting_bridge.forms import OpeningBalanceForm
-from accounting_bridge.models import InvoiceSyncQueue, PartyOpeningBalance
+from accounting_bridge.models import InvoiceSyncQueue, InvoiceSyncState, PartyOpeningBalance
 from accounting_bridge.permissions import user_is_accountant
 from accounting_bridge.services.invoices import approve_queue_item
 from accounting_bridge.services.master_data import sync_client_from_lead
+from accounting_bridge.services.sync_worker import retry_failed, sync_metrics
 
 
 def _require_accountant(view_func):
@@ -89,6 +90,29 @@ def review_reject(request, queue_id):
     return redirect('accounting_bridge:review_queue')
 
 
+@_require_accountant
+def sync_status(request):
+    """Invoice sync worker backlog: lag, throughput and the orders still waiting or failed."""
+    backlog = (
+        InvoiceSyncState.objects.select_related('leadtask__lead')
+        .exclude(status=InvoiceSyncState.Status.CLEAN)
+        .order_by('-status', 'dirty_at')[:100]
+    )
+    return render(
+        request,
+        'accounting_bridge/sync_status.html',
+        {'metrics': sync_metrics(), 'backlog': backlog},
+    )
+
+
+@require_POST
+@_require_accountant
+def sync_retry_failed(request):
+    count = retry_failed()
+    messages.success(request, f'{count} failed order(s) queued for sync again.')
+    return redirect('accounting_bridge:sync_status')
+
+
 @_require_accountant
 def opening_balances_list(request):
     rows = PartyOpeningBalance.objects.select_related('client', 'supplier', 'created_by').order_by('-as_of_date', '-created_at')[:200]
@@ -1,37 +1,84 @@
-import io
+import csv
+import tempfile
+from itertools import chain, islice
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _export_filename(filename, ext):
+    if not filename.lower().endswith(f".{ext}"):
+        filename = f"{filename}.{ext}"
+    return filename
+
+
+def _column_widths(headers, sample):
+    """Character widths per column from the headers and a bounded sample of rows."""
+    widths = []
+    for idx, header in enumerate(headers):
+        width = max(len(str(header)), 12)
+        for row in sample:
+            if idx < len(row):
+                width = max(width, min(len(str(row[idx])), 48))
+        widths.append(width + 2)
+    return widths
 
 
 def build_xlsx_response(filename, headers, rows):
+    """Stream an XLSX export; rows may be any iterable (a generator is never materialized).
+
+    Uses an openpyxl write-only workbook, which keeps no cells in memory; the
+    file is assembled in a temporary file and sent in chunks. Column widths
+    come from the first XLSX_WIDTH_SAMPLE_ROWS rows.
+    """
     from openpyxl import Workbook
     from openpyxl.utils import get_column_letter
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Report"
-    ws.append(headers)
-    for row in rows:
+    rows = iter(rows)
+    sample = [list(row) for row in islice(rows, getattr(settings, "XLSX_WIDTH_SAMPLE_ROWS", 200))]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Report")
+    for idx, width in enumerate(_column_widths(headers, sample), start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.append(list(headers))
+    for row in chain(sample, rows):
         ws.append(list(row))
-    for idx, header in enumerate(headers, start=1):
-        width = max(len(str(header)), 12)
-        for row in rows[:200]:
-            if idx - 1 < len(row):
-                width = max(width, min(len(str(row[idx - 1])), 48))
-        ws.column_dimensions[get_column_letter(idx)].width = width + 2
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    if not filename.lower().endswith(".xlsx"):
-        filename = f"{filename}.xlsx"
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=_export_filename(filename, "xlsx"),
+        content_type=XLSX_CONTENT_TYPE,
     )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+
+class _Echo:
+    """File-like object whose write() hands the line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def build_csv_response(filename, headers, rows):
+    """Stream a CSV export line by line straight from the rows iterable."""
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow(list(row)) for row in chain([headers], rows))
+    # The byte-order mark makes Excel read the file as UTF-8.
+    response = StreamingHttpResponse(chain(["\ufeff"], lines), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{_export_filename(filename, "csv")}"'
     return response
 
 
+def build_export_response(fmt, filename, headers, rows):
+    if fmt == "csv":
+        return build_csv_response(filename, headers, rows)
+    return build_xlsx_response(filename, headers, rows)
+
+
 def export_query(request, fmt="pdf"):
     params = request.GET.copy()
     params["format"] = fmt
@@ -185,6 +185,11 @@ def _flatten_statement_row(r):
     ]
 
 
+def statement_export_rows(rows):
+    """Statement rows (with running_balance) as export cells, one at a time."""
+    return (_flatten_statement_row(r) for r in rows)
+
+
 def _flatten_statement_row_with_party(r, party_label):
     return [
         party_label,
@@ -684,10 +689,10 @@ def build_pdf_context(request, filename, context=None):
     ctx = dict(context or {})
     export_fmt = (request.GET.get("format") or "").lower()
     is_pdf = export_fmt == "pdf"
-    is_xlsx = export_fmt == "xlsx"
+    is_sheet = export_fmt in ("xlsx", "csv")
     company = get_company_branding(request)
     base = {
-        "is_pdf": is_pdf or is_xlsx,
+        "is_pdf": is_pdf or is_sheet,
         "pdf_filename": filename,
         "pdf_generated_on": date.today(),
         "company": company,
@@ -703,7 +708,7 @@ def build_pdf_context(request, filename, context=None):
     merged.setdefault("pdf_description_column_index", -1)
     merged.setdefault("pdf_badge_column_index", -1)
     merged.setdefault("pdf_hide_subtitle_in_body", False)
-    if is_pdf or is_xlsx:
+    if is_pdf or is_sheet:
         if not merged.get("date_from") and not merged.get("date_to"):
             from reporting.date_ranges import resolve_report_dates
 
@@ -1253,13 +1258,16 @@ def _reportlab_table_pdf(filename, context):
 def render_or_pdf(request, template_name, context, filename):
     merged = build_pdf_context(request, filename, context)
     export_fmt = (request.GET.get("format") or "").lower()
-    if export_fmt == "xlsx":
-        from accounts_core.export_utils import build_xlsx_response
-
-        headers = merged.get("pdf_table_headers") or []
-        rows = [_pdf_row_cells(r) for r in (merged.get("pdf_table_rows") or [])]
-        xlsx_name = filename.replace(".pdf", "") if filename.endswith(".pdf") else filename
-        return build_xlsx_response(xlsx_name, headers, rows)
+    if export_fmt in ("xlsx", "csv"):
+        from accounts_core.export_utils import build_export_response
+
+        # Views with long reports pass export_headers/export_rows (a lazy iterable of cells).
+        headers = merged.get("export_headers") or merged.get("pdf_table_headers") or []
+        rows = merged.get("export_rows")
+        if rows is None:
+            rows = (_pdf_row_cells(r) for r in (merged.get("pdf_table_rows") or []))
+        export_name = filename.replace(".pdf", "") if filename.endswith(".pdf") else filename
+        return build_export_response(export_fmt, export_name, headers, rows)
     if export_fmt != "pdf":
         merged["is_pdf"] = False
         return render(request, template_name, merged)
@@ -1,11 +1,14 @@
+import csv
 from datetime import date
 from decimal import Decimal
+from io import BytesIO, StringIO
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
 from accounting_bridge.models import PartyOpeningBalance
 from accounts_core.client_querysets import clients_for_select, clients_with_accounting_activity, search_clients
+from accounts_core.export_utils import build_csv_response, build_xlsx_response
 from accounts_core.export_names import export_filename, export_period_suffix, slugify_filename_part
 from accounts_core.models import Client, Employee, Supplier
 from accounts_core.supplier_querysets import (
@@ -40,6 +43,32 @@ class ExportFilenameTests(TestCase):
         )
 
 
+class StreamingExportTests(TestCase):
+    def _rows(self, count):
+        for i in range(count):
+            yield [f"R{i}", Decimal("1.50") * i]
+
+    def test_xlsx_is_written_from_a_generator(self):
+        from openpyxl import load_workbook
+
+        with self.settings(XLSX_WIDTH_SAMPLE_ROWS=3):
+            response = build_xlsx_response("Report", ["Ref", "Amount"], self._rows(10))
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="Report.xlsx"')
+        ws = load_workbook(BytesIO(b"".join(response.streaming_content))).active
+        values = list(ws.iter_rows(values_only=True))
+        self.assertEqual(values[0], ("Ref", "Amount"))
+        self.assertEqual(len(values), 11)
+        self.assertEqual(values[-1], ("R9", 13.5))
+
+    def test_csv_streams_header_and_rows(self):
+        response = build_csv_response("Report.csv", ["Ref", "Amount"], self._rows(3))
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="Report.csv"')
+        text = b"".join(response.streaming_content).decode("utf-8")
+        self.assertTrue(text.startswith("\ufeff"))
+        rows = list(csv.reader(StringIO(text.lstrip("\ufeff"))))
+        self.assertEqual(rows, [["Ref", "Amount"], ["R0", "0.00"], ["R1", "1.50"], ["R2", "3.00"]])
+
+
 class ClientVisibilityTests(TestCase):
     def setUp(self):
         self.user = get_user_model().objects.create_user(username="vis1", password="test12345")
@@ -35,9 +35,12 @@ class AppLoginView(LoginView):
 
 
 def dashboard(request):
+    from datetime import date
+
     from catalog.models import Destination
     from reporting.analytics import build_dashboard_analytics
     from reporting.crm_pipeline_stats import build_crm_pipeline_stats
+    from reporting.dashboard_cache import ACCOUNTING_SCOPE, CRM_SCOPE, cached_section
     from reporting.date_ranges import resolve_report_dates
     from reporting.report_summary import build_report_summary
 
@@ -54,6 +57,14 @@ def dashboard(request):
         emp = Employee.objects.filter(pk=sales_employee_id).values_list('user_id', flat=True).first()
         crm_user_id = emp
 
+    # Builders depend on the date range, both filters, and today (due-date / aging figures).
+    cache_key = (
+        date_from,
+        date_to,
+        sales_employee_id,
+        (request.GET.get('destination') or '').strip(),
+        date.today(),
+    )
     context = {
         "hub_tab": hub_tab,
         "date_from": date_from,
@@ -70,10 +81,19 @@ def dashboard(request):
         "filter_destinations": Destination.objects.order_by('name')[:500],
         "latest_invoices": SalesInvoice.objects.select_related("client").order_by("-created_at")[:10],
         "latest_payments": Payment.objects.select_related("money_account").order_by("-created_at")[:10],
-        **build_dashboard_analytics(request),
-        **build_report_summary(request),
-        **build_destination_stats(date_from, date_to),
-        **build_crm_pipeline_stats(date_from, date_to, sales_employee_id=crm_user_id),
+        **cached_section(
+            "analytics", ACCOUNTING_SCOPE, cache_key, lambda: build_dashboard_analytics(request)
+        ),
+        **cached_section("report_summary", ACCOUNTING_SCOPE, cache_key, lambda: build_report_summary(request)),
+        **cached_section(
+            "destinations", ACCOUNTING_SCOPE, cache_key, lambda: build_destination_stats(date_from, date_to)
+        ),
+        **cached_section(
+            "crm_pipeline",
+            CRM_SCOPE,
+            cache_key,
+            lambda: build_crm_pipeline_stats(date_from, date_to, sales_employee_id=crm_user_id),
+        ),
     }
     return render(request, "acc_dashboard.html", context)
 
@@ -159,7 +179,7 @@ def suppliers_list(request):
     from decimal import Decimal
 
     from accounts_core.list_utils import parse_date
-    from reporting.balances import supplier_ap_balance
+    from reporting.balances import supplier_ap_balances
 
     q = (request.GET.get("q") or "").strip()
     if q:
@@ -173,10 +193,9 @@ def suppliers_list(request):
     today = date.today()
     min_balance = request.GET.get("min_balance")
     sort_by = request.GET.get("sort", "name")
-    rows = []
-    for supplier in qs:
-        balance = supplier_ap_balance(supplier, today)
-        rows.append({"supplier": supplier, "balance": balance})
+    suppliers = list(qs)
+    balances = supplier_ap_balances([s.pk for s in suppliers], today)
+    rows = [{"supplier": s, "balance": balances.get(s.pk, Decimal("0.00"))} for s in suppliers]
     if min_balance:
         try:
             mb = Decimal(min_balance)
@@ -0,0 +1 @@
+"""Helpers shared by the CRM and accounting apps (no models, not an installed app)."""
@@ -0,0 +1,60 @@
+"""Remember selected model field values as last loaded/saved, so saves can diff without re-reading the row."""
+
+from types import SimpleNamespace
+
+
+class TrackedFieldsMixin:
+    """Model mixin that snapshots `tracked_fields` (attnames) in from_db() and after every save.
+
+    tracked_original() returns the snapshot as an attribute namespace (None while
+    the instance has no pk, or its row does not exist). It stays the pre-save state
+    for the whole of save(), pre_save and post_save included, and is replaced once
+    save() returns.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_tracked()
+        return instance
+
+    def snapshot_tracked(self, fields=None):
+        snapshot = dict(getattr(self, '_tracked_state', {}))
+        deferred = self.get_deferred_fields()
+        for attname in self.tracked_fields:
+            if attname in deferred or (fields is not None and attname not in fields):
+                continue
+            snapshot[attname] = getattr(self, attname)
+        self._tracked_state = snapshot
+
+    def _tracked_attnames(self, field_names):
+        return {self._meta.get_field(name).attname for name in field_names}
+
+    def tracked_original(self):
+        if self.pk is None:
+            return None
+        state = getattr(self, '_tracked_state', {})
+        missing = [attname for attname in self.tracked_fields if attname not in state]
+        if missing:
+            # Built by hand or loaded with the field deferred: read the saved values once.
+            row = type(self)._base_manager.using(self._state.db).filter(pk=self.pk).values(*self.tracked_fields).first()
+            if row is None:
+                return None
+            state = {**row, **state}
+            self._tracked_state = state
+        return SimpleNamespace(**state)
+
+    def tracked_changed(self, attname):
+        original = self.tracked_original()
+        return original is None or getattr(original, attname) != getattr(self, attname)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self.snapshot_tracked(None if update_fields is None else self._tracked_attnames(update_fields))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.snapshot_tracked(None if fields is None else self._tracked_attnames(fields))
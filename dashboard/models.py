@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.urls import reverse
+from django.template.loader import render_to_string
 
 
 class Event(models.Model):
@@ -68,28 +68,4 @@ class Event(models.Model):
 
     @property
     def get_html_url(self):
-        if self.leadtask_id:
-            invoice_url = reverse('edit_lead_tasks', args=(self.leadtask_id,))
-            edit_url = reverse('event_edit', args=(self.id,))
-            if not self.done:
-                done_url = reverse('event_done', args=(self.id,))
-                return (
-                    f'<a href="{invoice_url}" class="event-link event-link--invoice">{self.title}</a> '
-                    f'<a href="{edit_url}" class="event-link event-link--edit" title="Edit reminder"><i class="fas fa-pen"></i></a> '
-                    f'<a href="{done_url}" class="done-link" style="color: white;">&times;</a>'
-                )
-            return (
-                f'<a href="{invoice_url}" class="event-link done-event">{self.title}</a>'
-            )
-        edit_url = reverse('event_edit', args=(self.id,))
-        done_url = reverse('event_done', args=(self.id,))
-
-        if not self.done:
-            return f'''
-                <a href="{edit_url}" class="event-link">{self.title}</a> |
-            <a href="{done_url}" class="done-link" style="color: white;">&times;</a>
-            '''
-        else:
-            return f'''
-            <a href="{edit_url}" class="event-link done-event">{self.title}</a>
-            '''
+        return render_to_string('calendar_event.html', {'event': self})
@@ -1,3 +1,60 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Event
+
+
+class CalendarTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent', password='pw')
+        self.client.force_login(self.user)
+
+    def add_event(self, when, title='Trip', **kwargs):
+        return Event.objects.create(user=self.user, title=title, description='', when=when, **kwargs)
+
+    def test_month_grid_loads_events_once_and_escapes_titles(self):
+        for day in range(1, 29):
+            self.add_event(date(2026, 3, day), title=f'Trip {day}')
+        self.add_event(date(2026, 3, 5), title='<b>Smith</b>')
+        self.add_event(date(2026, 4, 1), title='Next month')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('calendar'), {'month': '2026-3', 'event_type': 'all'})
+        event_queries = [q for q in queries.captured_queries if 'dashboard_event' in q['sql']]
+        self.assertEqual(len(event_queries), 1)
+
+        html = response.context['calendar']
+        self.assertIn('<th colspan="7" class="month">March 2026</th>', html)
+        self.assertIn('Trip 28', html)
+        self.assertIn('&lt;b&gt;Smith&lt;/b&gt;', html)
+        self.assertNotIn('Next month', html)
+
+    def test_feed_returns_range_with_filters(self):
+        self.add_event(date(2026, 3, 31), title='Last day')
+        self.add_event(date(2026, 4, 2), title='Follow-up', event_type='invoice')
+        self.add_event(date(2026, 4, 3), title='Done', done=True)
+        self.add_event(date(2026, 5, 1), title='Outside')
+        Event.objects.create(user=User.objects.create_user(username='other'), title='Theirs', description='', when=date(2026, 4, 4))
+
+        data = self.client.get(reverse('calendar_feed'), {
+            'start': '2026-03-31', 'end': '2026-05-01', 'event_type': 'all',
+        }).json()
+        self.assertEqual([e['title'] for e in data['events']], ['Last day', 'Follow-up'])
+        self.assertEqual(data['events'][1]['event_type_label'], 'Follow-up reminder')
+
+        data = self.client.get(reverse('calendar_feed'), {
+            'start': '2026-04-01', 'end': '2026-05-01', 'show_done': 'on',
+        }).json()
+        self.assertEqual([e['title'] for e in data['events']], ['Done'])
+        self.assertIsNone(data['events'][0]['done_url'])
 
-# Create your tests here.
+    def test_feed_rejects_bad_ranges(self):
+        url = reverse('calendar_feed')
+        self.assertEqual(self.client.get(url, {'start': 'x', 'end': '2026-04-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2026-04-01', 'end': '2026-04-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2026-01-01', 'end': '2026-12-31'}).status_code, 400)
@@ -7,6 +7,7 @@ urlpatterns = [
     path('', views.index, name='dashboard'),
     path('overview/', overview_dashboard, name='overview_dashboard'),
     re_path(r'^calendar/$', views.CalendarView.as_view(), name='calendar'),
+    path('calendar/feed/', views.calendar_feed, name='calendar_feed'),
     re_path(r'^event/new/$', views.event, name='event_new'),
     re_path(r'^event/edit/(?P<event_id>\d+)/$', views.event, name='event_edit'),
     path('event/delete/<int:event_id>/', delete_event, name='event_delete'),
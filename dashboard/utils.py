@@ -1,36 +1,58 @@
-from datetime import datetime, timedelta
-from calendar import HTMLCalendar
+from collections import defaultdict
+from datetime import date, timedelta
+from calendar import HTMLCalendar, month_name, day_abbr
+
+from django.db.models import Q
+from django.template.loader import render_to_string
+
 from .models import Event
 
 
+def calendar_events(user, start, end, *, event_type='user', show_done=False):
+    """Events visible to `user` with start <= when < end.
+
+    Staff see everyone's events except other users' follow-ups; others see
+    their own. event_type 'all' (or empty) disables the type filter.
+    """
+    events = Event.objects.filter(when__gte=start, when__lt=end)
+    if user.is_staff:
+        events = events.exclude(Q(event_type='invoice') & ~Q(user=user))
+    else:
+        events = events.filter(user=user)
+    if event_type and event_type != 'all':
+        events = events.filter(event_type=event_type)
+    if not show_done:
+        events = events.filter(done=False)
+    return events
+
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
 class Calendar(HTMLCalendar):
     def __init__(self, year=None, month=None):
         self.year = year
         self.month = month
         super(Calendar, self).__init__()
 
-    def formatday(self, day, events):
-        events_per_day = events.filter(when__day=day)
-        d = ''
-        for event in events_per_day:
-            d += f'<li class="event-item {event.event_type}"> {event.get_html_url} </li>'
-
-        if day != 0:
-            return f"<td><span class='date'>{day}</span><ul> {d} </ul></td>"
-        return '<td></td>'
-
-    def formatweek(self, theweek, events):
-        week = ''
-        for d, weekday in theweek:
-            week += self.formatday(d, events)
-        return f'<tr> {week} </tr>'
+    def group_by_day(self, events):
+        """Evaluate `events` once and bucket them by day of the month."""
+        by_day = defaultdict(list)
+        for event in events:
+            by_day[event.when.day].append(event)
+        return by_day
 
     def formatmonth(self, withyear=True, events=None):
-        if events is None:
-            events = []
-        cal = f'<table border="0" cellpadding="0" cellspacing="0" class="calendar">\n'
-        cal += f'{self.formatmonthname(self.year, self.month, withyear=withyear)}\n'
-        cal += f'{self.formatweekheader()}\n'
-        for week in self.monthdays2calendar(self.year, self.month):
-            cal += f'{self.formatweek(week, events)}\n'
-        return cal
\ No newline at end of file
+        by_day = self.group_by_day(events if events is not None else [])
+        weeks = [
+            [{'day': day, 'events': by_day.get(day, [])} for day, _ in week]
+            for week in self.monthdays2calendar(self.year, self.month)
+        ]
+        return render_to_string('calendar_month.html', {
+            'title': f'{month_name[self.month]} {self.year}' if withyear else month_name[self.month],
+            'weekdays': [(self.cssclasses[d], day_abbr[d]) for d in self.iterweekdays()],
+            'weeks': weeks,
+        })
@@ -2,14 +2,14 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView
 from datetime import datetime, timedelta, date
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.views import generic
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 import calendar
 from django.db.models import Count, Q, Sum
 from .models import Event
-from .utils import Calendar
+from .utils import Calendar, calendar_events, month_bounds
 from .forms import EventForm
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
@@ -64,27 +64,8 @@ class CalendarView(LoginRequiredMixin, generic.ListView):
         # Check if user wants to see done events
         show_done = self.request.GET.get('show_done')  # 'on' or None
 
-        # Staff vs. non-staff logic
-        if user.is_staff:
-            events = Event.objects.filter(
-                when__year=d.year,
-                when__month=d.month
-            ).exclude(
-                Q(event_type='invoice') & ~Q(user=user)
-            )
-        else:
-            events = Event.objects.filter(
-                user=user,
-                when__year=d.year,
-                when__month=d.month
-            )
-
-        if event_type and event_type != 'all':
-            events = events.filter(event_type=event_type)
-
-        # Exclude done events unless "show_done=on"
-        if show_done != 'on':
-            events = events.filter(done=False)
+        start, end = month_bounds(d.year, d.month)
+        events = calendar_events(user, start, end, event_type=event_type, show_done=show_done == 'on')
 
         # Generate the calendar
         cal = Calendar(d.year, d.month)
@@ -112,6 +93,50 @@ class CalendarView(LoginRequiredMixin, generic.ListView):
         return context
 
 
+CALENDAR_FEED_MAX_DAYS = 93
+
+
+@login_required(login_url="/login/")
+def calendar_feed(request):
+    """Events between ?start= and ?end= (YYYY-MM-DD, end exclusive) as JSON, for loading adjacent months."""
+    try:
+        start = date.fromisoformat(request.GET.get('start', ''))
+        end = date.fromisoformat(request.GET.get('end', ''))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'start and end must be YYYY-MM-DD'}, status=400)
+    if not start < end <= start + timedelta(days=CALENDAR_FEED_MAX_DAYS):
+        return JsonResponse(
+            {'status': 'error', 'message': f'Range must be 1 to {CALENDAR_FEED_MAX_DAYS} days'}, status=400
+        )
+
+    events = calendar_events(
+        request.user, start, end,
+        event_type=request.GET.get('event_type', 'user'),
+        show_done=request.GET.get('show_done') == 'on',
+    ).order_by('when', 'id')
+    type_labels = dict(Event.TYPE_CHOICES)
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'events': [
+            {
+                'id': event.id,
+                'title': event.title,
+                'when': event.when.isoformat(),
+                'event_type': event.event_type,
+                'event_type_label': type_labels.get(event.event_type, event.event_type),
+                'done': event.done,
+                'url': (
+                    reverse('edit_lead_tasks', args=(event.leadtask_id,)) if event.leadtask_id
+                    else reverse('event_edit', args=(event.id,))
+                ),
+                'done_url': None if event.done else reverse('event_done', args=(event.id,)),
+            }
+            for event in events
+        ],
+    })
+
+
 def get_date(req_month):
     if req_month:
         year, month = (int(x) for x in req_month.split('-'))
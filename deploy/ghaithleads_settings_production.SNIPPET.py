@@ -28,6 +28,17 @@ STATIC_ROOT = BASE_DIR / 'static'
 STATIC_URL = '/static/'
 # Do not set STATICFILES_STORAGE to ManifestStaticFilesStorage on production.
 
+# Shared cache for all web workers (dashboard cache, notification throttles).
+# Run once on server: python manage.py createcachetable
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'crm_cache',
+    }
+}
+DASHBOARD_CACHE_ALIAS = 'default'
+DASHBOARD_CACHE_TIMEOUT = 600
+
 # Add to INSTALLED_APPS:
 # 'notifications',
 
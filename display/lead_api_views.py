@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
+from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
@@ -11,11 +12,14 @@ from django.views.decorators.http import require_http_methods
 
 from display.api_utils import auth_or_401, json_error, parse_json_body
 from display.constants import DEPARTMENT_DEFINITIONS, LEAD_STATUS_API_LABELS
-from display.models import CrmNotification, Department, Lead
+from display.models import PHONE_TAIL_DIGITS, CrmNotification, Department, Lead
+from display.phone_utils import digits_only, phone_suffix_q
 from display.lead_errors import LeadSyncError
+from display.services.lead_search import search_leads
 from display.services.lead_sync import (
     create_or_update_lead_from_dashboard,
     serialize_lead,
+    sync_leads_batch,
     update_lead_from_dashboard,
 )
 
@@ -97,6 +101,49 @@ def api_sync_lead(request):
     return JsonResponse(serialize_lead(lead), status=201 if created else 200)
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_sync_leads_batch(request):
+    """
+    Create or update many CRM leads from the WhatsApp AI dashboard in one request.
+
+    Body: {"leads": [<api_sync_lead payload>, ...]} (or a bare list), at most
+    LEAD_SYNC_BATCH_LIMIT items. Items are applied in order in one transaction;
+    invalid items are reported without blocking the rest.
+    """
+    unauthorized = auth_or_401(request)
+    if unauthorized:
+        return unauthorized
+
+    data, err = parse_json_body(request)
+    if err:
+        return err
+
+    items = data.get("leads") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return json_error("leads must be a non-empty list of lead objects", code="MISSING_FIELDS")
+    limit = getattr(settings, "LEAD_SYNC_BATCH_LIMIT", 500)
+    if len(items) > limit:
+        return json_error(
+            f"At most {limit} leads per batch",
+            code="BATCH_TOO_LARGE",
+            extra={"limit": limit, "received": len(items)},
+        )
+
+    results = sync_leads_batch(items)
+    failed = sum(1 for item in results if "error" in item)
+    created = sum(1 for item in results if item.get("created"))
+    return JsonResponse(
+        {
+            "results": results,
+            "created": created,
+            "updated": len(results) - failed - created,
+            "failed": failed,
+        },
+        status=200,
+    )
+
+
 @csrf_exempt
 def api_lead_detail(request, lead_id: int):
     unauthorized = auth_or_401(request)
@@ -179,17 +226,24 @@ def api_search_leads(request):
 
     phone = (request.GET.get("phone") or "").strip()
     external_id = (request.GET.get("external_id") or "").strip()
-    if not phone and not external_id:
+    query = (request.GET.get("q") or "").strip()
+    if not phone and not external_id and not query:
         return json_error(
-            "phone or external_id query parameter is required",
+            "phone, external_id or q query parameter is required",
             code="MISSING_FIELDS",
         )
 
-    qs = Lead.objects.all().order_by("-created_at")
+    qs = Lead.objects.select_related("assigned_to", "department").order_by("-created_at")
     if external_id:
         qs = qs.filter(external_id=external_id)
     if phone:
-        qs = qs.filter(phone__icontains=phone)
+        digits = digits_only(phone)
+        if len(digits) >= PHONE_TAIL_DIGITS:
+            qs = qs.filter(phone_suffix_q(digits))
+        else:
+            qs = qs.filter(phone__icontains=phone)
+    if query:
+        qs = search_leads(qs, query)
 
     return JsonResponse({"results": [serialize_lead(lead) for lead in qs[:50]]}, status=200)
 
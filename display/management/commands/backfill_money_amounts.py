@@ -0,0 +1,52 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from display.models import Lead
+from display.money import backfill_money_amounts
+from tasks.models import Service
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the numeric money columns of leads (selling_price/net/profit) and CRM services "
+        "(net/issue_price/selling) from their text fields, and report text that is not a number."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count stale rows and report parse errors; write nothing.",
+        )
+        parser.add_argument(
+            "--report",
+            default="",
+            help="Write every parse error to this CSV file (model, id, field, value).",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=20,
+            help="Parse errors to print per model (default 20).",
+        )
+
+    def handle(self, *args, **options):
+        write = not options["dry_run"]
+        report_rows = []
+        for label, model in (("Lead", Lead), ("Service", Service)):
+            changed, errors = backfill_money_amounts(model, model.MONEY_FIELDS, write=write)
+            verb = "updated" if write else "stale"
+            self.stdout.write(self.style.SUCCESS(f"{label}: {changed} row(s) {verb}, {len(errors)} parse error(s)."))
+            for pk, field, value in errors[: options["show"]]:
+                self.stdout.write(self.style.WARNING(f"  {label} #{pk} {field}: {value!r}"))
+            if len(errors) > options["show"]:
+                self.stdout.write(f"  ... {len(errors) - options['show']} more")
+            report_rows.extend((label, pk, field, value) for pk, field, value in errors)
+
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(["model", "id", "field", "value"])
+                writer.writerows(report_rows)
+            self.stdout.write(self.style.SUCCESS(f"Parse error report written to {options['report']}."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from display.services.lead_search import rebuild_lead_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized lead search documents (and their full-text index) for every lead."
+
+    def handle(self, *args, **options):
+        written = rebuild_lead_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} lead(s)."))
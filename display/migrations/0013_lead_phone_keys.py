@@ -0,0 +1,42 @@
+# Generated by Django 5.0.2 on 2026-10-17 18:12
+
+import re
+
+from django.db import migrations, models
+
+PHONE_TAIL_DIGITS = 7
+
+
+def backfill_phone_keys(apps, schema_editor):
+    Lead = apps.get_model('display', 'Lead')
+    batch = []
+    for lead in Lead.objects.only('id', 'phone').iterator(chunk_size=2000):
+        lead.phone_digits = re.sub(r'\D', '', lead.phone or '')
+        lead.phone_tail = lead.phone_digits[-PHONE_TAIL_DIGITS:]
+        batch.append(lead)
+        if len(batch) >= 2000:
+            Lead.objects.bulk_update(batch, ['phone_digits', 'phone_tail'])
+            batch = []
+    if batch:
+        Lead.objects.bulk_update(batch, ['phone_digits', 'phone_tail'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('display', '0012_seed_departments_and_profiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Digits of phone (kept in sync on save) for indexed lookups.', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='phone_tail',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Last digits of phone for indexed suffix matching.', max_length=7),
+        ),
+        migrations.RunPython(backfill_phone_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 5.0.2 on 2026-10-17 18:15
+
+import sqlite3
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'display_leadsearch_fts'
+DOCUMENT_TABLE = 'display_leadsearchdocument'
+
+# Snapshot of display.services.lead_search.DOCUMENT_FIELDS at the time of this migration.
+DOCUMENT_FIELDS = (
+    'name',
+    'phone',
+    'phone_digits',
+    'email',
+    'destination',
+    'channel',
+    'whatsapp_received_on',
+    'reason_of_travel',
+    'chat_summary',
+    'finalization_notes',
+    'special_request',
+    'assignment_notes',
+)
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(body, tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.lead_id, new.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.lead_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.lead_id;
+        INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.lead_id, new.body);
+    END""",
+]
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS display_leadsearch_body_trgm ON {DOCUMENT_TABLE} USING gin (UPPER(body::text) gin_trgm_ops)",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS display_leadsearch_body_trgm",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    # The trigram tokenizer needs SQLite 3.34; older builds fall back to icontains.
+    if vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34, 0):
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRESQL_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRESQL_BACKWARD)
+
+
+def backfill_documents(apps, schema_editor):
+    Lead = apps.get_model('display', 'Lead')
+    LeadPassenger = apps.get_model('display', 'LeadPassenger')
+    LeadSearchDocument = apps.get_model('display', 'LeadSearchDocument')
+    passengers = {}
+    for lead_id, name in LeadPassenger.objects.order_by('id').values_list('lead_id', 'name').iterator():
+        passengers.setdefault(lead_id, []).append(name)
+    batch = []
+    leads = Lead.objects.select_related('department').only(*DOCUMENT_FIELDS, 'department__name')
+    for lead in leads.iterator(chunk_size=2000):
+        parts = [getattr(lead, field) or '' for field in DOCUMENT_FIELDS]
+        parts.extend(passengers.get(lead.pk, ()))
+        parts.append(lead.department.name if lead.department_id else '')
+        body = '\n'.join(str(part).strip() for part in parts if part and str(part).strip())
+        batch.append(LeadSearchDocument(lead_id=lead.pk, body=body))
+        if len(batch) >= 2000:
+            LeadSearchDocument.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        LeadSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('display', '0013_lead_phone_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadSearchDocument',
+            fields=[
+                ('lead', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='display.lead')),
+                ('body', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
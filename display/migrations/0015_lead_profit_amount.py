@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-17 18:25
+
+from django.db import migrations, models
+
+from display.money import parse_money_amount
+
+
+def backfill_profit_amount(apps, schema_editor):
+    Lead = apps.get_model('display', 'Lead')
+    batch = []
+    for lead in Lead.objects.exclude(profit='').only('id', 'profit').iterator(chunk_size=2000):
+        lead.profit_amount = parse_money_amount(lead.profit)
+        batch.append(lead)
+        if len(batch) >= 2000:
+            Lead.objects.bulk_update(batch, ['profit_amount'])
+            batch = []
+    if batch:
+        Lead.objects.bulk_update(batch, ['profit_amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('display', '0014_lead_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='profit_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Numeric value of profit (kept in sync on save) for SQL aggregation.', max_digits=14, null=True),
+        ),
+        migrations.RunPython(backfill_profit_amount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-17 18:29
+
+from django.db import migrations, models
+
+from display.money import backfill_money_amounts
+
+
+def backfill_amounts(apps, schema_editor):
+    backfill_money_amounts(
+        apps.get_model('display', 'Lead'),
+        {'selling_price': 'selling_price_amount', 'net': 'net_amount', 'profit': 'profit_amount'},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('display', '0015_lead_profit_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='net_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Numeric value of net (kept in sync on save) for SQL aggregation.', max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='selling_price_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Numeric value of selling_price (kept in sync on save) for SQL aggregation.', max_digits=14, null=True),
+        ),
+        migrations.RunPython(backfill_amounts, migrations.RunPython.noop),
+    ]
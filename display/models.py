@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 from tasks.models import LeadTask
+from common.field_tracking import TrackedFieldsMixin
+from display.money import sync_money_amounts
 from django.utils import timezone
 import re
 
@@ -55,6 +57,11 @@ class CrmUserProfile(models.Model):
         return f"{self.user.username} — {dept}"
 
 
+# Trailing digits indexed for duplicate / search matching. Local numbers shorter
+# than this are too ambiguous to match on suffix (see phone_utils.find_duplicate_leads).
+PHONE_TAIL_DIGITS = 7
+
+
 def get_destination_choices():
     """Callable: loads destinations from DB when the field is rendered (e.g. add lead form). No server restart needed after adding in admin."""
     choices = [('', 'Select Destination')]
@@ -66,7 +73,9 @@ def get_destination_choices():
     return choices
 
 
-class Lead(models.Model):
+class Lead(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('status', 'takeover', 'offer_prepared', 'assigned_to_id', 'sold')
+
     reason_of_travel = models.TextField(blank=True, null=True)
     why_this_destination = models.TextField(blank=True, null=True)
     travel_dates_flexible = models.BooleanField(blank=True, default=False)
@@ -78,6 +87,22 @@ class Lead(models.Model):
     email = models.EmailField(blank=True, null=True)
     country_code = models.CharField(max_length=5, default='+961')
     phone = models.CharField(max_length=15)
+    phone_digits = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        help_text="Digits of phone (kept in sync on save) for indexed lookups.",
+    )
+    phone_tail = models.CharField(
+        max_length=PHONE_TAIL_DIGITS,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        help_text="Last digits of phone for indexed suffix matching.",
+    )
     whatsapp_received_on = models.CharField(
         max_length=30,
         blank=True,
@@ -162,41 +187,98 @@ class Lead(models.Model):
     offer_prepared = models.BooleanField(default=False)
     offer_details = models.TextField(blank=True, null=True)
     moved_to_negotiation = models.BooleanField(default=False)  # New field
+    selling_price_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Numeric value of selling_price (kept in sync on save) for SQL aggregation.",
+    )
+    net_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Numeric value of net (kept in sync on save) for SQL aggregation.",
+    )
+    profit_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Numeric value of profit (kept in sync on save) for SQL aggregation.",
+    )
 
-    def save(self, *args, **kwargs):
-        if self.pk is not None:
-            original = Lead.objects.get(pk=self.pk)
-            if original.status == 'onhold' and self.status != 'onhold':
-                self.status_changed_at = timezone.now()
-            elif self.status in ['processing', 'negotiation'] and self.status != original.status:
-                self.status_changed_at = timezone.now()
-                self.period = 4320
-            elif self.offer_prepared and not original.offer_prepared:
-                self.status_changed_at = timezone.now()
-                self.period = 4320
-
-            if original.status != 'negotiation' and self.status == 'negotiation':
-                self.moved_to_negotiation = True  # Mark as moved to negotiation
-
-            if original.assigned_to != self.assigned_to:
-                self.assigned_at = timezone.now().date()
-
-            if original.takeover is False and self.takeover is True:
-                self.takeover_added_at = timezone.now()
-        else:
+    # Free-text money field -> its numeric column (see display.money).
+    MONEY_FIELDS = {
+        'selling_price': 'selling_price_amount',
+        'net': 'net_amount',
+        'profit': 'profit_amount',
+    }
+    # Columns derived from another field in save(); written whenever their source is.
+    DERIVED_FIELDS = {
+        'phone': ('phone_digits', 'phone_tail'),
+        **{source: (target,) for source, target in MONEY_FIELDS.items()},
+    }
+
+    def sync_phone_keys(self):
+        self.phone_digits = re.sub(r'\D', '', self.phone or '')
+        self.phone_tail = self.phone_digits[-PHONE_TAIL_DIGITS:]
+
+    def sync_derived_fields(self):
+        self.sync_phone_keys()
+        sync_money_amounts(self, self.MONEY_FIELDS)
+
+    def apply_transitions(self, original):
+        """Set the timestamps/flags that follow from moving from original (None = new lead) to self."""
+        if original is None:
             self.assigned_at = timezone.now()
             if self.takeover:
                 self.takeover_added_at = timezone.now()
+            return
+
+        if original.status == 'onhold' and self.status != 'onhold':
+            self.status_changed_at = timezone.now()
+        elif self.status in ['processing', 'negotiation'] and self.status != original.status:
+            self.status_changed_at = timezone.now()
+            self.period = 4320
+        elif self.offer_prepared and not original.offer_prepared:
+            self.status_changed_at = timezone.now()
+            self.period = 4320
 
-        if self.sold:
-            selfleads = LeadTask.objects.filter(lead=self)
-            if not selfleads:
-                LeadTask.objects.create(
-                    lead=self,
-                    assigned_to=self.assigned_to,
-                    status="onhold"
-                )
+        if original.status != 'negotiation' and self.status == 'negotiation':
+            self.moved_to_negotiation = True  # Mark as moved to negotiation
+
+        if original.assigned_to_id != self.assigned_to_id:
+            self.assigned_at = timezone.now().date()
+
+        if original.takeover is False and self.takeover is True:
+            self.takeover_added_at = timezone.now()
+
+    def save(self, *args, **kwargs):
+        self.sync_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = [name for source in update_fields for name in self.DERIVED_FIELDS.get(source, ())]
+            if derived:
+                kwargs['update_fields'] = {*update_fields, *derived}
+        original = self.tracked_original()
+        self.apply_transitions(original)
+
+        # Only a lead that just became sold can be missing its task.
+        needs_task = self.sold and (original is None or not original.sold)
+        if needs_task and self.pk is not None:
+            needs_task = not LeadTask.objects.filter(lead=self).exists()
         super(Lead, self).save(*args, **kwargs)
+        if needs_task:
+            LeadTask.objects.create(
+                lead=self,
+                assigned_to=self.assigned_to,
+                status="onhold"
+            )
 
     @property
     def is_overdue(self):
@@ -223,6 +305,22 @@ class LeadPassenger(models.Model):
         return self.name
 
 
+class LeadSearchDocument(models.Model):
+    """Denormalized search text for one lead (see display.services.lead_search)."""
+
+    lead = models.OneToOneField(
+        Lead,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+    )
+    body = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for lead {self.lead_id}"
+
+
 class CrmNotification(models.Model):
     """
     Lightweight record to track CRM notifications created when a summary is sent
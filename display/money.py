@@ -0,0 +1,69 @@
+"""Parse the free-text price fields agents type ("$1,250", "1250.5 USD") into Decimals."""
+
+import re
+from decimal import Decimal, InvalidOperation
+
+_CENT = Decimal('0.01')
+# Largest magnitude that fits the DecimalField(max_digits=14, decimal_places=2) columns.
+_LIMIT = Decimal('1e12')
+# Thousands separators, the dollar sign, a USD code and whitespace are decoration, not part of the number.
+_DECORATION = re.compile(r'[,$\s]|usd', re.IGNORECASE)
+
+
+def parse_money_amount(value):
+    """Two-decimal Decimal for a typed amount, or None when it is blank or not a number."""
+    if value is None:
+        return None
+    cleaned = _DECORATION.sub('', str(value))
+    if not cleaned:
+        return None
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        return None
+    if not amount.is_finite() or abs(amount) >= _LIMIT:
+        return None
+    return amount.quantize(_CENT)
+
+
+def money_parse_error(value):
+    """True when value has text in it that parse_money_amount could not read as a number."""
+    return bool((value or '').strip()) and parse_money_amount(value) is None
+
+
+def sync_money_amounts(instance, pairs):
+    """Set each amount field from its text field; pairs maps text field -> amount field."""
+    for source, target in pairs.items():
+        setattr(instance, target, parse_money_amount(getattr(instance, source)))
+
+
+def backfill_money_amounts(model, pairs, *, batch_size=2000, write=True):
+    """Recompute the amount columns of every row of model from its text fields.
+
+    pairs maps text field -> amount field. Works with historical models (migrations).
+    Returns (changed, errors): how many rows had a stale amount, and a list of
+    (pk, text field, raw value) for text that could not be parsed.
+    """
+    changed = 0
+    errors = []
+    batch = []
+    fields = ['pk', *pairs, *pairs.values()]
+    for row in model.objects.only(*fields[1:]).order_by('pk').iterator(chunk_size=batch_size):
+        stale = False
+        for source, target in pairs.items():
+            raw = getattr(row, source)
+            amount = parse_money_amount(raw)
+            if amount is None and (raw or '').strip():
+                errors.append((row.pk, source, raw))
+            if getattr(row, target) != amount:
+                setattr(row, target, amount)
+                stale = True
+        if stale:
+            changed += 1
+            batch.append(row)
+        if write and len(batch) >= batch_size:
+            model.objects.bulk_update(batch, list(pairs.values()))
+            batch = []
+    if write and batch:
+        model.objects.bulk_update(batch, list(pairs.values()))
+    return changed, errors
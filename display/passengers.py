@@ -1,5 +1,8 @@
 """Helpers for saving lead passengers from form POST data."""
 
+from display.models import LeadPassenger
+from display.services.lead_search import refresh_lead_search_documents
+
 
 def save_lead_passengers(lead, names):
     """Replace all passengers for a lead with the given list of names."""
@@ -13,5 +16,7 @@ def save_lead_passengers(lead, names):
         cleaned.append(name[:100])
 
     lead.passengers.all().delete()
-    for name in cleaned:
-        lead.passengers.create(name=name)
+    # bulk_create skips post_save, so the search document is refreshed once below.
+    LeadPassenger.objects.bulk_create([LeadPassenger(lead=lead, name=name) for name in cleaned])
+    if cleaned:
+        refresh_lead_search_documents([lead.pk])
@@ -1,6 +1,8 @@
 import re
 
-from .models import Lead
+from django.db.models import Q
+
+from .models import PHONE_TAIL_DIGITS, Lead
 
 
 def digits_only(value):
@@ -47,24 +49,15 @@ def find_duplicate_leads(country_code, phone, exclude_pk=None):
     if not local_digits:
         return []
 
-    qs = Lead.objects.all()
+    match = Q(phone_digits=full_digits) if full_digits else Q(pk__in=[])
+    if len(local_digits) >= PHONE_TAIL_DIGITS:
+        match |= phone_suffix_q(local_digits)
+    qs = Lead.objects.filter(match)
     if exclude_pk:
         qs = qs.exclude(pk=exclude_pk)
+    return list(qs.order_by('pk'))
+
 
-    duplicates = []
-    seen = set()
-    for lead in qs:
-        lead_digits = digits_only(lead.phone)
-        if not lead_digits:
-            continue
-        matched = False
-        if full_digits and lead_digits == full_digits:
-            matched = True
-        elif len(local_digits) >= 7 and (
-            lead_digits == local_digits or lead_digits.endswith(local_digits)
-        ):
-            matched = True
-        if matched and lead.pk not in seen:
-            duplicates.append(lead)
-            seen.add(lead.pk)
-    return duplicates
+def phone_suffix_q(digits):
+    """Leads whose phone digits end with digits (indexed on the stored tail)."""
+    return Q(phone_tail=digits[-PHONE_TAIL_DIGITS:], phone_digits__endswith=digits)
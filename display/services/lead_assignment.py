@@ -8,6 +8,36 @@ from django.db.models import Count, Q
 from display.models import Department
 
 
+def _active_users():
+    return User.objects.filter(is_active=True)
+
+
+def _explicit_user(explicit_username: str, department: Department | None) -> User | None:
+    users_qs = _active_users().select_related("crm_profile")
+    user = users_qs.filter(username__iexact=explicit_username).first()
+    if not user:
+        user = users_qs.filter(first_name__iexact=explicit_username).first()
+    if user and _user_in_department(user, department):
+        return user
+    return None
+
+
+def _department_candidates(department: Department):
+    """Active users eligible for the department's leads, annotated with open_leads, or None."""
+    dept_users = _active_users().filter(crm_profile__department=department)
+    candidates = dept_users.filter(crm_profile__receives_lead_assignments=True)
+    if not candidates.exists():
+        candidates = dept_users
+    if not candidates.exists():
+        return None
+    return candidates.annotate(
+        open_leads=Count(
+            "current",
+            filter=Q(current__is_archived=False) & ~Q(current__status="done"),
+        )
+    ).order_by("open_leads", "id")
+
+
 def assign_user_for_department(
     department: Department | None,
     *,
@@ -22,35 +52,62 @@ def assign_user_for_department(
       3) first active user in department (any)
       4) first active user in CRM (fallback)
     """
-    users_qs = User.objects.filter(is_active=True)
-
     if explicit_username:
-        user = users_qs.filter(username__iexact=explicit_username).first()
-        if not user:
-            user = users_qs.filter(first_name__iexact=explicit_username).first()
-        if user and _user_in_department(user, department):
+        user = _explicit_user(explicit_username, department)
+        if user:
             return user
 
     if not department:
-        return users_qs.order_by("id").first()
+        return _active_users().order_by("id").first()
 
-    dept_users = users_qs.filter(crm_profile__department=department)
-    candidates = dept_users.filter(crm_profile__receives_lead_assignments=True)
-    if not candidates.exists():
-        candidates = dept_users
-    if not candidates.exists():
-        return users_qs.order_by("id").first()
+    candidates = _department_candidates(department)
+    if candidates is None:
+        return _active_users().order_by("id").first()
+    return candidates.first()
+
+
+class BatchAssigner:
+    """assign_user_for_department for many leads at once.
+
+    Candidate loads are read once per department and then kept up to date in
+    memory, so a batch spreads its new leads across the department instead of
+    handing them all to whoever was least loaded when the batch started.
+    """
+
+    def __init__(self):
+        self._pools = {}
+        self._explicit = {}
+        self._fallback = None
+
+    def _fallback_user(self):
+        if self._fallback is None:
+            self._fallback = _active_users().order_by("id").first() or False
+        return self._fallback or None
 
-    return (
-        candidates.annotate(
-            open_leads=Count(
-                "current",
-                filter=Q(current__is_archived=False) & ~Q(current__status="done"),
+    def _pool(self, department: Department):
+        if department.pk not in self._pools:
+            candidates = _department_candidates(department)
+            self._pools[department.pk] = (
+                [[user.open_leads, user.id, user] for user in candidates] if candidates is not None else []
             )
-        )
-        .order_by("open_leads", "id")
-        .first()
-    )
+        return self._pools[department.pk]
+
+    def assign(self, department: Department | None, *, explicit_username: str | None = None) -> User | None:
+        if explicit_username:
+            key = (department.pk if department else None, explicit_username.lower())
+            if key not in self._explicit:
+                self._explicit[key] = _explicit_user(explicit_username, department)
+            if self._explicit[key]:
+                return self._explicit[key]
+
+        if not department:
+            return self._fallback_user()
+        pool = self._pool(department)
+        if not pool:
+            return self._fallback_user()
+        entry = min(pool, key=lambda item: (item[0], item[1]))
+        entry[0] += 1
+        return entry[2]
 
 
 def _user_in_department(user: User, department: Department | None) -> bool:
@@ -0,0 +1,236 @@
+"""Full-text lead search over a denormalized per-lead document.
+
+Each lead has one LeadSearchDocument whose body concatenates the text the list
+views search (name, phone and its digits, passengers, destination, chat summary,
+notes, department, ...). The index behind it depends on the database:
+
+  * SQLite: an FTS5 table kept in sync by triggers on the document table
+    (trigram tokenizer, so terms match anywhere inside a word like icontains),
+    ranked with bm25().
+  * PostgreSQL: a pg_trgm GIN index on UPPER(body) that serves icontains,
+    ranked with ts_rank().
+  * Anything else: icontains on the document body, unranked.
+
+Documents are refreshed from display.signals on every Lead, LeadPassenger and
+Department write; rebuild_lead_search_index rebuilds them all.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from display.models import Lead, LeadPassenger, LeadSearchDocument
+
+FTS_TABLE = 'display_leadsearch_fts'
+
+# Trigram FTS5 phrases shorter than this never match; such terms use icontains.
+MIN_FTS_TERM_LENGTH = 3
+
+# Lead fields copied into the document, in order.
+DOCUMENT_FIELDS = (
+    'name',
+    'phone',
+    'phone_digits',
+    'email',
+    'destination',
+    'channel',
+    'whatsapp_received_on',
+    'reason_of_travel',
+    'chat_summary',
+    'finalization_notes',
+    'special_request',
+    'assignment_notes',
+)
+
+_BATCH_SIZE = 500
+
+_deferred = threading.local()
+
+
+def build_document_body(lead, passenger_names=(), department_name=''):
+    """Search text for a lead: its DOCUMENT_FIELDS, passenger names and department, one per line."""
+    parts = [getattr(lead, field) or '' for field in DOCUMENT_FIELDS]
+    parts.extend(passenger_names)
+    parts.append(department_name or '')
+    return '\n'.join(str(part).strip() for part in parts if part and str(part).strip())
+
+
+def _passenger_names(lead_ids):
+    names = {}
+    rows = LeadPassenger.objects.filter(lead_id__in=lead_ids).order_by('id').values_list('lead_id', 'name')
+    for lead_id, name in rows:
+        names.setdefault(lead_id, []).append(name)
+    return names
+
+
+def _write_documents(leads):
+    leads = list(leads)
+    if not leads:
+        return 0
+    names = _passenger_names([lead.pk for lead in leads])
+    documents = [
+        LeadSearchDocument(
+            lead_id=lead.pk,
+            body=build_document_body(
+                lead,
+                names.get(lead.pk, ()),
+                lead.department.name if lead.department_id else '',
+            ),
+        )
+        for lead in leads
+    ]
+    LeadSearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['lead'],
+        update_fields=['body', 'updated_at'],
+    )
+    return len(documents)
+
+
+def _pending_ids():
+    return getattr(_deferred, 'lead_ids', None)
+
+
+@contextmanager
+def deferred_indexing():
+    """Collect document refreshes requested inside the block and write them in one pass on exit."""
+    if _pending_ids() is not None:
+        yield
+        return
+    _deferred.lead_ids = set()
+    try:
+        yield
+        lead_ids = _deferred.lead_ids
+    finally:
+        _deferred.lead_ids = None
+    refresh_lead_search_documents(sorted(lead_ids))
+
+
+def index_lead(lead):
+    """Refresh the document for a saved lead instance (no reload of the lead row)."""
+    if lead.pk is None:
+        return
+    pending = _pending_ids()
+    if pending is not None:
+        pending.add(lead.pk)
+        return
+    _write_documents([lead])
+
+
+def schedule_refresh(lead_ids):
+    """refresh_lead_search_documents, or queue the ids when inside deferred_indexing()."""
+    pending = _pending_ids()
+    if pending is not None:
+        pending.update(lead_ids)
+        return
+    refresh_lead_search_documents(lead_ids)
+
+
+def refresh_lead_search_documents(lead_ids):
+    """Rebuild the documents for the given lead ids; returns how many were written."""
+    lead_ids = list(lead_ids)
+    written = 0
+    for start in range(0, len(lead_ids), _BATCH_SIZE):
+        chunk = lead_ids[start:start + _BATCH_SIZE]
+        leads = Lead.objects.filter(pk__in=chunk).select_related('department').only(
+            *DOCUMENT_FIELDS, 'department__name'
+        )
+        written += _write_documents(leads)
+    return written
+
+
+def rebuild_lead_search_index():
+    """Rebuild every lead's document; returns how many were written."""
+    lead_ids = list(Lead.objects.order_by('pk').values_list('pk', flat=True))
+    LeadSearchDocument.objects.exclude(lead_id__in=Lead.objects.values('pk')).delete()
+    return refresh_lead_search_documents(lead_ids)
+
+
+def search_terms(query):
+    return [term for term in (query or '').split() if term]
+
+
+def _fts_match(terms):
+    # Quote every term so user input never reaches FTS5 query syntax.
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _contains_q(terms):
+    q = Q()
+    for term in terms:
+        q &= Q(search_document__body__icontains=term)
+    return q
+
+
+def _sqlite_fts_available():
+    # The FTS table is only created where SQLite ships the trigram tokenizer (0014).
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def _search_contains(queryset, terms):
+    return queryset.filter(_contains_q(terms)).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _search_sqlite(queryset, terms):
+    if not _sqlite_fts_available():
+        return _search_contains(queryset, terms)
+    fts_terms = [term for term in terms if len(term) >= MIN_FTS_TERM_LENGTH]
+    short_terms = [term for term in terms if len(term) < MIN_FTS_TERM_LENGTH]
+    if not fts_terms:
+        return _search_contains(queryset, short_terms)
+    if short_terms:
+        queryset = queryset.filter(_contains_q(short_terms))
+    match = _fts_match(fts_terms)
+    lead_table = connection.ops.quote_name(Lead._meta.db_table)
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    ).annotate(
+        # bm25() is lower-is-better; negate it so every backend sorts search_rank descending.
+        search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {lead_table}.id',
+            [match],
+            output_field=FloatField(),
+        )
+    )
+
+
+def _search_postgresql(queryset, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    return queryset.filter(_contains_q(terms)).annotate(
+        search_rank=SearchRank(
+            SearchVector('search_document__body'),
+            SearchQuery(' '.join(terms), search_type='plain'),
+        )
+    )
+
+
+def search_leads(queryset, query, *, ranked=True):
+    """Restrict a Lead queryset to leads whose document contains every term in query.
+
+    Matching is case-insensitive substring matching per term (like icontains, but
+    ANDed across whitespace-separated terms). Results are annotated with search_rank
+    (higher is better); when ranked is True they are ordered by it, newest first on
+    ties. A blank query returns the queryset unchanged.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    if connection.vendor == 'sqlite':
+        results = _search_sqlite(queryset, terms)
+    elif connection.vendor == 'postgresql':
+        results = _search_postgresql(queryset, terms)
+    else:
+        results = _search_contains(queryset, terms)
+    if ranked:
+        results = results.order_by('-search_rank', '-created_at')
+    return results
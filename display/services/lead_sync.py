@@ -3,18 +3,24 @@
 from __future__ import annotations
 
 from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_save
 from django.utils import timezone
 
 from display.api_utils import normalize_phone
 from display.constants import DEPARTMENT_ALIASES, LEAD_STATUS_API_VALUES
 from display.models import Department, Lead
-from display.services.lead_assignment import assign_user_for_department
+from display.phone_utils import digits_only
+from display.services.lead_assignment import BatchAssigner, assign_user_for_department
 from display.services.lead_close_deal import apply_close_deal, resolve_close_outcome
 from display.services.lead_qualification import (
     apply_qualification_action,
     apply_qualification_fields,
     resolve_qualification_action,
 )
+from display.services.lead_search import deferred_indexing
+from tasks.models import LeadTask
 
 
 from display.lead_errors import LeadSyncError
@@ -32,6 +38,24 @@ def resolve_department(value: str | None) -> Department | None:
     return Department.objects.filter(name__iexact=raw, is_active=True).first()
 
 
+def department_resolver():
+    """resolve_department backed by one read of the active departments (for batches)."""
+    active = list(Department.objects.filter(is_active=True))
+    by_code = {dept.code: dept for dept in active}
+    by_name = {dept.name.lower(): dept for dept in active}
+
+    def resolve(value: str | None) -> Department | None:
+        raw = (value or "").strip()
+        if not raw:
+            return None
+        code = DEPARTMENT_ALIASES.get(raw.lower())
+        if code and code in by_code:
+            return by_code[code]
+        return by_name.get(raw.lower())
+
+    return resolve
+
+
 def parse_lead_name(data: dict) -> str:
     name = (data.get("name") or "").strip()
     if name:
@@ -109,8 +133,9 @@ def _find_existing_lead(data: dict, phone: str) -> Lead | None:
         lead = Lead.objects.filter(external_id=external_id).first()
         if lead:
             return lead
-    if phone:
-        return Lead.objects.filter(phone=phone).order_by("-created_at").first()
+    phone_digits = digits_only(phone)
+    if phone_digits:
+        return Lead.objects.filter(phone_digits=phone_digits).order_by("-created_at").first()
     return None
 
 
@@ -171,10 +196,40 @@ def create_or_update_lead_from_dashboard(data: dict) -> tuple[Lead, bool]:
 
     Returns (lead, created).
     """
+    country_code, phone, name, department = _validate_sync_payload(data, resolve_department)
+    existing = _find_existing_lead(data, phone)
+    explicit_username = (data.get("assigned_to") or "").strip() or None
+    is_create = existing is None
+
+    if is_create:
+        lead = _new_lead(
+            data,
+            name=name,
+            country_code=country_code,
+            phone=phone,
+            department=department,
+            assigned_to=assign_user_for_department(department, explicit_username=explicit_username),
+        )
+    else:
+        lead = existing
+        lead.department = department
+        if explicit_username or data.get("reassign", False):
+            assigned_to = assign_user_for_department(department, explicit_username=explicit_username)
+            if assigned_to:
+                lead.assigned_to = assigned_to
+
+    _apply_lead_fields(lead, data, is_create=is_create)
+    lead.save()
+    return lead, is_create
+
+
+def _validate_sync_payload(data: dict, resolve) -> tuple[str, str, str, Department]:
+    if not isinstance(data, dict):
+        raise LeadSyncError("lead payload must be a JSON object", code="INVALID_REQUEST")
     country_code, phone = parse_phone_fields(data)
     name = parse_lead_name(data)
     department_value = data.get("department")
-    department = resolve_department(department_value)
+    department = resolve(department_value)
 
     if not name:
         raise LeadSyncError(
@@ -192,39 +247,196 @@ def create_or_update_lead_from_dashboard(data: dict) -> tuple[Lead, bool]:
             code="INVALID_DEPARTMENT",
             details={"department": department_value},
         )
+    if data.get("status") is not None and not resolve_close_outcome(data):
+        # Checked here so a bad status fails before any lead is modified.
+        parse_status(data.get("status"))
+    return country_code, phone, name, department
 
-    existing = _find_existing_lead(data, phone)
-    explicit_username = (data.get("assigned_to") or "").strip() or None
-    is_create = existing is None
 
-    if is_create:
-        assigned_to = assign_user_for_department(department, explicit_username=explicit_username)
-        if not assigned_to:
-            raise LeadSyncError(
-                "No active CRM user available for assignment",
-                code="NO_USER",
-            )
-        lead = Lead(
-            name=name,
-            country_code=country_code,
-            phone=phone,
-            department=department,
-            assigned_to=assigned_to,
-            channel=(data.get("channel") or "Whatsapp").strip() or "Whatsapp",
-            status=parse_status(data.get("status"), default="onhold"),
-            takeover=True,
+def _new_lead(data: dict, *, name, country_code, phone, department, assigned_to) -> Lead:
+    if not assigned_to:
+        raise LeadSyncError(
+            "No active CRM user available for assignment",
+            code="NO_USER",
         )
-    else:
-        lead = existing
-        lead.department = department
-        if explicit_username or data.get("reassign", False):
-            assigned_to = assign_user_for_department(department, explicit_username=explicit_username)
-            if assigned_to:
-                lead.assigned_to = assigned_to
+    return Lead(
+        name=name,
+        country_code=country_code,
+        phone=phone,
+        department=department,
+        assigned_to=assigned_to,
+        channel=(data.get("channel") or "Whatsapp").strip() or "Whatsapp",
+        status=parse_status(data.get("status"), default="onhold"),
+        takeover=True,
+    )
+
+
+# Every Lead column the sync payload or Lead.apply_transitions can change.
+BATCH_UPDATE_FIELDS = [
+    "name",
+    "country_code",
+    "phone",
+    "phone_digits",
+    "phone_tail",
+    "profit_amount",
+    "whatsapp_received_on",
+    "destination",
+    "email",
+    "channel",
+    "type_of_service",
+    "chat_summary",
+    "reason_of_travel",
+    "assignment_notes",
+    "status",
+    "status_changed_at",
+    "period",
+    "moved_to_negotiation",
+    "assigned_to",
+    "assigned_at",
+    "takeover_added_at",
+    "external_id",
+    "finalization_notes",
+    "department",
+    "last_modified",
+]
+
+
+def _error_result(exc: LeadSyncError) -> dict:
+    payload = {"error": exc.message, "code": exc.code}
+    if exc.details:
+        payload["details"] = exc.details
+    return payload
+
+
+def _existing_leads_for(parsed) -> tuple[dict, dict]:
+    """Index the leads matching any payload by external_id and by phone digits (newest wins)."""
+    external_ids = {(data.get("external_id") or "").strip() for _, data, *_ in parsed} - {""}
+    phone_digits = {digits_only(phone) for _, _, _, phone, *_ in parsed} - {""}
+    by_external_id, by_phone = {}, {}
+    if not external_ids and not phone_digits:
+        return by_external_id, by_phone
+    matches = (
+        Lead.objects.filter(Q(external_id__in=external_ids) | Q(phone_digits__in=phone_digits))
+        .select_related("assigned_to", "department")
+        .order_by("created_at", "pk")
+    )
+    for lead in matches:
+        if lead.external_id:
+            by_external_id[lead.external_id] = lead
+        if lead.phone_digits in phone_digits:
+            by_phone[lead.phone_digits] = lead
+    return by_external_id, by_phone
+
+
+def _ensure_sold_tasks(leads) -> None:
+    sold_ids = [lead.pk for lead in leads if lead.sold]
+    if not sold_ids:
+        return
+    with_tasks = set(LeadTask.objects.filter(lead_id__in=sold_ids).values_list("lead_id", flat=True))
+    for lead in leads:
+        if lead.sold and lead.pk not in with_tasks:
+            LeadTask.objects.create(lead=lead, assigned_to=lead.assigned_to, status="onhold")
+
+
+def _save_batch(leads, originals) -> None:
+    """Persist leads like Lead.save() would, with one INSERT/UPDATE statement per chunk."""
+    using = router.db_for_write(Lead)
+    now = timezone.now()
+    new_leads = [lead for lead in leads if lead.pk is None]
+    existing_leads = [lead for lead in leads if lead.pk is not None]
+    for lead in leads:
+        lead.sync_derived_fields()
+        lead.apply_transitions(originals[id(lead)])
+        if lead.pk is not None:
+            lead.last_modified = now
+        pre_save.send(sender=Lead, instance=lead, raw=False, using=using, update_fields=None)
+    Lead.objects.bulk_create(new_leads)
+    Lead.objects.bulk_update(existing_leads, BATCH_UPDATE_FIELDS, batch_size=500)
+    _ensure_sold_tasks(leads)
+    created = {id(lead) for lead in new_leads}
+    for lead in leads:
+        post_save.send(
+            sender=Lead,
+            instance=lead,
+            created=id(lead) in created,
+            update_fields=None,
+            raw=False,
+            using=using,
+        )
+        lead.snapshot_tracked()
 
-    _apply_lead_fields(lead, data, is_create=is_create)
-    lead.save()
-    return lead, is_create
+
+def sync_leads_batch(items: list) -> list[dict]:
+    """
+    Upsert many dashboard payloads in one transaction.
+
+    Each item follows the rules of create_or_update_lead_from_dashboard, but the
+    existing leads are found with one query, departments and assignees are
+    resolved once per batch and rows are written with bulk_create/bulk_update.
+    Lead pre_save/post_save signals are still sent for every lead written.
+
+    Returns one result per item, in order: serialize_lead() plus "created" for
+    items that were applied, or {"error", "code", "details"} for items that
+    failed validation (those are skipped; the rest of the batch still applies).
+    Items that resolve to the same lead are applied to it in order.
+    """
+    resolve = department_resolver()
+    assigner = BatchAssigner()
+    results: list = [None] * len(items)
+    parsed = []
+    for index, data in enumerate(items):
+        try:
+            parsed.append((index, data, *_validate_sync_payload(data, resolve)))
+        except LeadSyncError as exc:
+            results[index] = _error_result(exc)
+
+    by_external_id, by_phone = _existing_leads_for(parsed)
+    originals = {}
+    touched = []
+    applied = []
+    for index, data, country_code, phone, name, department in parsed:
+        external_id = (data.get("external_id") or "").strip()
+        lead = (by_external_id.get(external_id) if external_id else None) or by_phone.get(digits_only(phone))
+        explicit_username = (data.get("assigned_to") or "").strip() or None
+        created = lead is None
+        try:
+            if created:
+                lead = _new_lead(
+                    data,
+                    name=name,
+                    country_code=country_code,
+                    phone=phone,
+                    department=department,
+                    assigned_to=assigner.assign(department, explicit_username=explicit_username),
+                )
+            else:
+                if id(lead) not in originals:
+                    originals[id(lead)] = lead.tracked_original()
+                    touched.append(lead)
+                lead.department = department
+                if explicit_username or data.get("reassign", False):
+                    assigned_to = assigner.assign(department, explicit_username=explicit_username)
+                    if assigned_to:
+                        lead.assigned_to = assigned_to
+        except LeadSyncError as exc:
+            results[index] = _error_result(exc)
+            continue
+        _apply_lead_fields(lead, data, is_create=lead.pk is None)
+        if id(lead) not in originals:
+            originals[id(lead)] = None
+            touched.append(lead)
+        if lead.external_id:
+            by_external_id[lead.external_id] = lead
+        by_phone[digits_only(lead.phone)] = lead
+        applied.append((index, lead, created))
+
+    if touched:
+        with transaction.atomic(), deferred_indexing():
+            _save_batch(touched, originals)
+
+    for index, lead, created in applied:
+        results[index] = {**serialize_lead(lead), "created": created}
+    return results
 
 
 def update_lead_from_dashboard(lead: Lead, data: dict) -> Lead:
@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from display.models import Lead
+from display.models import Department, Lead, LeadPassenger
+from display.services.lead_search import DOCUMENT_FIELDS, index_lead, schedule_refresh
+
+_SEARCH_FIELDS = frozenset(DOCUMENT_FIELDS) | {'department'}
 
 
 @receiver(post_save, sender=Lead)
@@ -13,3 +16,44 @@ def sync_lead_followup_calendar(sender, instance, **kwargs):
         from dashboard.models import Event
         if instance.status != 'followup':
             Event.objects.filter(lead=instance, event_type='invoice').delete()
+
+
+@receiver(post_save, sender=Lead)
+def index_lead_search_document(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if not created and update_fields is not None and not _SEARCH_FIELDS.intersection(update_fields):
+        return
+    index_lead(instance)
+
+
+@receiver(post_save, sender=LeadPassenger)
+def reindex_lead_for_passenger_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_refresh([instance.lead_id])
+
+
+@receiver(post_delete, sender=LeadPassenger)
+def reindex_lead_for_passenger_delete(sender, instance, origin=None, **kwargs):
+    # When the lead itself is being deleted its document goes with it.
+    if isinstance(origin, Lead) or getattr(origin, 'model', None) is Lead:
+        return
+    schedule_refresh([instance.lead_id])
+
+
+@receiver(post_save, sender=Department)
+def reindex_department_leads(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    schedule_refresh(instance.leads.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Department)
+def remember_department_leads(sender, instance, **kwargs):
+    # Leads are detached with a bulk UPDATE (SET_NULL), which sends no signals.
+    instance._search_lead_ids = list(instance.leads.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Department)
+def reindex_detached_department_leads(sender, instance, **kwargs):
+    schedule_refresh(getattr(instance, '_search_lead_ids', ()))
@@ -0,0 +1,76 @@
+"""Tests for tracked original field state on Lead/LeadTask saves."""
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from display.models import Lead
+from notifications.models import UserNotification
+from tasks.models import LeadTask
+
+
+def _selects_from(queries, table):
+    return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']]
+
+
+class LeadFieldTrackingTests(TestCase):
+    def setUp(self):
+        self.agent = User.objects.create_user(username='agent', password='pw')
+        self.other = User.objects.create_user(username='other', password='pw')
+        created = Lead.objects.create(name='Tracked', phone='+96170000001', assigned_to=self.agent, takeover=False)
+        self.lead = Lead.objects.get(pk=created.pk)
+
+    def test_update_does_not_reread_lead_row(self):
+        self.lead.status = 'processing'
+        self.lead.assigned_to = self.other
+        with CaptureQueriesContext(connection) as ctx:
+            self.lead.save()
+        self.assertEqual(_selects_from(ctx.captured_queries, 'display_lead'), [])
+        self.lead.refresh_from_db()
+        self.assertIsNotNone(self.lead.status_changed_at)
+        self.assertIsNotNone(self.lead.assigned_at)
+        self.assertTrue(
+            UserNotification.objects.filter(recipient=self.other, lead=self.lead).exists(),
+            'reassignment must still notify the new agent',
+        )
+
+    def test_unchanged_save_uses_fewer_queries_than_untracked_instance(self):
+        with CaptureQueriesContext(connection) as tracked:
+            self.lead.save()
+        untracked = Lead(**{f.attname: getattr(self.lead, f.attname) for f in Lead._meta.concrete_fields})
+        with CaptureQueriesContext(connection) as fallback:
+            untracked.save()
+        # The hand-built instance has no snapshot and reads it once; a loaded one never does.
+        self.assertEqual(len(fallback.captured_queries) - len(tracked.captured_queries), 1)
+
+    def test_snapshot_moves_forward_after_save(self):
+        self.lead.takeover = True
+        self.lead.save()
+        self.assertTrue(self.lead.tracked_original().takeover)
+        self.lead.takeover = False
+        self.lead.save(update_fields=['status'])
+        # takeover was not written, so the snapshot keeps the saved value.
+        self.assertTrue(self.lead.tracked_original().takeover)
+
+    def test_sold_task_created_once_without_rechecking(self):
+        self.lead.sold = True
+        self.lead.save()
+        self.assertEqual(LeadTask.objects.filter(lead=self.lead).count(), 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.lead.save()
+        self.assertEqual(_selects_from(ctx.captured_queries, 'tasks_leadtask'), [])
+        self.assertEqual(LeadTask.objects.filter(lead=self.lead).count(), 1)
+
+    def test_new_sold_lead_gets_task(self):
+        lead = Lead.objects.create(name='Sold', phone='+96170000002', assigned_to=self.agent, sold=True)
+        self.assertEqual(LeadTask.objects.filter(lead=lead).count(), 1)
+
+    def test_leadtask_reassignment_uses_snapshot(self):
+        task = LeadTask.objects.create(lead=self.lead, assigned_to=self.agent, status='onhold')
+        task = LeadTask.objects.select_related('lead', 'assigned_to').get(pk=task.pk)
+        task.assigned_to = self.other
+        with CaptureQueriesContext(connection) as ctx:
+            task.save()
+        self.assertEqual(_selects_from(ctx.captured_queries, 'tasks_leadtask'), [])
+        self.assertTrue(UserNotification.objects.filter(recipient=self.other, leadtask=task).exists())
@@ -211,3 +211,94 @@ class LeadApiTests(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["status"], "negotiation")
+
+
+@override_settings(EXTERNAL_API_KEY="batch-key", LEAD_SYNC_BATCH_LIMIT=5)
+class LeadBatchSyncApiTests(TestCase):
+    def setUp(self):
+        self.headers = {"HTTP_X_API_KEY": "batch-key", "content_type": "application/json"}
+        self.dept = Department.objects.get(code="turkey")
+        self.agents = []
+        for username in ("agent1", "agent2"):
+            agent = User.objects.create_user(username=username, password="pass12345")
+            CrmUserProfile.objects.filter(user=agent).update(department=self.dept, receives_lead_assignments=True)
+            self.agents.append(agent)
+
+    def post(self, payload):
+        return self.client.post("/api/leads/sync-batch/", data=json.dumps(payload), **self.headers)
+
+    def test_batch_creates_updates_and_reports_errors_per_item(self):
+        existing = Lead.objects.create(
+            name="Old Name",
+            phone="+96170000002",
+            external_id="dash-002",
+            assigned_to=self.agents[0],
+            department=self.dept,
+            channel="Whatsapp",
+        )
+        response = self.post(
+            {
+                "leads": [
+                    {"external_id": "dash-001", "name": "New One", "phone": "+96170000001", "department": "turkey"},
+                    {"external_id": "dash-002", "name": "Updated", "phone": "+96170000002", "department": "turkey",
+                     "status": "processing"},
+                    {"name": "No Department", "phone": "+96170000003", "department": "nowhere"},
+                    {"name": "New Two", "phone": "+96170000004", "department": "turkey"},
+                    {"external_id": "dash-001", "name": "New One Renamed", "phone": "+96170000001",
+                     "department": "turkey"},
+                ]
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual((payload["created"], payload["updated"], payload["failed"]), (2, 2, 1))
+        results = payload["results"]
+        self.assertTrue(results[0]["created"])
+        self.assertEqual(results[1]["id"], existing.id)
+        self.assertEqual(results[1]["status"], "processing")
+        self.assertEqual(results[2]["code"], "INVALID_DEPARTMENT")
+        self.assertEqual(results[4]["id"], results[0]["id"])
+        self.assertFalse(results[4]["created"])
+
+        self.assertEqual(Lead.objects.count(), 3)
+        new_one = Lead.objects.get(external_id="dash-001")
+        self.assertEqual(new_one.name, "New One Renamed")
+        self.assertEqual(new_one.phone_digits, "96170000001")
+        self.assertIsNotNone(new_one.takeover_added_at)
+        existing.refresh_from_db()
+        self.assertEqual(existing.name, "Updated")
+        self.assertIsNotNone(existing.status_changed_at)
+        # The two new leads are spread across the department instead of both going to one agent.
+        self.assertEqual(
+            {Lead.objects.get(external_id="dash-001").assigned_to_id, Lead.objects.get(phone="+96170000004").assigned_to_id},
+            {agent.id for agent in self.agents},
+        )
+
+    def test_batch_query_count_does_not_grow_per_item(self):
+        def batch(offset):
+            return {
+                "leads": [
+                    {"name": f"Lead {i}", "phone": f"+9617100{i:04d}", "department": "turkey"}
+                    for i in range(offset, offset + 5)
+                ]
+            }
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post("/api/leads/sync-batch/", data=json.dumps({"leads": batch(0)["leads"][:1]}), **self.headers)
+        with CaptureQueriesContext(connection) as large:
+            self.post(batch(10))
+        self.assertEqual(Lead.objects.count(), 6)
+        # Lead rows are inserted in one statement; only post_save side effects scale with the batch.
+        inserts = [q for q in large.captured_queries if q["sql"].startswith('INSERT INTO "display_lead"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertLess(len(large.captured_queries), len(small.captured_queries) * 5)
+
+    def test_batch_limit_and_shape_are_validated(self):
+        self.assertEqual(self.post({"leads": []}).json()["code"], "MISSING_FIELDS")
+        too_many = [{"name": "x", "phone": "+9617000000", "department": "turkey"}] * 6
+        response = self.post(too_many)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "BATCH_TOO_LARGE")
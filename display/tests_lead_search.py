@@ -0,0 +1,92 @@
+"""Tests for the denormalized lead search document and ranked search."""
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from display.models import Department, Lead, LeadPassenger, LeadSearchDocument
+from display.passengers import save_lead_passengers
+from display.services.lead_search import search_leads
+
+
+class LeadSearchDocumentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent', password='pw')
+        self.department = Department.objects.create(code='leisure', name='Leisure Desk')
+        self.lead = Lead.objects.create(
+            name='Rami Haddad',
+            phone='+96170555111',
+            assigned_to=self.user,
+            destination='Maldives',
+            chat_summary='Honeymoon package, overwater villa',
+            department=self.department,
+        )
+
+    def body(self):
+        return LeadSearchDocument.objects.get(lead=self.lead).body
+
+    def test_document_tracks_lead_passengers_and_department(self):
+        self.assertIn('Rami Haddad', self.body())
+        self.assertIn('96170555111', self.body())
+        save_lead_passengers(self.lead, ['Nour Haddad'])
+        self.assertIn('Nour Haddad', self.body())
+        LeadPassenger.objects.filter(lead=self.lead).get().delete()
+        self.assertNotIn('Nour Haddad', self.body())
+        self.department.name = 'Honeymoon Desk'
+        self.department.save()
+        self.assertIn('Honeymoon Desk', self.body())
+        self.department.delete()
+        self.assertNotIn('Honeymoon Desk', self.body())
+
+    def test_search_matches_substrings_across_fields(self):
+        Lead.objects.create(name='Other', phone='+96171000000', assigned_to=self.user, destination='Paris')
+        save_lead_passengers(self.lead, ['Nour Haddad'])
+        qs = Lead.objects.all()
+        self.assertEqual(list(search_leads(qs, 'maldiv')), [self.lead])
+        self.assertEqual(list(search_leads(qs, 'nour villa')), [self.lead])
+        self.assertEqual(list(search_leads(qs, '70555')), [self.lead])
+        self.assertEqual(list(search_leads(qs, 'HONEYMOON')), [self.lead])
+        self.assertEqual(list(search_leads(qs, 'leisure')), [self.lead])
+        self.assertEqual(list(search_leads(qs, 'maldives paris')), [])
+        self.assertEqual(search_leads(qs, '   ').count(), 2)
+
+    def test_short_terms_and_quotes_are_safe(self):
+        self.assertEqual(list(search_leads(Lead.objects.all(), 'Ra')), [self.lead])
+        self.assertEqual(list(search_leads(Lead.objects.all(), '"villa OR')), [])
+        self.assertEqual(list(search_leads(Lead.objects.all(), 'villa" package')), [])
+
+    def test_ranking_prefers_more_occurrences(self):
+        stronger = Lead.objects.create(
+            name='Maldives Maldives',
+            phone='+96171222333',
+            assigned_to=self.user,
+            destination='Maldives',
+            chat_summary='Maldives again',
+        )
+        results = list(search_leads(Lead.objects.all(), 'maldives'))
+        self.assertEqual(results, [stronger, self.lead])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_rebuild_command_restores_documents(self):
+        LeadSearchDocument.objects.all().delete()
+        self.assertEqual(list(search_leads(Lead.objects.all(), 'maldives')), [])
+        call_command('rebuild_lead_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(list(search_leads(Lead.objects.all(), 'maldives')), [self.lead])
+
+    def test_display_data_uses_search_index(self):
+        self.client.force_login(self.user)
+        Lead.objects.create(name='Other', phone='+96171000000', assigned_to=self.user, destination='Paris')
+        response = self.client.get('/', {'search': 'overwater', 'date_from': '2026-01-01', 'date_to': '2026-12-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['data']), [self.lead])
+
+
+@override_settings(EXTERNAL_API_KEY='search-key')
+class LeadSearchApiTests(TestCase):
+    def test_api_full_text_query(self):
+        user = User.objects.create_user(username='agent', password='pw')
+        lead = Lead.objects.create(name='Rami', phone='+96170555111', assigned_to=user, destination='Maldives')
+        Lead.objects.create(name='Other', phone='+96171000000', assigned_to=user, destination='Paris')
+        response = Client().get('/api/leads/search/', {'q': 'maldives'}, HTTP_X_API_KEY='search-key')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [lead.pk])
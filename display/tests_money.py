@@ -0,0 +1,97 @@
+"""Tests for the numeric money columns kept beside the free-text price fields."""
+
+import csv
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from display.models import Lead
+from display.money import parse_money_amount
+from reporting.crm_pipeline_stats import build_crm_pipeline_stats
+from tasks.models import LeadTask, Service
+
+
+class ParseMoneyAmountTests(TestCase):
+    def test_parses_decorated_amounts(self):
+        self.assertEqual(parse_money_amount('$1,250'), Decimal('1250.00'))
+        self.assertEqual(parse_money_amount(' 1250.5 USD '), Decimal('1250.50'))
+        self.assertEqual(parse_money_amount('-40'), Decimal('-40.00'))
+
+    def test_blank_and_junk_are_none(self):
+        for value in (None, '', '   ', 'TBD', '12/5', 'nan', '1e20'):
+            self.assertIsNone(parse_money_amount(value), value)
+
+
+class MoneyColumnSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent', password='pw')
+        self.lead = Lead.objects.create(name='Client', phone='+96170000000', assigned_to=self.user)
+
+    def test_lead_save_keeps_amounts_in_sync(self):
+        self.lead.selling_price = '1,500'
+        self.lead.net = '1200 usd'
+        self.lead.profit = '300'
+        self.lead.save(update_fields=['selling_price', 'net', 'profit'])
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.selling_price_amount, Decimal('1500.00'))
+        self.assertEqual(self.lead.net_amount, Decimal('1200.00'))
+        self.assertEqual(self.lead.profit_amount, Decimal('300.00'))
+
+    def test_service_save_keeps_amounts_in_sync(self):
+        task = LeadTask.objects.create(lead=self.lead, assigned_to=self.user, status='onhold')
+        service = Service.objects.create(leadtask=task, net='$900', selling='1,100')
+        service.refresh_from_db()
+        self.assertEqual(service.net_amount, Decimal('900.00'))
+        self.assertEqual(service.selling_amount, Decimal('1100.00'))
+        self.assertEqual(service.effective_net_amount, Decimal('900.00'))
+
+        service.issue_price = '950'
+        service.save(update_fields=['issue_price'])
+        service.refresh_from_db()
+        self.assertEqual(service.issue_price_amount, Decimal('950.00'))
+        self.assertEqual(service.effective_net_amount, Decimal('950.00'))
+
+    def test_pipeline_stats_sum_amount_columns(self):
+        self.lead.selling_price = '2,000'
+        self.lead.profit = '250'
+        self.lead.save()
+        LeadTask.objects.create(lead=self.lead, assigned_to=self.user, status='done')
+        stats = build_crm_pipeline_stats()
+        self.assertEqual(stats['crm_orders_total'], 1)
+        self.assertEqual(stats['crm_orders_done'], 1)
+        self.assertEqual(stats['crm_orders_selling'], Decimal('2000.00'))
+        self.assertEqual(stats['crm_orders_profit'], Decimal('250.00'))
+
+
+class BackfillMoneyAmountsCommandTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='agent', password='pw')
+        self.good = Lead.objects.create(name='Good', phone='+96170000001', assigned_to=user)
+        self.bad = Lead.objects.create(name='Bad', phone='+96170000002', assigned_to=user)
+        # Rows written before the columns existed (or by raw updates) carry stale amounts.
+        Lead.objects.filter(pk=self.good.pk).update(selling_price='$1,000')
+        Lead.objects.filter(pk=self.bad.pk).update(selling_price='ask Omar')
+
+    def test_dry_run_reports_without_writing(self):
+        out = StringIO()
+        call_command('backfill_money_amounts', '--dry-run', stdout=out)
+        self.assertIn('Lead: 1 row(s) stale, 1 parse error(s).', out.getvalue())
+        self.assertIn("'ask Omar'", out.getvalue())
+        self.good.refresh_from_db()
+        self.assertIsNone(self.good.selling_price_amount)
+
+    def test_backfill_writes_amounts_and_report(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command('backfill_money_amounts', '--report', path, stdout=StringIO())
+        self.good.refresh_from_db()
+        self.assertEqual(self.good.selling_price_amount, Decimal('1000.00'))
+        with open(path, newline='', encoding='utf-8') as handle:
+            rows = list(csv.reader(handle))
+        self.assertEqual(rows, [['model', 'id', 'field', 'value'], ['Lead', str(self.bad.pk), 'selling_price', 'ask Omar']])
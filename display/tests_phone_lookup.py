@@ -0,0 +1,54 @@
+"""Tests for indexed phone matching (duplicate detection, API search, sync upsert)."""
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+
+from display.models import Lead
+from display.phone_utils import find_duplicate_leads
+
+
+class LeadPhoneKeyTests(TestCase):
+    def setUp(self):
+        self.agent = User.objects.create_user(username="phone-agent", password="pass12345")
+
+    def _lead(self, phone, **extra):
+        return Lead.objects.create(name=f"Lead {phone}", phone=phone, assigned_to=self.agent, **extra)
+
+    def test_phone_keys_kept_in_sync_on_save(self):
+        lead = self._lead("+961 70-123 456")
+        self.assertEqual(lead.phone_digits, "96170123456")
+        self.assertEqual(lead.phone_tail, "0123456")
+        lead.phone = "+96103999888"
+        lead.save(update_fields=["phone"])
+        lead.refresh_from_db()
+        self.assertEqual(lead.phone_digits, "96103999888")
+        self.assertEqual(lead.phone_tail, "3999888")
+
+    def test_duplicates_match_across_formats(self):
+        full = self._lead("+96170123456")
+        local = self._lead("70123456")
+        self._lead("+96171123456")
+        found = find_duplicate_leads("+961", "70 123 456")
+        self.assertEqual({lead.pk for lead in found}, {full.pk, local.pk})
+        found = find_duplicate_leads("+961", "+96170123456", exclude_pk=full.pk)
+        self.assertEqual([lead.pk for lead in found], [local.pk])
+
+    def test_short_local_number_only_matches_full_phone(self):
+        self._lead("+9613456")
+        self._lead("+9713456")
+        found = find_duplicate_leads("+961", "3456")
+        self.assertEqual([lead.phone for lead in found], ["+9613456"])
+
+    def test_duplicate_lookup_is_single_query(self):
+        for i in range(5):
+            self._lead(f"+9617000000{i}")
+        with self.assertNumQueries(1):
+            find_duplicate_leads("+961", "70000003")
+
+    @override_settings(EXTERNAL_API_KEY="phone-key")
+    def test_api_search_uses_phone_suffix(self):
+        lead = self._lead("+96170555111")
+        self._lead("+96170555112")
+        response = Client().get("/api/leads/search/", {"phone": "70555111"}, HTTP_X_API_KEY="phone-key")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.json()["results"]], [lead.pk])
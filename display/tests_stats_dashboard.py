@@ -0,0 +1,72 @@
+"""Tests for the stats dashboard aggregates and their query budget."""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from display.models import Lead, MonthlyTarget, Offer
+
+STATS_QUERY_BUDGET = 14
+
+
+class StatsDashboardTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='pw', is_staff=True)
+        self.client.force_login(self.manager)
+        self.month_name = timezone.now().strftime('%B')
+        self.params = {'month': self.month_name, 'date_from': '2026-01-01', 'date_to': '2026-12-31'}
+
+    def add_employee(self, username, *, sold_profits=(), open_leads=0):
+        employee = User.objects.create_user(username=username, password='pw')
+        User.objects.filter(pk=employee.pk).update(is_sales=True)
+        for profit in sold_profits:
+            lead = Lead.objects.create(name='Sold', phone='+96170000000', assigned_to=employee, takeover=False)
+            lead.sold = True
+            lead.status = 'finalized'
+            lead.profit = profit
+            lead.save()
+        for _ in range(open_leads):
+            Lead.objects.create(name='Open', phone='+96170000001', assigned_to=employee, takeover=False)
+        return employee
+
+    def get_stats(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/stats_dashboard/', self.params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_profit_is_summed_from_numeric_column(self):
+        today = timezone.now().date()
+        MonthlyTarget.objects.create(month=today.replace(day=1), target_profit=3000)
+        alice = self.add_employee('alice', sold_profits=['$1,200', '300'], open_leads=2)
+        self.add_employee('bob', open_leads=1)
+        lead = Lead.objects.filter(assigned_to=alice).first()
+        Offer.objects.create(
+            lead=lead, title='Offer', description='d', inclusions='i', itinerary='it',
+            assigned_to=alice, created_by=alice, sent=True,
+        )
+
+        response, _ = self.get_stats()
+        self.assertEqual(response.context['achieved_profit'], Decimal('1500.00'))
+        self.assertAlmostEqual(response.context['progress_percentage'], 50.0)
+        stats = {row['employee'].username: row for row in response.context['employee_stats']}
+        self.assertEqual(stats['alice']['profit'], Decimal('1500.00'))
+        self.assertEqual(stats['alice']['modified_leads'], 4)
+        self.assertEqual(stats['alice']['percentage_sold_over_modified'], 50.0)
+        self.assertEqual(stats['alice']['percentage_of_total_team_sales'], 100.0)
+        self.assertEqual(stats['alice']['sent_offers'], 1)
+        self.assertEqual(stats['bob']['profit'], 0)
+        self.assertEqual(stats['bob']['overtaken_leads'], 1)
+
+    def test_query_count_does_not_grow_with_employees(self):
+        self.add_employee('first', sold_profits=['100'], open_leads=1)
+        _, baseline = self.get_stats()
+        for index in range(5):
+            self.add_employee(f'extra{index}', sold_profits=['50'], open_leads=2)
+        _, with_more = self.get_stats()
+        self.assertEqual(baseline, with_more)
+        self.assertLessEqual(with_more, STATS_QUERY_BUDGET)
@@ -35,6 +35,7 @@ urlpatterns = [
 
     # JSON API — WhatsApp AI dashboard lead sync (Lead model only)
     path('api/leads/', lead_api_views.api_sync_lead, name='api_sync_lead'),
+    path('api/leads/sync-batch/', lead_api_views.api_sync_leads_batch, name='api_sync_leads_batch'),
     path('api/leads/search/', lead_api_views.api_search_leads, name='api_search_leads'),
     path('api/leads/stages/', lead_api_views.api_list_lead_stages, name='api_list_lead_stages'),
     path('api/leads/<int:lead_id>/', lead_api_views.api_lead_detail, name='api_lead_detail'),
@@ -23,6 +23,7 @@ from .models import (
 )
 from .passengers import save_lead_passengers
 from .phone_utils import build_full_phone, find_duplicate_leads, local_phone_part
+from .services.lead_search import search_leads
 from django.db.models import Q
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
@@ -45,7 +46,7 @@ from django.utils.safestring import mark_safe
 import json, calendar
 from django.contrib.auth.models import User  # Import User model
 from django.db.models import FloatField, Value
-from django.db.models.functions import Cast
+from django.db.models.functions import Cast, TruncMonth
 
 
 def _aware_month_bounds(year, month):
@@ -68,10 +69,7 @@ def lead_search(request):
         form = SearchLeadsForm(request.GET)
         if form.is_valid():
             query = form.cleaned_data['query']
-            results = Lead.objects.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query)
-            )
+            results = search_leads(Lead.objects.select_related('department'), query)
             return render(request, 'search_results.html', {'results': results})
     else:
         form = SearchLeadsForm()
@@ -301,15 +299,7 @@ def takeover_list(request):
     leads = Lead.objects.filter(takeover=True).select_related('department').order_by('-created_at')
 
     if search_query:
-        leads = leads.filter(
-            Q(name__icontains=search_query) |
-            Q(phone__icontains=search_query) |
-            Q(channel__icontains=search_query) |
-            Q(reason_of_travel__icontains=search_query) |
-            Q(chat_summary__icontains=search_query) |
-            Q(whatsapp_received_on__icontains=search_query) |
-            Q(department__name__icontains=search_query)
-        )
+        leads = search_leads(leads, search_query)
 
     for lead in leads:
         if lead.takeover_added_at and lead.takeover_added_at < timezone.now() - timedelta(hours=5):
@@ -353,16 +343,7 @@ def display_data(request):
         leads = leads.exclude(status__in=['done', 'finalized'])
 
     if search_query:
-        leads = leads.filter(
-            Q(name__icontains=search_query) |
-            Q(passengers__name__icontains=search_query) |
-            Q(destination__icontains=search_query) |
-            Q(phone__icontains=search_query) |
-            Q(finalization_notes__icontains=search_query) |
-            Q(chat_summary__icontains=search_query) |
-            Q(whatsapp_received_on__icontains=search_query) |
-            Q(department__name__icontains=search_query)
-        ).distinct()
+        leads = search_leads(leads, search_query)
 
     paginator = Paginator(leads, 30)  # Show 30 leads per page
     page = request.GET.get('page')
@@ -405,16 +386,7 @@ def display_archived(request):
     if selected_status:
         leads = leads.filter(status=selected_status)
     if search_query:
-        leads = leads.filter(
-            Q(name__icontains=search_query) |
-            Q(passengers__name__icontains=search_query) |
-            Q(destination__icontains=search_query) |
-            Q(phone__icontains=search_query) |
-            Q(finalization_notes__icontains=search_query) |
-            Q(chat_summary__icontains=search_query) |
-            Q(whatsapp_received_on__icontains=search_query) |
-            Q(department__name__icontains=search_query)
-        ).distinct()
+        leads = search_leads(leads, search_query)
 
     paginator = Paginator(leads, 30)  # Show 30 leads per page
     page = request.GET.get('page')
@@ -776,34 +748,36 @@ def get_numeric_profit(self):
 @login_required(login_url="/login/")
 def stats_dashboard(request):
     current_year = timezone.now().year
-
-    # Calculate data for general stats
+    year_start, _ = _aware_month_bounds(current_year, 1)
+    _, year_end = _aware_month_bounds(current_year, 12)
+
+    # Calculate data for general stats: one grouped query for the whole year
+    monthly = {
+        row['month'].month: row
+        for row in Lead.objects.filter(last_modified__range=(year_start, year_end))
+        .annotate(month=TruncMonth('last_modified'))
+        .values('month')
+        .annotate(
+            modified=Count('id'),
+            sold_count=Count('id', filter=Q(sold=True)),
+            negotiation=Count('id', filter=Q(moved_to_negotiation=True)),
+            unqualified=Count('id', filter=Q(status='done', lost=True)),
+        )
+        .order_by()
+        if row['month'] and row['month'].year == current_year
+    }
     sold_over_modified = []
     sold_over_negotiation = []
     unqualified_over_modified = []
 
     for month in range(1, 13):
-        month_start, month_end = _aware_month_bounds(current_year, month)
-
-        modified_leads = Lead.objects.filter(last_modified__range=(month_start, month_end))
-        sold_leads = modified_leads.filter(sold=True)
-        negotiation_leads = modified_leads.filter(moved_to_negotiation=True)
-        unqualified_leads = modified_leads.filter(status='done', lost=True)
-
-        if modified_leads.count() > 0:
-            sold_over_modified.append((sold_leads.count() / modified_leads.count()) * 100)
-        else:
-            sold_over_modified.append(0)
-
-        if negotiation_leads.count() > 0:
-            sold_over_negotiation.append((sold_leads.count() / negotiation_leads.count()) * 100)
-        else:
-            sold_over_negotiation.append(0)
-
-        if modified_leads.count() > 0:
-            unqualified_over_modified.append((unqualified_leads.count() / modified_leads.count()) * 100)
-        else:
-            unqualified_over_modified.append(0)
+        row = monthly.get(month, {})
+        modified = row.get('modified', 0)
+        sold = row.get('sold_count', 0)
+        negotiation = row.get('negotiation', 0)
+        sold_over_modified.append((sold / modified) * 100 if modified else 0)
+        sold_over_negotiation.append((sold / negotiation) * 100 if negotiation else 0)
+        unqualified_over_modified.append((row.get('unqualified', 0) / modified) * 100 if modified else 0)
 
     # Example data for monthly target progress
     month_list = [calendar.month_name[i] for i in range(1, 13)]
@@ -814,36 +788,65 @@ def stats_dashboard(request):
     monthly_target_obj = MonthlyTarget.objects.filter(month__year=current_year, month__month=selected_month_index).first()
     monthly_target = monthly_target_obj.target_profit if monthly_target_obj else 0
 
-    sold_leads_this_month = Lead.objects.filter(last_modified__range=(month_start, month_end), sold=True)
-    achieved_profit = sum(lead.get_numeric_profit() for lead in sold_leads_this_month)
-    progress_percentage = (achieved_profit / monthly_target) * 100 if monthly_target else 0
+    month_totals = Lead.objects.filter(last_modified__range=(month_start, month_end), sold=True).aggregate(
+        sold_count=Count('id'),
+        profit=Sum('profit_amount'),
+    )
+    achieved_profit = month_totals['profit'] or 0
+    progress_percentage = (float(achieved_profit) / monthly_target) * 100 if monthly_target else 0
     progress_display = min(progress_percentage, 100)
 
-    # Additional stats
+    # Additional stats: per-employee values come from grouped queries, not one set per employee
     employee_stats = []
-    employees = User.objects.filter(is_sales=True)
-    total_team_sales = sold_leads_this_month.count()
+    employees = list(User.objects.filter(is_sales=True))
+    total_team_sales = month_totals['sold_count']
+
+    modified_range = Q(last_modified__range=(month_start, month_end))
+    lead_rows = {
+        row['assigned_to']: row
+        for row in Lead.objects.filter(assigned_to__in=employees)
+        .filter(modified_range | Q(assigned_at__range=(month_start, month_end)))
+        .values('assigned_to')
+        .annotate(
+            modified=Count('id', filter=modified_range),
+            sold_count=Count('id', filter=modified_range & Q(sold=True)),
+            profit=Sum('profit_amount', filter=modified_range & Q(sold=True)),
+            overtaken=Count('id', filter=Q(assigned_at__range=(month_start, month_end))),
+        )
+        .order_by()
+    }
+    offer_rows = {
+        row['created_by']: row
+        for row in Offer.objects.filter(created_by__in=employees, created_at__range=(month_start, month_end))
+        .values('created_by')
+        .annotate(sent_count=Count('id', filter=Q(sent=True)), sold_count=Count('id', filter=Q(sold=True)))
+        .order_by()
+    }
+    user_targets = dict(
+        UserMonthlyTarget.objects.filter(
+            user__in=employees, month__year=current_year, month__month=selected_month_index
+        ).values_list('user_id', 'target_profit')
+    )
 
     for employee in employees:
-        employee_modified_leads = Lead.objects.filter(assigned_to=employee, last_modified__range=(month_start, month_end))
-        employee_sold_leads = employee_modified_leads.filter(sold=True)
-        employee_overtaken_leads = Lead.objects.filter(assigned_to=employee, assigned_at__range=(month_start, month_end)).count()
-
-        employee_profit = sum(lead.get_numeric_profit() for lead in employee_sold_leads)
-
-        if employee_modified_leads.count() > 0:
-            percentage_sold_over_modified = (employee_sold_leads.count() / employee_modified_leads.count()) * 100
+        lead_row = lead_rows.get(employee.pk, {})
+        offer_row = offer_rows.get(employee.pk, {})
+        modified_count = lead_row.get('modified', 0)
+        sold_count = lead_row.get('sold_count', 0)
+        employee_profit = lead_row.get('profit') or 0
+
+        if modified_count > 0:
+            percentage_sold_over_modified = (sold_count / modified_count) * 100
         else:
             percentage_sold_over_modified = 0
 
         if total_team_sales > 0:
-            percentage_of_total_team_sales = (employee_sold_leads.count() / total_team_sales) * 100
+            percentage_of_total_team_sales = (sold_count / total_team_sales) * 100
         else:
             percentage_of_total_team_sales = 0
 
-        user_monthly_target = UserMonthlyTarget.objects.filter(user=employee, month__year=current_year, month__month=selected_month_index).first()
-        user_target_profit = user_monthly_target.target_profit if user_monthly_target else 0
-        user_progress_percentage = (employee_profit / user_target_profit) * 100 if user_target_profit else 0
+        user_target_profit = user_targets.get(employee.pk, 0)
+        user_progress_percentage = (float(employee_profit) / user_target_profit) * 100 if user_target_profit else 0
 
         if percentage_sold_over_modified < 20:
             color = 'red'
@@ -856,12 +859,12 @@ def stats_dashboard(request):
             'employee': employee,
             'percentage_sold_over_modified': round(percentage_sold_over_modified, 2),
             'percentage_of_total_team_sales': round(percentage_of_total_team_sales, 2),
-            'overtaken_leads': employee_overtaken_leads,
+            'overtaken_leads': lead_row.get('overtaken', 0),
             'profit': employee_profit,
             'color': color,
-            'modified_leads': employee_modified_leads.count(),
-            'sent_offers': Offer.objects.filter(created_by=employee, created_at__range=(month_start, month_end), sent=True).count(),
-            'sold_offers': Offer.objects.filter(created_by=employee, created_at__range=(month_start, month_end), sold=True).count(),
+            'modified_leads': modified_count,
+            'sent_offers': offer_row.get('sent_count', 0),
+            'sold_offers': offer_row.get('sold_count', 0),
             'user_target_profit': user_target_profit,
             'user_progress_percentage': user_progress_percentage if request.user.is_staff or request.user == employee else 'NA'
         })
@@ -877,13 +880,17 @@ def stats_dashboard(request):
     ).order_by('-destination_count')[:5]
 
     # Lead counts by status, sold, lost, and is_takeover
-    status_counts = Lead.objects.values('status').annotate(count=Count('status'))
-    sold_count = Lead.objects.filter(status='finalized', sold=True).count()
-    lost_count = Lead.objects.filter(status='finalized', lost=True).count()
-    is_takeover_count = Lead.objects.filter(takeover=True).count()
-    
+    status_counts = Lead.objects.values('status').annotate(count=Count('status')).order_by()
+    flag_counts = Lead.objects.aggregate(
+        sold_count=Count('id', filter=Q(status='finalized', sold=True)),
+        lost_count=Count('id', filter=Q(status='finalized', lost=True)),
+        takeover_count=Count('id', filter=Q(takeover=True)),
+    )
+
     status_labels = [status['status'] for status in status_counts] + ['Sold', 'Lost', 'Takeover']
-    status_counts_data = [status['count'] for status in status_counts] + [sold_count, lost_count, is_takeover_count]
+    status_counts_data = [status['count'] for status in status_counts] + [
+        flag_counts['sold_count'], flag_counts['lost_count'], flag_counts['takeover_count'],
+    ]
 
     context = {
         'current_year': current_year,
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ChatMessage, PushSubscription, UserNotification
+from .models import ChatMessage, PushOutbox, PushSubscription, ScheduledJob, ScheduledJobRun, UserNotification
 
 
 @admin.register(UserNotification)
@@ -20,3 +20,22 @@ class ChatMessageAdmin(admin.ModelAdmin):
 class PushSubscriptionAdmin(admin.ModelAdmin):
     list_display = ('user', 'endpoint', 'created_at')
     search_fields = ('user__username', 'endpoint')
+
+
+@admin.register(PushOutbox)
+class PushOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subscription', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('subscription__user__username', 'last_error')
+    raw_id_fields = ('subscription',)
+
+
+@admin.register(ScheduledJob)
+class ScheduledJobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_success_at', 'last_full_run_at', 'locked_until')
+
+
+@admin.register(ScheduledJobRun)
+class ScheduledJobRunAdmin(admin.ModelAdmin):
+    list_display = ('job', 'status', 'full_scan', 'started_at', 'finished_at', 'items_created')
+    list_filter = ('job', 'status', 'full_scan')
@@ -0,0 +1,61 @@
+"""Per-user unread counters: badge polls read one UnreadCounter row instead of counting rows."""
+
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import ChatMessage, UnreadCounter, UserNotification
+
+COUNTER_FIELDS = ['notifications', 'messages', 'version', 'refreshed_at']
+
+
+def _unread_by_recipient(model, user_ids):
+    return dict(
+        model.objects.filter(recipient_id__in=user_ids, is_read=False)
+        .order_by()
+        .values_list('recipient_id')
+        .annotate(c=Count('id'))
+    )
+
+
+def refresh_unread_counters(user_ids):
+    """Recount unread notifications and chat messages for these users; returns {user_id: UnreadCounter}."""
+    user_ids = {pk for pk in user_ids if pk}
+    if not user_ids:
+        return {}
+    notifications = _unread_by_recipient(UserNotification, user_ids)
+    messages = _unread_by_recipient(ChatMessage, user_ids)
+    current = {row.user_id: row for row in UnreadCounter.objects.filter(user_id__in=user_ids)}
+    now = timezone.now()
+    rows = []
+    for pk in user_ids:
+        counts = (notifications.get(pk, 0), messages.get(pk, 0))
+        old = current.get(pk)
+        unchanged = old is not None and (old.notifications, old.messages) == counts
+        rows.append(UnreadCounter(
+            user_id=pk,
+            notifications=counts[0],
+            messages=counts[1],
+            version=old.version if unchanged else uuid.uuid4().hex,
+            refreshed_at=now,
+        ))
+    UnreadCounter.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['user'], update_fields=COUNTER_FIELDS,
+    )
+    return {row.user_id: row for row in rows}
+
+
+def get_unread_counter(user):
+    """The user's counter row, recounted when missing or older than UNREAD_COUNTER_MAX_AGE_SECONDS.
+
+    Writes in this app refresh the counter directly; the age limit bounds the
+    drift from paths that do not (cascade deletes, admin edits, merges).
+    """
+    counter = UnreadCounter.objects.filter(user_id=user.pk).first()
+    max_age = timedelta(seconds=getattr(settings, 'UNREAD_COUNTER_MAX_AGE_SECONDS', 600))
+    if counter is None or timezone.now() - counter.refreshed_at > max_age:
+        counter = refresh_unread_counters([user.pk])[user.pk]
+    return counter
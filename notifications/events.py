@@ -0,0 +1,111 @@
+"""Per-user feed of new notifications and chat messages, for the SSE stream and its polling fallback.
+
+A cursor is "<last notification id>:<last chat message id>" and is sent as the
+SSE event id, so a reconnecting EventSource resumes from Last-Event-ID.
+"""
+
+import json
+
+from django.db.models import Max, Q
+
+from .counters import get_unread_counter
+from .models import ChatMessage, UserNotification
+
+EVENT_BATCH_LIMIT = 100
+
+
+def notification_payload(notification):
+    return {
+        'id': notification.pk,
+        'kind': notification.kind,
+        'kind_label': notification.get_kind_display(),
+        'title': notification.title,
+        'message': notification.message,
+        'url': notification.url,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def message_payload(message, user):
+    return {
+        'id': message.pk,
+        'body': message.body,
+        'is_mine': message.sender_id == user.pk,
+        'sender': message.sender.get_full_name() or message.sender.username,
+        'sender_id': message.sender_id,
+        'recipient_id': message.recipient_id,
+        'created_at': message.created_at.isoformat(),
+    }
+
+
+def counts_payload(counter):
+    return {'unread_count': counter.notifications, 'unread_messages': counter.messages}
+
+
+def _user_messages(user):
+    return ChatMessage.objects.filter(Q(recipient=user) | Q(sender=user))
+
+
+def current_cursor(user):
+    """Cursor at the user's newest notification and message (nothing to catch up)."""
+    last_notification = UserNotification.objects.filter(recipient=user).aggregate(m=Max('id'))['m'] or 0
+    last_message = _user_messages(user).aggregate(m=Max('id'))['m'] or 0
+    return last_notification, last_message
+
+
+def parse_cursor(value):
+    """(notification id, message id) from "N:M", or None when missing or malformed."""
+    parts = (value or '').strip().split(':')
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        return None
+    return int(parts[0]), int(parts[1])
+
+
+def format_cursor(cursor):
+    return f'{cursor[0]}:{cursor[1]}'
+
+
+def events_since(user, cursor, *, limit=EVENT_BATCH_LIMIT):
+    """New events after `cursor`, oldest first, and the advanced cursor.
+
+    Events are dicts with "type" ("notification" or "chat") and "data".
+    At most `limit` of each type are returned; the cursor only moves past what
+    was returned, so the caller catches up over several calls.
+    """
+    last_notification, last_message = cursor
+    notifications = list(
+        UserNotification.objects.filter(recipient=user, pk__gt=last_notification).order_by('pk')[:limit]
+    )
+    messages = list(
+        _user_messages(user).filter(pk__gt=last_message).select_related('sender').order_by('pk')[:limit]
+    )
+    events = [
+        (n.created_at, {'type': 'notification', 'data': notification_payload(n)}) for n in notifications
+    ] + [
+        (m.created_at, {'type': 'chat', 'data': message_payload(m, user)}) for m in messages
+    ]
+    events.sort(key=lambda item: item[0])
+    if notifications:
+        last_notification = notifications[-1].pk
+    if messages:
+        last_message = messages[-1].pk
+    return [event for _, event in events], (last_notification, last_message)
+
+
+def poll_events(user, cursor):
+    """One catch-up step: (events, new cursor, unread counter); a None cursor starts at the newest rows."""
+    if cursor is None:
+        events, cursor = [], current_cursor(user)
+    else:
+        events, cursor = events_since(user, cursor)
+    return events, cursor, get_unread_counter(user)
+
+
+def sse_frame(event_type, data, *, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.outbox import DeliveryStats, drain_outbox, outbox_metrics, prune_outbox
+from notifications.push import get_vapid_public_key, load_vapid_credentials
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued browser pushes (PushOutbox) from a thread pool, with per-endpoint retry/backoff. '
+        'Runs until stopped; use --once from a scheduled task.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain what is due now, then exit')
+        parser.add_argument('--threads', type=int, default=None, help='Concurrent deliveries (default PUSH_WORKER_THREADS)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows claimed per batch (default PUSH_WORKER_BATCH_SIZE)')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-runtime', type=int, default=0, help='Exit after this many seconds (0 = no limit)')
+        parser.add_argument('--metrics', action='store_true', help='Print queue metrics and exit')
+
+    def handle(self, *args, **options):
+        if options['metrics']:
+            for key, value in outbox_metrics().items():
+                self.stdout.write(f'{key}: {value}')
+            return
+
+        vapid = self._vapid()
+        started = time.monotonic()
+        total = DeliveryStats()
+        while True:
+            stats = drain_outbox(vapid, batch_size=options['batch_size'], threads=options['threads'])
+            total.add(stats)
+            if stats.claimed:
+                self.stdout.write(self._summary(stats))
+            if options['once']:
+                break
+            if options['max_runtime'] and time.monotonic() - started >= options['max_runtime']:
+                break
+            time.sleep(options['sleep'])
+
+        pruned = prune_outbox()
+        self.stdout.write(self.style.SUCCESS(f'Done — {self._summary(total)}, {pruned} old row(s) pruned.'))
+
+    def _vapid(self):
+        try:
+            import pywebpush  # noqa: F401
+        except ImportError:
+            raise CommandError('pywebpush is not installed (pip install py-vapid pywebpush)')
+        if not get_vapid_public_key():
+            raise CommandError('VAPID_PUBLIC_KEY is not configured. Run: python manage.py generate_vapid_keys --write')
+        try:
+            return load_vapid_credentials()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+    @staticmethod
+    def _summary(stats):
+        return (
+            f'{stats.claimed} claimed, {stats.sent} sent, {stats.retried} to retry, '
+            f'{stats.failed} failed, {stats.stale_removed} stale subscription(s) removed'
+        )
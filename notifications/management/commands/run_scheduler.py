@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.models import ScheduledJobRun
+from notifications.scheduler import JOBS, prune_job_runs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Run periodic notification jobs (due-soon reminders) with a database lock and run log. '
+        'Runs until stopped; use --once from a scheduled task.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run each job once, then exit')
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds between runs (default 60)')
+        parser.add_argument('--full', action='store_true', help='Scan full reminder windows instead of changes since the last run')
+        parser.add_argument('--job', choices=sorted(JOBS), action='append', help='Only run this job (repeatable)')
+
+    def handle(self, *args, **options):
+        names = options['job'] or sorted(JOBS)
+        full = options['full']
+        while True:
+            for name in names:
+                run = run_job(name, full=full)
+                self._report(name, run)
+            prune_job_runs()
+            if options['once']:
+                break
+            full = False
+            time.sleep(options['interval'])
+
+    def _report(self, name, run):
+        if run is None:
+            self.stdout.write(self.style.WARNING(f'{name}: locked by another process, skipped.'))
+            return
+        scope = 'full' if run.full_scan else f'since {run.since:%Y-%m-%d %H:%M:%S}'
+        seconds = (run.finished_at - run.started_at).total_seconds()
+        if run.status == ScheduledJobRun.Status.OK:
+            self.stdout.write(self.style.SUCCESS(f'{name}: {run.items_created} created ({scope}, {seconds:.1f}s).'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{name}: failed ({scope}) — see run log #{run.pk}.'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-17 18:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('notifications', '0005_scheduled_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('notifications', models.PositiveIntegerField(default=0)),
+                ('messages', models.PositiveIntegerField(default=0)),
+                ('version', models.CharField(max_length=32)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-17 18:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_unread_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['sender', 'recipient', 'created_at'], name='chat_thread_created_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 
 
 class NotificationKind(models.TextChoices):
@@ -64,6 +65,10 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pages of a thread: each direction is an index range ordered by time.
+            models.Index(fields=['sender', 'recipient', 'created_at'], name='chat_thread_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.sender.username} → {self.recipient.username}'
@@ -82,6 +87,97 @@ class PushSubscription(models.Model):
         return f'Push for {self.user.username}'
 
 
+class PushOutbox(models.Model):
+    """One browser push waiting for (or done with) delivery to one subscription endpoint."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    subscription = models.ForeignKey(
+        PushSubscription, on_delete=models.CASCADE, related_name='outbox'
+    )
+    payload = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.get_status_display()} push #{self.pk} → subscription {self.subscription_id}'
+
+
+class UnreadCounter(models.Model):
+    """Cached unread notification/chat counts for one user, read by the badge poll.
+
+    Rewritten (notifications.counters.refresh_unread_counters) whenever the
+    user's unread rows change; `version` changes only when the counts do, so it
+    doubles as the poll's ETag.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter'
+    )
+    notifications = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0)
+    version = models.CharField(max_length=32)
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'Unread for {self.user_id}: {self.notifications} + {self.messages}'
+
+
+class ScheduledJob(models.Model):
+    """A periodic background job: its DB lock and the high-water mark of its last successful run."""
+
+    name = models.CharField(max_length=60, unique=True)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_full_run_at = models.DateTimeField(null=True, blank=True)
+    lock_token = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ScheduledJobRun(models.Model):
+    """One execution of a ScheduledJob (run log)."""
+
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        OK = 'ok', 'OK'
+        FAILED = 'failed', 'Failed'
+
+    job = models.ForeignKey(ScheduledJob, on_delete=models.CASCADE, related_name='runs')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.RUNNING)
+    full_scan = models.BooleanField(default=False)
+    since = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    items_created = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['job', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.job.name} @ {self.started_at:%Y-%m-%d %H:%M} ({self.status})'
+
+
 # CRM role: receives client/supplier payment due notifications (plus staff/superusers).
 User.add_to_class(
     'administration',
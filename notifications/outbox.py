@@ -0,0 +1,263 @@
+"""Persistent browser-push queue.
+
+Request code only enqueues (one PushOutbox row per subscription endpoint); the
+push_worker management command claims due rows, delivers them from a thread
+pool and records the outcome. Retries back off per endpoint, and endpoints the
+push service reports as gone are deleted in bulk.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import PushOutbox, PushSubscription
+from .push import (
+    STALE_PUSH_HTTP_CODES,
+    build_push_payload,
+    deliver_push,
+    describe_push_error,
+    push_error_status,
+)
+
+logger = logging.getLogger(__name__)
+
+# Transient push-service answers worth retrying; any other 4xx will not improve.
+RETRY_PUSH_HTTP_CODES = {408, 425, 429}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_push(user, title, body, url=''):
+    """Queue a push for every browser the user subscribed; returns the number of rows queued."""
+    return enqueue_pushes([(user, title, body, url)])
+
+
+def enqueue_pushes(messages):
+    """Batch enqueue_push: messages are (user, title, body, url) tuples; two queries in total."""
+    messages = list(messages)
+    if not messages:
+        return 0
+    endpoints = defaultdict(list)
+    subscriptions = PushSubscription.objects.filter(
+        user_id__in={user.pk for user, *_ in messages}
+    ).values_list('pk', 'user_id')
+    for pk, user_id in subscriptions:
+        endpoints[user_id].append(pk)
+    rows = []
+    for user, title, body, url in messages:
+        if not endpoints.get(user.pk):
+            continue
+        payload = build_push_payload(title, body, url)
+        rows.extend(PushOutbox(subscription_id=pk, payload=payload) for pk in endpoints[user.pk])
+    if rows:
+        PushOutbox.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def retry_delay(attempts, retry_after=None):
+    """Exponential backoff after the given number of failed attempts, capped; Retry-After wins when longer."""
+    base = _setting('PUSH_OUTBOX_RETRY_BASE_SECONDS', 30)
+    cap = _setting('PUSH_OUTBOX_RETRY_MAX_SECONDS', 3600)
+    seconds = min(cap, base * 2 ** max(attempts - 1, 0))
+    if retry_after:
+        seconds = max(seconds, min(retry_after, cap))
+    return timedelta(seconds=seconds)
+
+
+def _retry_after_seconds(exc):
+    response = getattr(exc, 'response', None)
+    try:
+        return int(response.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+@dataclass
+class DeliveryStats:
+    claimed: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    stale_removed: int = 0
+
+    def add(self, other):
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def claim_due(limit, *, lease_seconds=None):
+    """Lease up to `limit` due pending rows to this worker and return them with their subscriptions.
+
+    The lease is taken with a conditional UPDATE, so concurrent workers never
+    claim the same row; rows of a worker that died become due again when the
+    lease runs out.
+    """
+    now = timezone.now()
+    lease = lease_seconds or _setting('PUSH_OUTBOX_LEASE_SECONDS', 300)
+    due_ids = list(
+        PushOutbox.objects.filter(status=PushOutbox.Status.PENDING, next_attempt_at__lte=now)
+        .exclude(claimed_until__gt=now)
+        .order_by('next_attempt_at', 'id')
+        .values_list('pk', flat=True)[:limit]
+    )
+    if not due_ids:
+        return []
+    token = uuid.uuid4().hex
+    PushOutbox.objects.filter(pk__in=due_ids).exclude(claimed_until__gt=now).update(
+        claim_token=token,
+        claimed_until=now + timedelta(seconds=lease),
+    )
+    return list(
+        PushOutbox.objects.filter(claim_token=token, status=PushOutbox.Status.PENDING)
+        .select_related('subscription')
+        .order_by('id')
+    )
+
+
+def _send_to_endpoint(rows, vapid):
+    """Deliver one endpoint's rows in order (runs in a pool thread, no database access).
+
+    Returns (row, outcome, error, retry_after) tuples. After the first retryable
+    or stale failure the endpoint's remaining rows are not attempted.
+    """
+    from pywebpush import WebPushException
+
+    results = []
+    for index, row in enumerate(rows):
+        try:
+            deliver_push(row.subscription, row.payload, vapid)
+        except WebPushException as exc:
+            status = push_error_status(exc)
+            error = describe_push_error(exc)
+            if status in STALE_PUSH_HTTP_CODES:
+                outcome = 'stale'
+            elif status is None or status >= 500 or status in RETRY_PUSH_HTTP_CODES:
+                outcome = 'retry'
+            else:
+                outcome = 'failed'
+            results.append((row, outcome, error, _retry_after_seconds(exc)))
+        except Exception as exc:
+            results.append((row, 'retry', str(exc), None))
+        else:
+            results.append((row, 'sent', '', None))
+            continue
+        if results[-1][1] != 'failed':
+            results.extend((later, 'deferred', '', None) for later in rows[index + 1:])
+            break
+    return results
+
+
+def deliver_claimed(rows, vapid, *, threads=None):
+    """Send claimed rows from a thread pool (one task per endpoint) and record the outcomes."""
+    stats = DeliveryStats(claimed=len(rows))
+    if not rows:
+        return stats
+    by_endpoint = defaultdict(list)
+    for row in rows:
+        by_endpoint[row.subscription_id].append(row)
+
+    threads = threads or _setting('PUSH_WORKER_THREADS', 8)
+    with ThreadPoolExecutor(max_workers=min(threads, len(by_endpoint))) as pool:
+        batches = list(pool.map(lambda group: _send_to_endpoint(group, vapid), by_endpoint.values()))
+
+    now = timezone.now()
+    max_attempts = _setting('PUSH_OUTBOX_MAX_ATTEMPTS', 6)
+    stale_subscriptions = set()
+    updated = []
+    for results in batches:
+        endpoint_next_attempt = None
+        for row, outcome, error, retry_after in results:
+            row.claim_token = ''
+            row.claimed_until = None
+            if outcome == 'stale':
+                stale_subscriptions.add(row.subscription_id)
+                continue
+            if outcome == 'deferred':
+                # Waits with the endpoint's failed row; not an attempt of its own.
+                row.next_attempt_at = endpoint_next_attempt or now
+            else:
+                row.attempts += 1
+                row.last_error = error[:2000]
+            if outcome == 'sent':
+                row.status = PushOutbox.Status.SENT
+                row.sent_at = now
+                stats.sent += 1
+            elif outcome == 'failed' or (outcome == 'retry' and row.attempts >= max_attempts):
+                row.status = PushOutbox.Status.FAILED
+                stats.failed += 1
+            elif outcome == 'retry':
+                row.next_attempt_at = endpoint_next_attempt = now + retry_delay(row.attempts, retry_after)
+                stats.retried += 1
+            updated.append(row)
+
+    if updated:
+        PushOutbox.objects.bulk_update(
+            updated,
+            ['status', 'attempts', 'next_attempt_at', 'claim_token', 'claimed_until', 'last_error', 'sent_at'],
+            batch_size=500,
+        )
+    if stale_subscriptions:
+        # Cascades to every queued row for those endpoints.
+        PushSubscription.objects.filter(pk__in=stale_subscriptions).delete()
+        stats.stale_removed = len(stale_subscriptions)
+        logger.info('Removed %d stale push subscription(s)', len(stale_subscriptions))
+    return stats
+
+
+def drain_outbox(vapid, *, batch_size=None, threads=None, max_batches=None):
+    """Deliver due rows batch by batch until none are due (or max_batches ran)."""
+    batch_size = batch_size or _setting('PUSH_WORKER_BATCH_SIZE', 200)
+    total = DeliveryStats()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = claim_due(batch_size)
+        if not rows:
+            break
+        total.add(deliver_claimed(rows, vapid, threads=threads))
+        batches += 1
+    return total
+
+
+def prune_outbox(*, days=None):
+    """Delete delivered and given-up rows older than the retention window; returns the number deleted."""
+    days = _setting('PUSH_OUTBOX_RETENTION_DAYS', 7) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = PushOutbox.objects.filter(
+        status__in=[PushOutbox.Status.SENT, PushOutbox.Status.FAILED],
+        created_at__lt=cutoff,
+    ).delete()
+    return deleted
+
+
+def outbox_metrics():
+    """Queue depth and recent delivery counts for monitoring."""
+    now = timezone.now()
+    by_status = dict(
+        PushOutbox.objects.values_list('status').annotate(c=Count('id')).order_by()
+    )
+    oldest_due = PushOutbox.objects.filter(
+        status=PushOutbox.Status.PENDING, next_attempt_at__lte=now,
+    ).aggregate(oldest=Min('created_at'))['oldest']
+    last_hour = now - timedelta(hours=1)
+    return {
+        'pending': by_status.get(PushOutbox.Status.PENDING, 0),
+        'sent': by_status.get(PushOutbox.Status.SENT, 0),
+        'failed': by_status.get(PushOutbox.Status.FAILED, 0),
+        'retrying': PushOutbox.objects.filter(status=PushOutbox.Status.PENDING, attempts__gt=0).count(),
+        'sent_last_hour': PushOutbox.objects.filter(
+            status=PushOutbox.Status.SENT, sent_at__gte=last_hour,
+        ).count(),
+        'oldest_due_age_seconds': int((now - oldest_due).total_seconds()) if oldest_due else 0,
+    }
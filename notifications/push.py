@@ -102,7 +102,49 @@ def _response_detail(exc):
         return ''
 
 
+def build_push_payload(title, body, url=''):
+    icon_url = get_push_icon_url()
+    return json.dumps({
+        'title': title,
+        'body': body,
+        'url': url or '/',
+        'icon': icon_url,
+        'badge': icon_url,
+    })
+
+
+def push_error_status(exc):
+    """HTTP status of a failed push (None for network errors)."""
+    return getattr(getattr(exc, 'response', None), 'status_code', None)
+
+
+def describe_push_error(exc):
+    status = push_error_status(exc)
+    err = f'HTTP {status}: {exc}'
+    detail = _response_detail(exc)
+    if detail:
+        err += f' — {detail}'
+    return err
+
+
+def deliver_push(sub, payload, vapid):
+    """POST one payload to one subscription endpoint; raises pywebpush.WebPushException on HTTP errors."""
+    from pywebpush import webpush
+
+    webpush(
+        subscription_info={
+            'endpoint': sub.endpoint,
+            'keys': {'p256dh': sub.p256dh, 'auth': sub.auth},
+        },
+        data=payload,
+        vapid_private_key=vapid,
+        vapid_claims=_vapid_claims(),
+        ttl=86400,
+    )
+
+
 def send_push_to_user(user, title, body, url='', *, verbose=False):
+    """Deliver immediately, in the calling thread (diagnostics; notifications go through the outbox)."""
     try:
         vapid = load_vapid_credentials()
     except ValueError as exc:
@@ -124,20 +166,14 @@ def send_push_to_user(user, title, body, url='', *, verbose=False):
         return {'sent': 0, 'failed': 0, 'skipped': 'no_subscription', 'errors': [msg]}
 
     try:
-        from pywebpush import WebPushException, webpush
+        from pywebpush import WebPushException
     except ImportError:
         msg = 'pywebpush not installed'
         logger.warning('%s; browser push disabled', msg)
         return {'sent': 0, 'failed': 0, 'skipped': 'pywebpush_missing', 'errors': [msg]}
 
     icon_url = get_push_icon_url()
-    payload = json.dumps({
-        'title': title,
-        'body': body,
-        'url': url or '/',
-        'icon': icon_url,
-        'badge': icon_url,
-    })
+    payload = build_push_payload(title, body, url)
 
     sent = 0
     failed = 0
@@ -146,27 +182,14 @@ def send_push_to_user(user, title, body, url='', *, verbose=False):
 
     for sub in subscriptions:
         try:
-            webpush(
-                subscription_info={
-                    'endpoint': sub.endpoint,
-                    'keys': {'p256dh': sub.p256dh, 'auth': sub.auth},
-                },
-                data=payload,
-                vapid_private_key=vapid,
-                vapid_claims=_vapid_claims(),
-                ttl=86400,
-            )
+            deliver_push(sub, payload, vapid)
             sent += 1
         except WebPushException as exc:
             failed += 1
-            status = getattr(getattr(exc, 'response', None), 'status_code', None)
-            detail = _response_detail(exc)
-            err = f'HTTP {status}: {exc}'
-            if detail:
-                err += f' — {detail}'
+            err = describe_push_error(exc)
             errors.append(err)
             logger.warning('Push failed for %s: %s', user.username, err)
-            if status in STALE_PUSH_HTTP_CODES:
+            if push_error_status(exc) in STALE_PUSH_HTTP_CODES:
                 stale.append(sub.pk)
         except Exception as exc:
             failed += 1
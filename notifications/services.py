@@ -5,6 +5,7 @@ from django.db.models import Q
 from django.urls import reverse
 from django.utils import timezone
 
+from .counters import refresh_unread_counters
 from .models import NotificationKind, UserNotification
 
 
@@ -77,25 +78,70 @@ def create_notification(
             dedupe_key='',
             **defaults,
         )
+    refresh_unread_counters([recipient.pk])
 
     if send_push:
         try:
-            from .push import send_push_to_user
+            from .outbox import enqueue_push
 
-            send_push_to_user(recipient, title, message or title, url)
+            enqueue_push(recipient, title, message or title, url)
         except Exception:
             import logging
             logging.getLogger(__name__).exception(
-                'Push notification failed for %s (in-app notification still saved)',
+                'Queueing push failed for %s (in-app notification still saved)',
                 getattr(recipient, 'username', recipient),
             )
 
     return notification
 
 
+def create_notifications(notifications, *, send_push=True, batch_size=500):
+    """Batch create_notification for unsaved UserNotification instances.
+
+    Rows whose (recipient, dedupe_key) already exists are skipped, with one
+    lookup per batch instead of a get_or_create per row; the rest are inserted
+    with bulk_create and their pushes queued together. Returns the new rows.
+    """
+    pending = {}
+    for notification in notifications:
+        recipient = notification.recipient
+        if not recipient or not recipient.is_active:
+            continue
+        key = (recipient.pk, notification.dedupe_key) if notification.dedupe_key else id(notification)
+        pending.setdefault(key, notification)
+    candidates = list(pending.values())
+
+    created = []
+    for start in range(0, len(candidates), batch_size):
+        chunk = candidates[start:start + batch_size]
+        keys = {n.dedupe_key for n in chunk if n.dedupe_key}
+        existing = set()
+        if keys:
+            existing = set(
+                UserNotification.objects.filter(dedupe_key__in=keys).order_by().values_list('recipient_id', 'dedupe_key')
+            )
+        fresh = [n for n in chunk if not n.dedupe_key or (n.recipient_id, n.dedupe_key) not in existing]
+        # ignore_conflicts covers a concurrent poll inserting the same key in between.
+        UserNotification.objects.bulk_create(fresh, ignore_conflicts=True)
+        created.extend(fresh)
+    refresh_unread_counters({n.recipient_id for n in created})
+
+    if send_push and created:
+        try:
+            from .outbox import enqueue_pushes
+
+            enqueue_pushes((n.recipient, n.title, n.message or n.title, n.url) for n in created)
+        except Exception:
+            import logging
+            logging.getLogger(__name__).exception(
+                'Queueing %d push(es) failed (in-app notifications still saved)', len(created)
+            )
+    return created
+
+
 def notify_all_users(*, kind, title, message='', url='', lead=None, leadtask=None, dedupe_prefix):
-    for user in active_users():
-        create_notification(
+    create_notifications(
+        UserNotification(
             recipient=user,
             kind=kind,
             title=title,
@@ -105,6 +151,8 @@ def notify_all_users(*, kind, title, message='', url='', lead=None, leadtask=Non
             leadtask=leadtask,
             dedupe_key=f'{dedupe_prefix}:{user.pk}',
         )
+        for user in active_users()
+    )
 
 
 def notify_takeover_lead(lead):
@@ -164,7 +212,7 @@ def notify_media_upload_link(upload_link, *, files_added=0):
     file_word = 'file' if total == 1 else 'files'
     message = f'{total} media {file_word} uploaded'
 
-    from .push import send_push_to_user
+    from .outbox import enqueue_push
 
     for user in recipients_for_assigned_agent(lead, leadtask):
         dedupe_key = f'media_upload:{upload_link.pk}:{user.pk}'
@@ -191,7 +239,8 @@ def notify_media_upload_link(upload_link, *, files_added=0):
             notification.save(update_fields=update_fields)
 
         if created or files_added > 0:
-            send_push_to_user(user, title, message, url)
+            refresh_unread_counters([user.pk])
+            enqueue_push(user, title, message, url)
 
 
 def notify_new_chat_message(message):
@@ -220,17 +269,41 @@ def notify_broadcast(*, sender, body):
     )
 
 
-def sync_reminder_notifications():
-    """Create due-soon reminders. Safe to call on poll (throttled in views)."""
-    now = timezone.now()
-    window_end = now + timedelta(hours=24)
-    today = timezone.localdate()
-    passport_window_end = today + timedelta(days=7)
+REMINDER_WINDOW = timedelta(hours=24)
+PASSPORT_REMINDER_DAYS = 7
+
+
+def _entered_window(due_field, previous_end, since):
+    """Rows due after the previous run's window end (so new to the window), or created since that run."""
+    if since is None:
+        return Q()
+    return Q(**{f'{due_field}__gt': previous_end}) | Q(created_at__gt=since)
+
+
+def sync_reminder_notifications(*, since=None, now=None):
+    """Create due-soon reminders; returns how many notifications were created.
+
+    With `since` (the previous run's `now`) only rows that entered a reminder
+    window after it, or were created after it, are read. Without it every row
+    inside the windows is checked; dedupe keys keep both idempotent.
+    """
+    now = now or timezone.now()
+    window_end = now + REMINDER_WINDOW
+    today = timezone.localdate(now)
+    passport_window_end = today + timedelta(days=PASSPORT_REMINDER_DAYS)
+    previous_end = previous_passport_end = None
+    if since is not None:
+        previous_end = since + REMINDER_WINDOW
+        previous_passport_end = timezone.localdate(since) + timedelta(days=PASSPORT_REMINDER_DAYS)
 
     from tasks.models import LeadTask, Payment, Service
 
+    notifications = []
+    payment_recipients = recipients_for_payment_notifications()
+
     payments = (
         Payment.objects.filter(
+            _entered_window('date', previous_end, since),
             is_checked=False,
             date__gte=now,
             date__lte=window_end,
@@ -242,8 +315,8 @@ def sync_reminder_notifications():
         lead = leadtask.lead
         due = timezone.localtime(payment.date).strftime('%d %b %Y %H:%M')
         url = reverse('client_payments_list')
-        for user in recipients_for_payment_notifications():
-            create_notification(
+        for user in payment_recipients:
+            notifications.append(UserNotification(
                 recipient=user,
                 kind=NotificationKind.CLIENT_PAYMENT_DUE,
                 title=f'Client payment due: {lead.name}',
@@ -252,10 +325,11 @@ def sync_reminder_notifications():
                 lead=lead,
                 leadtask=leadtask,
                 dedupe_key=f'client_payment_due:{payment.pk}:{user.pk}',
-            )
+            ))
 
     services = (
         Service.objects.filter(
+            _entered_window('due_time', previous_end, since),
             is_checked=False,
             due_time__gte=now,
             due_time__lte=window_end,
@@ -267,8 +341,8 @@ def sync_reminder_notifications():
         lead = leadtask.lead
         due = timezone.localtime(service.due_time).strftime('%d %b %Y %H:%M')
         url = reverse('supplier_payments_list')
-        for user in recipients_for_payment_notifications():
-            create_notification(
+        for user in payment_recipients:
+            notifications.append(UserNotification(
                 recipient=user,
                 kind=NotificationKind.SUPPLIER_PAYMENT_DUE,
                 title=f'Supplier payment due: {lead.name}',
@@ -277,10 +351,11 @@ def sync_reminder_notifications():
                 lead=lead,
                 leadtask=leadtask,
                 dedupe_key=f'supplier_payment_due:{service.pk}:{user.pk}',
-            )
+            ))
 
     travelling = (
         LeadTask.objects.filter(
+            _entered_window('travel_date', previous_end, since),
             travel_date__gte=now,
             travel_date__lte=window_end,
         )
@@ -291,7 +366,7 @@ def sync_reminder_notifications():
         when = timezone.localtime(leadtask.travel_date).strftime('%d %b %Y %H:%M')
         url = reverse('edit_lead_tasks', kwargs={'pk': leadtask.pk})
         for user in recipients_for_assigned_agent(lead, leadtask):
-            create_notification(
+            notifications.append(UserNotification(
                 recipient=user,
                 kind=NotificationKind.CLIENT_TRAVELLING,
                 title=f'Client travelling soon: {lead.name}',
@@ -300,10 +375,11 @@ def sync_reminder_notifications():
                 lead=lead,
                 leadtask=leadtask,
                 dedupe_key=f'client_travelling:{leadtask.pk}:{user.pk}',
-            )
+            ))
 
     returning = (
         LeadTask.objects.filter(
+            _entered_window('return_date', previous_end, since),
             return_date__gte=now,
             return_date__lte=window_end,
         )
@@ -314,7 +390,7 @@ def sync_reminder_notifications():
         when = timezone.localtime(leadtask.return_date).strftime('%d %b %Y %H:%M')
         url = reverse('edit_lead_tasks', kwargs={'pk': leadtask.pk})
         for user in recipients_for_assigned_agent(lead, leadtask):
-            create_notification(
+            notifications.append(UserNotification(
                 recipient=user,
                 kind=NotificationKind.CLIENT_RETURN,
                 title=f'Client return soon: {lead.name}',
@@ -323,10 +399,11 @@ def sync_reminder_notifications():
                 lead=lead,
                 leadtask=leadtask,
                 dedupe_key=f'client_return:{leadtask.pk}:{user.pk}',
-            )
+            ))
 
     passports = (
         LeadTask.objects.filter(
+            _entered_window('passport_expiry_date', previous_passport_end, since),
             passport_expiry_date__isnull=False,
             passport_expiry_date__gte=today,
             passport_expiry_date__lte=passport_window_end,
@@ -338,7 +415,7 @@ def sync_reminder_notifications():
         expiry = leadtask.passport_expiry_date.strftime('%d %b %Y')
         url = reverse('edit_lead_tasks', kwargs={'pk': leadtask.pk})
         for user in recipients_for_assigned_agent(lead, leadtask):
-            create_notification(
+            notifications.append(UserNotification(
                 recipient=user,
                 kind=NotificationKind.PASSPORT_EXPIRING,
                 title=f'Passport expiring soon: {lead.name}',
@@ -347,7 +424,9 @@ def sync_reminder_notifications():
                 lead=lead,
                 leadtask=leadtask,
                 dedupe_key=f'passport_expiring:{leadtask.pk}:{user.pk}',
-            )
+            ))
+
+    return len(create_notifications(notifications))
 
 
 def unread_count(user):
@@ -9,17 +9,9 @@ from .services import notify_lead_assigned, notify_leadtask_assigned, notify_tak
 
 @receiver(pre_save, sender=Lead)
 def _remember_lead_state(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old = Lead.objects.get(pk=instance.pk)
-            instance._prev_takeover = old.takeover
-            instance._prev_assigned_to_id = old.assigned_to_id
-        except Lead.DoesNotExist:
-            instance._prev_takeover = False
-            instance._prev_assigned_to_id = None
-    else:
-        instance._prev_takeover = False
-        instance._prev_assigned_to_id = None
+    old = instance.tracked_original()
+    instance._prev_takeover = old.takeover if old else False
+    instance._prev_assigned_to_id = old.assigned_to_id if old else None
 
 
 @receiver(post_save, sender=Lead)
@@ -42,14 +34,8 @@ def lead_notifications(sender, instance, created, **kwargs):
 
 @receiver(pre_save, sender=LeadTask)
 def _remember_leadtask_state(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old = LeadTask.objects.get(pk=instance.pk)
-            instance._prev_assigned_to_id = old.assigned_to_id
-        except LeadTask.DoesNotExist:
-            instance._prev_assigned_to_id = None
-    else:
-        instance._prev_assigned_to_id = None
+    old = instance.tracked_original()
+    instance._prev_assigned_to_id = old.assigned_to_id if old else None
 
 
 @receiver(post_save, sender=LeadTask)
@@ -0,0 +1,401 @@
+"""Tests for notification fan-out, counters, the event stream, the push outbox and the scheduler."""
+
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from pywebpush import WebPushException
+
+from display.models import Lead
+from notifications.counters import refresh_unread_counters
+from notifications.events import current_cursor, events_since
+from notifications.models import (
+    ChatMessage,
+    NotificationKind,
+    PushOutbox,
+    PushSubscription,
+    ScheduledJob,
+    ScheduledJobRun,
+    UnreadCounter,
+    UserNotification,
+)
+from notifications.outbox import claim_due, deliver_claimed, enqueue_push, outbox_metrics, retry_delay
+from notifications.services import create_notification, notify_all_users, sync_reminder_notifications
+from tasks.models import LeadTask, Payment
+
+
+def push_error(status, retry_after=None):
+    headers = {'Retry-After': str(retry_after)} if retry_after else {}
+    return WebPushException('push failed', response=SimpleNamespace(status_code=status, text='', headers=headers))
+
+
+class PushOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent', password='pw')
+        self.phone = PushSubscription.objects.create(user=self.user, endpoint='https://push.example/phone', p256dh='k', auth='a')
+        self.laptop = PushSubscription.objects.create(user=self.user, endpoint='https://push.example/laptop', p256dh='k', auth='a')
+
+    def test_create_notification_only_enqueues(self):
+        with patch('notifications.outbox.deliver_push') as deliver:
+            create_notification(recipient=self.user, kind=NotificationKind.BROADCAST, title='Hello')
+        deliver.assert_not_called()
+        self.assertEqual(PushOutbox.objects.filter(status=PushOutbox.Status.PENDING).count(), 2)
+
+    def test_worker_delivers_and_marks_sent(self):
+        enqueue_push(self.user, 'Hello', 'Body')
+        with patch('notifications.outbox.deliver_push') as deliver:
+            stats = deliver_claimed(claim_due(10), vapid=None)
+        self.assertEqual(deliver.call_count, 2)
+        self.assertEqual(stats.sent, 2)
+        self.assertFalse(PushOutbox.objects.exclude(status=PushOutbox.Status.SENT).exists())
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        enqueue_push(self.user, 'Hello', 'Body')
+        self.assertEqual(len(claim_due(10)), 2)
+        self.assertEqual(claim_due(10), [])
+
+    def test_retryable_failure_backs_off_the_whole_endpoint(self):
+        enqueue_push(self.user, 'First', 'Body')
+        enqueue_push(self.user, 'Second', 'Body')
+
+        def deliver(sub, payload, vapid):
+            if sub.pk == self.phone.pk:
+                raise push_error(503)
+
+        with patch('notifications.outbox.deliver_push', side_effect=deliver) as mocked:
+            stats = deliver_claimed(claim_due(10), vapid=None)
+        # Laptop got both; phone was tried once and its second push waited without an attempt.
+        self.assertEqual(mocked.call_count, 3)
+        self.assertEqual((stats.sent, stats.retried), (2, 1))
+        phone_rows = list(PushOutbox.objects.filter(subscription=self.phone).order_by('id'))
+        self.assertEqual([row.attempts for row in phone_rows], [1, 0])
+        self.assertEqual(phone_rows[0].next_attempt_at, phone_rows[1].next_attempt_at)
+        self.assertGreater(phone_rows[0].next_attempt_at, timezone.now())
+        self.assertEqual(claim_due(10), [])
+
+    def test_gives_up_after_max_attempts(self):
+        enqueue_push(self.user, 'Hello', 'Body')
+        PushOutbox.objects.update(attempts=5)
+        with self.settings(PUSH_OUTBOX_MAX_ATTEMPTS=6), patch('notifications.outbox.deliver_push', side_effect=push_error(500)):
+            stats = deliver_claimed(claim_due(10), vapid=None)
+        self.assertEqual(stats.failed, 2)
+        self.assertEqual(PushOutbox.objects.filter(status=PushOutbox.Status.FAILED).count(), 2)
+
+    def test_stale_endpoints_are_removed_in_bulk(self):
+        enqueue_push(self.user, 'Hello', 'Body')
+        with patch('notifications.outbox.deliver_push', side_effect=push_error(410)):
+            stats = deliver_claimed(claim_due(10), vapid=None)
+        self.assertEqual(stats.stale_removed, 2)
+        self.assertFalse(PushSubscription.objects.exists())
+        self.assertFalse(PushOutbox.objects.exists())
+
+    def test_retry_delay_grows_and_honours_retry_after(self):
+        self.assertEqual(retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(retry_delay(3), timedelta(seconds=120))
+        self.assertEqual(retry_delay(20), timedelta(seconds=3600))
+        self.assertEqual(retry_delay(1, retry_after=90), timedelta(seconds=90))
+
+    def test_metrics_and_worker_command(self):
+        enqueue_push(self.user, 'Hello', 'Body')
+        self.assertEqual(outbox_metrics()['pending'], 2)
+        out = StringIO()
+        with patch('notifications.management.commands.push_worker.Command._vapid', return_value=None), \
+                patch('notifications.outbox.deliver_push'):
+            call_command('push_worker', '--once', stdout=out)
+        self.assertIn('2 sent', out.getvalue())
+        metrics = outbox_metrics()
+        self.assertEqual((metrics['pending'], metrics['sent'], metrics['sent_last_hour']), (0, 2, 2))
+
+
+class BulkNotificationTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'agent{i}', password='pw') for i in range(6)]
+        User.objects.filter(pk=self.users[0].pk).update(is_staff=True)
+        User.objects.filter(pk=self.users[1].pk).update(administration=True)
+        for user in self.users[:3]:
+            PushSubscription.objects.create(user=user, endpoint=f'https://push.example/{user.pk}', p256dh='k', auth='a')
+
+    def test_broadcast_is_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(9):
+            notify_all_users(kind=NotificationKind.BROADCAST, title='Notice', dedupe_prefix='broadcast:1')
+        self.assertEqual(UserNotification.objects.count(), 6)
+        self.assertEqual(PushOutbox.objects.count(), 3)
+
+    def test_repeated_fan_out_skips_existing_keys(self):
+        notify_all_users(kind=NotificationKind.BROADCAST, title='Notice', dedupe_prefix='broadcast:1')
+        notify_all_users(kind=NotificationKind.BROADCAST, title='Notice', dedupe_prefix='broadcast:1')
+        self.assertEqual(UserNotification.objects.count(), 6)
+        self.assertEqual(PushOutbox.objects.count(), 3)
+
+    def test_reminders_do_not_scale_queries_with_payments(self):
+        agent = self.users[2]
+        for i in range(5):
+            lead = Lead.objects.create(name=f'Client {i}', phone=f'+9617000000{i}', assigned_to=agent)
+            task = LeadTask.objects.create(lead=lead, assigned_to=agent, status='onhold')
+            Payment.objects.create(leadtask=task, date=timezone.now() + timedelta(hours=2), amount=100)
+
+        queued_before = PushOutbox.objects.count()
+        notified_before = UserNotification.objects.count()
+        with CaptureQueriesContext(connection) as queries:
+            sync_reminder_notifications()
+        # 5 payments x 2 privileged users, read and written in a handful of queries.
+        self.assertEqual(UserNotification.objects.filter(kind=NotificationKind.CLIENT_PAYMENT_DUE).count(), 10)
+        self.assertLessEqual(len(queries), 15)
+        self.assertEqual(PushOutbox.objects.count() - queued_before, 10)
+
+        sync_reminder_notifications()
+        self.assertEqual(UserNotification.objects.count() - notified_before, 10)
+
+
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='boss', password='pw', is_staff=True)
+        self.agent = User.objects.create_user(username='agent', password='pw')
+        lead = Lead.objects.create(name='Client', phone='+96170000000', assigned_to=self.agent)
+        self.task = LeadTask.objects.create(lead=lead, assigned_to=self.agent, status='onhold')
+
+    def payment_due_in(self, hours):
+        return Payment.objects.create(leadtask=self.task, date=timezone.now() + timedelta(hours=hours), amount=100)
+
+    def reminders(self):
+        return UserNotification.objects.filter(kind=NotificationKind.CLIENT_PAYMENT_DUE).count()
+
+    def test_incremental_run_only_reads_rows_new_to_the_window(self):
+        from notifications.scheduler import run_job
+
+        first = run_job('reminders')
+        self.assertTrue(first.full_scan)
+        self.payment_due_in(2)
+        later = self.payment_due_in(30)
+        # Backdate both so only the due-time crossing can bring them into a run.
+        Payment.objects.update(created_at=timezone.now() - timedelta(days=3))
+
+        with self.settings(SCHEDULER_FULL_RUN_MINUTES=24 * 60):
+            second = run_job('reminders', now=timezone.now() + timedelta(hours=10))
+        self.assertFalse(second.full_scan)
+        self.assertEqual(second.status, ScheduledJobRun.Status.OK)
+        # `later` (due in 30h) entered the 24h window during the 10h gap; `due_soon` was already inside.
+        self.assertEqual(
+            set(UserNotification.objects.filter(kind=NotificationKind.CLIENT_PAYMENT_DUE).values_list('dedupe_key', flat=True)),
+            {f'client_payment_due:{later.pk}:{self.staff.pk}'},
+        )
+
+    def test_new_rows_are_picked_up_and_full_run_reconciles(self):
+        from notifications.scheduler import run_job
+
+        run_job('reminders')
+        self.payment_due_in(2)
+        run_job('reminders')
+        self.assertEqual(self.reminders(), 1)
+
+        edited = self.payment_due_in(2)
+        Payment.objects.filter(pk=edited.pk).update(created_at=timezone.now() - timedelta(days=3))
+        run_job('reminders')
+        self.assertEqual(self.reminders(), 1)
+        run = run_job('reminders', full=True)
+        self.assertTrue(run.full_scan)
+        self.assertEqual(run.items_created, 1)
+        self.assertEqual(self.reminders(), 2)
+
+    def test_locked_job_is_skipped_and_failures_are_logged(self):
+        from notifications.scheduler import run_job
+
+        ScheduledJob.objects.create(name='reminders', lock_token='other', locked_until=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(run_job('reminders'))
+
+        ScheduledJob.objects.filter(name='reminders').update(locked_until=timezone.now() - timedelta(seconds=1))
+        with patch.dict('notifications.scheduler.JOBS', {'reminders': Mock(side_effect=RuntimeError('boom'))}):
+            run = run_job('reminders')
+        self.assertEqual(run.status, ScheduledJobRun.Status.FAILED)
+        self.assertIn('boom', run.error)
+        job = ScheduledJob.objects.get(name='reminders')
+        self.assertIsNone(job.last_success_at)
+        self.assertIsNone(job.locked_until)
+
+    def test_badge_poll_does_not_run_reminders(self):
+        self.payment_due_in(2)
+        self.client.force_login(self.agent)
+        with patch('notifications.services.sync_reminder_notifications') as sync:
+            response = self.client.get('/notifications/api/count/')
+        self.assertEqual(response.status_code, 200)
+        sync.assert_not_called()
+        self.assertEqual(self.reminders(), 0)
+
+    def test_command_runs_once(self):
+        self.payment_due_in(2)
+        out = StringIO()
+        call_command('run_scheduler', '--once', stdout=out)
+        self.assertIn('reminders: 1 created (full', out.getvalue())
+        self.assertEqual(ScheduledJobRun.objects.count(), 1)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent', password='pw')
+        self.other = User.objects.create_user(username='colleague', password='pw')
+        self.client.force_login(self.user)
+
+    def poll(self, **headers):
+        return self.client.get('/notifications/api/count/', **headers)
+
+    def test_counts_follow_creates_and_mark_read(self):
+        first = create_notification(recipient=self.user, kind=NotificationKind.BROADCAST, title='One')
+        create_notification(recipient=self.user, kind=NotificationKind.BROADCAST, title='Two')
+        self.client.force_login(self.other)
+        self.client.post('/notifications/api/chat/send/', {'recipient_id': self.user.pk, 'body': 'hi'}, content_type='application/json')
+        self.client.force_login(self.user)
+
+        data = self.poll().json()
+        self.assertEqual((data['unread_count'], data['unread_messages']), (3, 1))
+
+        self.client.post('/notifications/api/mark-read/', {'id': first.pk}, content_type='application/json')
+        self.assertEqual(self.poll().json()['unread_count'], 2)
+        self.client.get(f'/notifications/api/chat/{self.other.pk}/')
+        data = self.poll().json()
+        self.assertEqual((data['unread_count'], data['unread_messages']), (1, 0))
+
+    def test_unchanged_counts_answer_304_from_one_counter_read(self):
+        create_notification(recipient=self.user, kind=NotificationKind.BROADCAST, title='One')
+        response = self.poll()
+        etag = response['ETag']
+        self.assertEqual(response['X-Poll-Interval'], '90')
+        self.assertEqual(response.json()['poll_interval'], 90)
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.poll(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['X-Poll-Interval'], '90')
+        self.assertEqual(len([q for q in queries if 'notifications_unreadcounter' in q['sql']]), 1)
+        self.assertFalse([q for q in queries if 'notifications_usernotification' in q['sql']])
+
+        create_notification(recipient=self.user, kind=NotificationKind.BROADCAST, title='Two')
+        changed = self.poll(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_stale_counter_is_recounted(self):
+        create_notification(recipient=self.user, kind=NotificationKind.BROADCAST, title='One')
+        self.assertEqual(self.poll().json()['unread_count'], 1)
+        # A write path that bypasses the counter (e.g. cascade delete) is corrected once it ages out.
+        UserNotification.objects.all().delete()
+        self.assertEqual(self.poll().json()['unread_count'], 1)
+        UnreadCounter.objects.update(refreshed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.poll().json()['unread_count'], 0)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent', password='pw')
+        self.other = User.objects.create_user(username='colleague', password='pw')
+        self.client.force_login(self.user)
+
+    def send_chat(self, sender, recipient, body):
+        message = ChatMessage.objects.create(sender=sender, recipient=recipient, body=body)
+        refresh_unread_counters([recipient.pk])
+        return message
+
+    def test_events_since_merges_both_feeds_in_order(self):
+        cursor = current_cursor(self.user)
+        self.send_chat(self.other, self.user, 'hello')
+        create_notification(recipient=self.user, kind=NotificationKind.BROADCAST, title='Notice')
+        self.send_chat(self.user, self.other, 'reply')
+        self.send_chat(self.other, User.objects.create_user(username='third'), 'not mine')
+
+        events, cursor = events_since(self.user, cursor)
+        self.assertEqual([e['type'] for e in events], ['chat', 'notification', 'chat'])
+        self.assertEqual([events[0]['data']['is_mine'], events[2]['data']['is_mine']], [False, True])
+        self.assertEqual(events_since(self.user, cursor), ([], cursor))
+
+    def test_wsgi_fallback_returns_pending_events_with_retry_hint(self):
+        first = self.client.get('/notifications/api/events/')
+        self.assertEqual(first['Content-Type'], 'text/event-stream')
+        body = first.content.decode()
+        self.assertIn('retry: 90000', body)
+        self.assertIn('event: counts', body)
+        last_id = [line for line in body.splitlines() if line.startswith('id: ')][-1][4:]
+
+        self.send_chat(self.other, self.user, 'hello')
+        resumed = self.client.get('/notifications/api/events/', HTTP_LAST_EVENT_ID=last_id).content.decode()
+        self.assertIn('event: chat', resumed)
+        self.assertIn('"body":"hello"', resumed)
+        self.assertIn('"unread_messages":1', resumed)
+
+    def test_json_poll_fallback_and_thread_mark_read(self):
+        cursor = self.client.get('/notifications/api/events/poll/').json()['cursor']
+        self.send_chat(self.other, self.user, 'hello')
+        data = self.client.get('/notifications/api/events/poll/', {'since_id': cursor}).json()
+        self.assertEqual([e['type'] for e in data['events']], ['chat'])
+        self.assertEqual(data['unread_messages'], 1)
+
+        marked = self.client.post(f'/notifications/api/chat/{self.other.pk}/read/').json()
+        self.assertEqual(marked['unread_messages'], 0)
+        self.assertFalse(ChatMessage.objects.filter(is_read=False).exists())
+
+    async def test_asgi_request_streams_frames(self):
+        await self.async_client.aforce_login(self.user)
+        with self.settings(NOTIFICATION_STREAM_POLL_SECONDS=0.01, NOTIFICATION_STREAM_MAX_SECONDS=0.05):
+            response = await self.async_client.get('/notifications/api/events/', {'since_id': '0:0'})
+            self.assertTrue(response.streaming)
+            chunks = [chunk async for chunk in response.streaming_content]
+        body = b''.join(chunks).decode()
+        self.assertTrue(body.startswith('retry: 10'))
+        self.assertIn('event: counts', body)
+
+
+class ChatThreadPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent', password='pw')
+        self.other = User.objects.create_user(username='colleague', password='pw')
+        self.client.force_login(self.user)
+        start = timezone.now() - timedelta(hours=1)
+        messages = [
+            ChatMessage(
+                sender=self.other if i % 2 else self.user,
+                recipient=self.user if i % 2 else self.other,
+                body=f'm{i}',
+            )
+            for i in range(7)
+        ]
+        ChatMessage.objects.bulk_create(messages)
+        # Two messages share a timestamp so the id tiebreak is exercised.
+        for i, message in enumerate(ChatMessage.objects.order_by('pk')):
+            ChatMessage.objects.filter(pk=message.pk).update(created_at=start + timedelta(minutes=min(i, 5)))
+        self.ids = list(ChatMessage.objects.order_by('pk').values_list('pk', flat=True))
+        self.url = f'/notifications/api/chat/{self.other.pk}/'
+
+    def bodies(self, data):
+        return [m['body'] for m in data['messages']]
+
+    def test_default_page_is_newest_window_and_before_id_walks_back(self):
+        data = self.client.get(self.url, {'limit': 3}).json()
+        self.assertEqual(self.bodies(data), ['m4', 'm5', 'm6'])
+        self.assertTrue(data['has_more'])
+
+        data = self.client.get(self.url, {'limit': 3, 'before_id': data['messages'][0]['id']}).json()
+        self.assertEqual(self.bodies(data), ['m1', 'm2', 'm3'])
+        data = self.client.get(self.url, {'limit': 3, 'before_id': data['messages'][0]['id']}).json()
+        self.assertEqual(self.bodies(data), ['m0'])
+        self.assertFalse(data['has_more'])
+
+    def test_after_id_returns_newer_messages_oldest_first(self):
+        data = self.client.get(self.url, {'limit': 2, 'after_id': self.ids[4]}).json()
+        self.assertEqual(self.bodies(data), ['m5', 'm6'])
+        self.assertFalse(data['has_more'])
+
+    def test_anchor_from_another_thread_is_rejected(self):
+        stranger = User.objects.create_user(username='third')
+        foreign = ChatMessage.objects.create(sender=stranger, recipient=self.other, body='x')
+        response = self.client.get(self.url, {'before_id': foreign.pk})
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_the_delivered_window_is_marked_read(self):
+        self.client.get(self.url, {'limit': 2, 'before_id': self.ids[4]})
+        unread = set(ChatMessage.objects.filter(is_read=False, recipient=self.user).values_list('body', flat=True))
+        self.assertEqual(unread, {'m1', 'm5'})
@@ -1,16 +1,30 @@
+import asyncio
 import json
 from pathlib import Path
 
+from asgiref.sync import sync_to_async
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.db.models import Q
-from django.http import HttpResponse, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.views.decorators.http import require_GET, require_POST
 
+from .counters import get_unread_counter, refresh_unread_counters
+from .events import (
+    counts_payload,
+    format_cursor,
+    message_payload,
+    notification_payload,
+    parse_cursor,
+    poll_events,
+    sse_frame,
+)
 from .models import ChatMessage, PushSubscription, UserNotification
+from .outbox import outbox_metrics
 from .push import (
     get_push_icon_url,
     get_site_origin,
@@ -21,9 +35,6 @@ from .push import (
 from .services import (
     notify_broadcast,
     notify_new_chat_message,
-    sync_reminder_notifications,
-    unread_count,
-    unread_message_count,
 )
 
 
@@ -34,16 +45,6 @@ def _json_body(request):
         return {}
 
 
-REMINDER_SYNC_CACHE_KEY = 'notifications:sync_reminders'
-REMINDER_SYNC_INTERVAL_SEC = 300
-
-
-def _maybe_sync_reminder_notifications():
-    """Run reminder sync at most once every few minutes (badge poll + list open)."""
-    if cache.add(REMINDER_SYNC_CACHE_KEY, 1, timeout=REMINDER_SYNC_INTERVAL_SEC):
-        sync_reminder_notifications()
-
-
 @login_required(login_url='/login/')
 def chat_page(request):
     users = User.objects.filter(is_active=True).exclude(pk=request.user.pk).order_by('username')
@@ -57,47 +58,124 @@ def chat_page(request):
     })
 
 
+def _poll_interval():
+    return getattr(settings, 'NOTIFICATION_POLL_SECONDS', 90)
+
+
 @login_required(login_url='/login/')
 @require_GET
 def api_count(request):
-    """Lightweight badge poll — also triggers throttled reminder sync."""
-    _maybe_sync_reminder_notifications()
-    return JsonResponse({
-        'unread_count': unread_count(request.user),
-        'unread_messages': unread_message_count(request.user),
-    })
+    """Badge poll: one counter-row read, 304 when the counts' ETag is unchanged.
+
+    The advertised poll interval (seconds) is sent as X-Poll-Interval on every
+    answer, 304s included, and as poll_interval in the body.
+    """
+    counter = get_unread_counter(request.user)
+    etag = f'"{request.user.pk}-{counter.version}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({
+            'unread_count': counter.notifications,
+            'unread_messages': counter.messages,
+            'poll_interval': _poll_interval(),
+        })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    response['X-Poll-Interval'] = str(_poll_interval())
+    return response
 
 
 @login_required(login_url='/login/')
 @require_GET
 def api_list(request):
     if request.GET.get('count_only'):
-        return JsonResponse({
-            'unread_count': unread_count(request.user),
-            'unread_messages': unread_message_count(request.user),
-        })
-
-    _maybe_sync_reminder_notifications()
+        return api_count(request)
 
     notifications = (
         UserNotification.objects.filter(recipient=request.user)
         .select_related('lead', 'leadtask')[:50]
     )
-    items = [{
-        'id': n.pk,
-        'kind': n.kind,
-        'kind_label': n.get_kind_display(),
-        'title': n.title,
-        'message': n.message,
-        'url': n.url,
-        'is_read': n.is_read,
-        'created_at': n.created_at.isoformat(),
-    } for n in notifications]
+    items = [notification_payload(n) for n in notifications]
 
+    counter = get_unread_counter(request.user)
     return JsonResponse({
         'notifications': items,
-        'unread_count': unread_count(request.user),
-        'unread_messages': unread_message_count(request.user),
+        'unread_count': counter.notifications,
+        'unread_messages': counter.messages,
+        'poll_interval': _poll_interval(),
+    })
+
+
+def _stream_cursor(request):
+    return parse_cursor(request.headers.get('Last-Event-ID') or request.GET.get('since_id'))
+
+
+def _event_frames(events, cursor):
+    """SSE frames for one poll; every frame carries the cursor reached after it."""
+    frame_cursor = format_cursor(cursor)
+    return [sse_frame(event['type'], event['data'], event_id=frame_cursor) for event in events]
+
+
+async def _event_stream(user, cursor):
+    """Poll the user's feed and yield SSE frames until the connection times out (ASGI only)."""
+    poll_seconds = getattr(settings, 'NOTIFICATION_STREAM_POLL_SECONDS', 2)
+    max_seconds = getattr(settings, 'NOTIFICATION_STREAM_MAX_SECONDS', 300)
+    heartbeat_seconds = 15
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+    last_frame = loop.time()
+    version = None
+
+    yield f'retry: {poll_seconds * 1000}\n\n'
+    while loop.time() < deadline:
+        events, cursor, counter = await sync_to_async(poll_events)(user, cursor)
+        frames = _event_frames(events, cursor)
+        if counter.version != version:
+            version = counter.version
+            frames.append(sse_frame('counts', counts_payload(counter), event_id=format_cursor(cursor)))
+        if not frames and loop.time() - last_frame >= heartbeat_seconds:
+            frames.append(': keep-alive\n\n')
+        if frames:
+            last_frame = loop.time()
+            yield ''.join(frames)
+        await asyncio.sleep(poll_seconds)
+
+
+@login_required(login_url='/login/')
+@require_GET
+def api_events(request):
+    """Server-sent events: "notification", "chat" and "counts" for the current user.
+
+    Resumes after Last-Event-ID (or ?since_id=N:M). Under ASGI the response
+    stays open and streams; under WSGI it returns what is pending now with a
+    retry hint of NOTIFICATION_POLL_SECONDS, so EventSource reconnects on that
+    interval instead of holding a worker.
+    """
+    cursor = _stream_cursor(request)
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(_event_stream(request.user, cursor), content_type='text/event-stream')
+    else:
+        events, cursor, counter = poll_events(request.user, cursor)
+        frames = _event_frames(events, cursor)
+        frames.append(sse_frame('counts', counts_payload(counter), event_id=format_cursor(cursor)))
+        body = f'retry: {_poll_interval() * 1000}\n\n' + ''.join(frames)
+        response = HttpResponse(body, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required(login_url='/login/')
+@require_GET
+def api_events_poll(request):
+    """JSON polling fallback of api_events: {events, cursor, poll_interval, unread counts}."""
+    events, cursor, counter = poll_events(request.user, parse_cursor(request.GET.get('since_id')))
+    return JsonResponse({
+        'events': events,
+        'cursor': format_cursor(cursor),
+        'poll_interval': _poll_interval(),
+        **counts_payload(counter),
     })
 
 
@@ -107,6 +185,7 @@ def api_mark_read(request):
     data = _json_body(request)
     if data.get('all'):
         UserNotification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        refresh_unread_counters([request.user.pk])
         return JsonResponse({'status': 'ok'})
 
     notification_id = data.get('id')
@@ -116,6 +195,7 @@ def api_mark_read(request):
     UserNotification.objects.filter(
         recipient=request.user, pk=notification_id
     ).update(is_read=True)
+    refresh_unread_counters([request.user.pk])
     return JsonResponse({'status': 'ok'})
 
 
@@ -142,36 +222,87 @@ def api_chat_users(request):
     return JsonResponse({'users': result})
 
 
+def _mark_thread_read(user, other, *, message_ids=None, notifications=True):
+    """Mark other's messages to user (only `message_ids` when given), and their chat notifications, as read."""
+    messages = ChatMessage.objects.filter(sender=other, recipient=user, is_read=False)
+    if message_ids is not None:
+        messages = messages.filter(pk__in=message_ids)
+    messages.update(is_read=True)
+
+    if notifications:
+        UserNotification.objects.filter(
+            recipient=user,
+            kind='message',
+            is_read=False,
+            url__contains=f'user={other.pk}',
+        ).update(is_read=True)
+    refresh_unread_counters([user.pk])
+
+
+def _positive_int(value):
+    return int(value) if value and value.isdigit() and int(value) > 0 else None
+
+
+def _thread_window(user, other, *, before_id=None, after_id=None, limit):
+    """One page of the conversation, oldest first, and whether more exist beyond it.
+
+    Keyset pagination on (created_at, id): the default page is the newest
+    `limit` messages, before_id pages back through older ones and after_id
+    fetches what arrived after a message the client already shows. Returns
+    (None, False) when the anchor message is not part of the thread.
+    """
+    thread = ChatMessage.objects.filter(
+        Q(sender=user, recipient=other) | Q(sender=other, recipient=user)
+    )
+    anchor_id = before_id or after_id
+    if anchor_id:
+        anchor = thread.filter(pk=anchor_id).values('created_at').first()
+        if anchor is None:
+            return None, False
+        created_at = anchor['created_at']
+        if before_id:
+            thread = thread.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=anchor_id))
+        else:
+            thread = thread.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=anchor_id))
+
+    ordering = ('created_at', 'pk') if after_id else ('-created_at', '-pk')
+    page = list(thread.select_related('sender').order_by(*ordering)[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    if not after_id:
+        page.reverse()
+    return page, has_more
+
+
 @login_required(login_url='/login/')
 @require_GET
 def api_chat_thread(request, user_id):
+    """A page of the thread: the newest messages by default, ?before_id= for older, ?after_id= for newer."""
     other = get_object_or_404(User, pk=user_id, is_active=True)
     if other.pk == request.user.pk:
         return JsonResponse({'status': 'error', 'message': 'Invalid user'}, status=400)
 
-    messages = ChatMessage.objects.filter(
-        Q(sender=request.user, recipient=other) | Q(sender=other, recipient=request.user)
-    ).select_related('sender', 'recipient').order_by('created_at')[:200]
-
-    ChatMessage.objects.filter(
-        sender=other, recipient=request.user, is_read=False
-    ).update(is_read=True)
+    limit = min(
+        _positive_int(request.GET.get('limit')) or getattr(settings, 'CHAT_PAGE_SIZE', 50),
+        getattr(settings, 'CHAT_PAGE_MAX', 200),
+    )
+    before_id = _positive_int(request.GET.get('before_id'))
+    after_id = None if before_id else _positive_int(request.GET.get('after_id'))
+    messages, has_more = _thread_window(
+        request.user, other, before_id=before_id, after_id=after_id, limit=limit
+    )
+    if messages is None:
+        return JsonResponse({'status': 'error', 'message': 'Unknown message'}, status=400)
 
-    UserNotification.objects.filter(
-        recipient=request.user,
-        kind='message',
-        is_read=False,
-        url__contains=f'user={other.pk}',
-    ).update(is_read=True)
+    # Only delivered messages are marked read; the thread's notifications clear once the newest page is shown.
+    incoming = [m.pk for m in messages if m.sender_id == other.pk and not m.is_read]
+    reached_latest = not before_id and not (after_id and has_more)
+    if incoming or reached_latest:
+        _mark_thread_read(request.user, other, message_ids=incoming, notifications=reached_latest)
 
     return JsonResponse({
-        'messages': [{
-            'id': m.pk,
-            'body': m.body,
-            'is_mine': m.sender_id == request.user.pk,
-            'sender': m.sender.get_full_name() or m.sender.username,
-            'created_at': m.created_at.isoformat(),
-        } for m in messages],
+        'messages': [message_payload(m, request.user) for m in messages],
+        'has_more': has_more,
         'user': {
             'id': other.pk,
             'name': other.get_full_name() or other.username,
@@ -179,6 +310,16 @@ def api_chat_thread(request, user_id):
     })
 
 
+@login_required(login_url='/login/')
+@require_POST
+def api_chat_mark_read(request, user_id):
+    """Mark a thread read without reloading it (used when a message arrives over the event stream)."""
+    other = get_object_or_404(User, pk=user_id)
+    _mark_thread_read(request.user, other)
+    counter = get_unread_counter(request.user)
+    return JsonResponse({'status': 'ok', **counts_payload(counter)})
+
+
 @login_required(login_url='/login/')
 @require_POST
 def api_chat_send(request):
@@ -201,13 +342,7 @@ def api_chat_send(request):
 
     return JsonResponse({
         'status': 'ok',
-        'message': {
-            'id': message.pk,
-            'body': message.body,
-            'is_mine': True,
-            'sender': request.user.get_full_name() or request.user.username,
-            'created_at': message.created_at.isoformat(),
-        },
+        'message': message_payload(message, request.user),
     })
 
 
@@ -280,6 +415,14 @@ def api_push_test(request):
     return JsonResponse({'status': 'ok', 'detail': result})
 
 
+@login_required(login_url='/login/')
+@require_GET
+def api_push_metrics(request):
+    if not request.user.is_staff:
+        return JsonResponse({'status': 'error', 'message': 'Admin only'}, status=403)
+    return JsonResponse({'status': 'ok', 'outbox': outbox_metrics()})
+
+
 @login_required(login_url='/login/')
 @require_POST
 def api_push_unsubscribe(request):
@@ -0,0 +1,104 @@
+"""Shared AR/AP aging: one annotated query per report, bucketed in a single pass."""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from purchases.models import SupplierBill
+from sales.models import SalesInvoice
+from treasury.models import APAllocation, ARAllocation
+
+AGING_BUCKETS = ("not_due", "b0_30", "b31_60", "b61_90", "b90_plus")
+AGING_BUCKET_LABELS = ["Not due", "0–30 days", "31–60", "61–90", "90+"]
+
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def aging_bucket(days_overdue):
+    """Bucket key for a document that is days_overdue past its due date (negative = not due)."""
+    if days_overdue < 0:
+        return "not_due"
+    if days_overdue <= 30:
+        return "b0_30"
+    if days_overdue <= 60:
+        return "b31_60"
+    if days_overdue <= 90:
+        return "b61_90"
+    return "b90_plus"
+
+
+def _with_open_amount(qs, allocation_model, fk_name):
+    allocated = (
+        allocation_model.objects.filter(**{fk_name: OuterRef("pk")})
+        .values(fk_name)
+        .annotate(t=Sum("allocated_amount"))
+        .values("t")
+    )
+    return (
+        qs.annotate(allocated_total=Coalesce(Subquery(allocated, output_field=_MONEY), Value(Decimal("0.00")), output_field=_MONEY))
+        .annotate(open_amount=ExpressionWrapper(F("grand_total") - F("allocated_total"), output_field=_MONEY))
+        .filter(open_amount__gt=0)
+    )
+
+
+def open_receivable_invoices(date_from=None, date_to=None):
+    """Reporting invoices with an unallocated remainder, annotated with allocated_total/open_amount."""
+    qs = SalesInvoice.objects.filter(status__in=SalesInvoice.reporting_statuses()).select_related("client")
+    if date_from:
+        qs = qs.filter(issue_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(issue_date__lte=date_to)
+    return _with_open_amount(qs, ARAllocation, "sales_invoice")
+
+
+def open_payable_bills(date_from=None, date_to=None):
+    """Posted supplier bills with an unallocated remainder, annotated like open_receivable_invoices."""
+    qs = SupplierBill.objects.filter(status=SupplierBill.Status.POSTED).select_related("supplier")
+    if date_from:
+        qs = qs.filter(bill_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(bill_date__lte=date_to)
+    return _with_open_amount(qs, APAllocation, "supplier_bill")
+
+
+def age_documents(documents, *, doc_key, start_attr, today=None):
+    """Bucket annotated open documents in one pass.
+
+    Each row carries the document under doc_key plus total, paid, due (open amount),
+    due_date, days_overdue, bucket and one amount column per AGING_BUCKETS key.
+    Returns (rows, totals) where totals maps every bucket key to its sum.
+    """
+    today = today or date.today()
+    totals = {key: Decimal("0.00") for key in AGING_BUCKETS}
+    rows = []
+    for doc in documents:
+        due_date = doc.due_date or getattr(doc, start_attr)
+        days_overdue = (today - due_date).days
+        bucket = aging_bucket(days_overdue)
+        remaining = doc.open_amount
+        totals[bucket] += remaining
+        row = {
+            doc_key: doc,
+            "total": doc.grand_total or Decimal("0.00"),
+            "paid": doc.allocated_total,
+            "due": remaining,
+            "due_date": due_date,
+            "days_overdue": days_overdue,
+            "bucket": bucket,
+        }
+        row.update({key: Decimal("0.00") for key in AGING_BUCKETS})
+        row[bucket] = remaining
+        rows.append(row)
+    return rows, totals
+
+
+def receivables_aging(date_from=None, date_to=None, *, today=None):
+    docs = open_receivable_invoices(date_from, date_to).order_by("due_date", "issue_date")
+    return age_documents(docs, doc_key="invoice", start_attr="issue_date", today=today)
+
+
+def payables_aging(date_from=None, date_to=None, *, today=None):
+    docs = open_payable_bills(date_from, date_to).order_by("due_date", "bill_date")
+    return age_documents(docs, doc_key="bill", start_attr="bill_date", today=today)
@@ -3,10 +3,11 @@ from decimal import Decimal
 
 from django.db.models import Q, Sum
 
-from accounts_core.models import Client, Employee, Supplier
+from accounts_core.models import Employee, Supplier
 from expenses.models import OperatingExpense
 from purchases.models import SupplierBill
-from reporting.balances import client_ar_balance, supplier_ap_balance, supplier_line_purchases
+from reporting.aging import AGING_BUCKET_LABELS, AGING_BUCKETS, receivables_aging
+from reporting.balances import client_ar_balances, supplier_ap_balances, supplier_line_purchases_by_supplier
 from reporting.date_ranges import resolve_report_dates
 from sales.models import SalesInvoice, SalesInvoiceLine
 from treasury.models import Payment
@@ -59,13 +60,9 @@ def build_dashboard_analytics(request):
     gross_profit = revenue - cogs
     net_profit = gross_profit - opex_total
 
-    total_ar = Decimal("0.00")
-    for client in Client.objects.all():
-        total_ar += client_ar_balance(client, today)
-
-    total_ap = Decimal("0.00")
-    for supplier in Supplier.objects.all():
-        total_ap += supplier_ap_balance(supplier, today)
+    total_ar = sum(client_ar_balances(None, today).values(), Decimal("0.00"))
+    ap_balances = supplier_ap_balances(None, today)
+    total_ap = sum(ap_balances.values(), Decimal("0.00"))
 
     payments_in = Payment.objects.filter(status=Payment.Status.POSTED, direction=Payment.Direction.IN)
     payments_out = Payment.objects.filter(status=Payment.Status.POSTED, direction=Payment.Direction.OUT)
@@ -78,34 +75,27 @@ def build_dashboard_analytics(request):
     cash_in = payments_in.aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
     cash_out = payments_out.aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
 
+    aging_rows, ar_buckets = receivables_aging(today=today)
     receivables_due = []
-    for inv in (
-        SalesInvoice.objects.filter(status__in=SalesInvoice.reporting_statuses())
-        .select_related("client")
-        .order_by("due_date", "issue_date")
-    ):
-        allocated = sum((a.allocated_amount for a in inv.allocations.all()), Decimal("0.00"))
-        total = inv.grand_total or Decimal("0.00")
-        remaining = total - allocated
-        if remaining <= 0:
-            continue
-        due = inv.due_date or inv.issue_date
-        days_until = (due - today).days
-        is_overdue = today > due and remaining > 0
-        row = {
-            "invoice": inv,
-            "client_name": inv.client.name_en,
-            "invoice_no": inv.invoice_no,
-            "total": total,
-            "paid": allocated,
-            "remaining": remaining,
-            "currency": inv.currency,
-            "due_date": due,
-            "days_until": days_until,
-            "status": "overdue" if is_overdue else ("today" if days_until == 0 else "upcoming"),
-            "is_overdue": is_overdue,
-        }
-        receivables_due.append(row)
+    for aged in aging_rows:
+        inv = aged["invoice"]
+        days_until = -aged["days_overdue"]
+        is_overdue = days_until < 0
+        receivables_due.append(
+            {
+                "invoice": inv,
+                "client_name": inv.client.name_en,
+                "invoice_no": inv.invoice_no,
+                "total": aged["total"],
+                "paid": aged["paid"],
+                "remaining": aged["due"],
+                "currency": inv.currency,
+                "due_date": aged["due_date"],
+                "days_until": days_until,
+                "status": "overdue" if is_overdue else ("today" if days_until == 0 else "upcoming"),
+                "is_overdue": is_overdue,
+            }
+        )
     receivables_due.sort(key=lambda x: (0 if x["is_overdue"] else 1, x["due_date"]))
     overdue_client_payments = [r for r in receivables_due if r["is_overdue"]]
     overdue_client_payments.sort(key=lambda x: x["due_date"])
@@ -138,9 +128,10 @@ def build_dashboard_analytics(request):
     salesman_stats.sort(key=lambda x: x["profit"], reverse=True)
 
     supplier_stats = []
+    purchases_by_supplier = supplier_line_purchases_by_supplier(None, date_from, date_to)
     for sup in Supplier.objects.order_by("name"):
-        balance = supplier_ap_balance(sup, today)
-        purchases = supplier_line_purchases(sup, date_from, date_to)
+        balance = ap_balances.get(sup.pk, Decimal("0.00"))
+        purchases = purchases_by_supplier.get(sup.pk, Decimal("0.00"))
         if balance == 0 and purchases == 0:
             continue
         supplier_stats.append(
@@ -197,33 +188,8 @@ def build_dashboard_analytics(request):
     ]
     chart_opex_values = [float(r["total"] or 0) for r in opex_by_cat]
 
-    ar_buckets = {"current": Decimal("0"), "b0_30": Decimal("0"), "b31_60": Decimal("0"), "b61_90": Decimal("0"), "b90": Decimal("0")}
-    today_d = today
-    for inv in SalesInvoice.objects.filter(status__in=SalesInvoice.reporting_statuses()).select_related("client"):
-        allocated = sum((a.allocated_amount for a in inv.allocations.all()), Decimal("0.00"))
-        remaining = (inv.grand_total or Decimal("0")) - allocated
-        if remaining <= 0:
-            continue
-        due = inv.due_date or inv.issue_date
-        days = (due - today_d).days
-        if days > 0:
-            ar_buckets["current"] += remaining
-        elif days >= -30:
-            ar_buckets["b0_30"] += remaining
-        elif days >= -60:
-            ar_buckets["b31_60"] += remaining
-        elif days >= -90:
-            ar_buckets["b61_90"] += remaining
-        else:
-            ar_buckets["b90"] += remaining
-    chart_ar_aging_labels = ["Not due", "0–30 days", "31–60", "61–90", "90+"]
-    chart_ar_aging_values = [
-        float(ar_buckets["current"]),
-        float(ar_buckets["b0_30"]),
-        float(ar_buckets["b31_60"]),
-        float(ar_buckets["b61_90"]),
-        float(ar_buckets["b90"]),
-    ]
+    chart_ar_aging_labels = list(AGING_BUCKET_LABELS)
+    chart_ar_aging_values = [float(ar_buckets[key]) for key in AGING_BUCKETS]
 
     return {
         "date_from": date_from,
@@ -0,0 +1,229 @@
+"""Materialized party balance ledger (PartyBalanceSnapshot).
+
+Saves that move a client's or supplier's balance mark the party dirty; the
+party's daily rows are rewritten once per committed transaction. Reads pick
+the latest row on or before the requested date.
+"""
+
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from reporting.balances import _LINE_COST_USD, _PAYMENT_AMOUNT_IS_USD, _scope
+from reporting.models import PartyBalanceLedgerState, PartyBalanceSnapshot
+from reporting.payment_amounts import usd_amount
+from sales.models import SalesInvoice, SalesInvoiceLine
+from treasury.models import Payment
+
+try:
+    from accounting_bridge.models import PartyOpeningBalance
+except ImportError:
+    PartyOpeningBalance = None
+
+ZERO = Decimal("0.00")
+
+_dirty = threading.local()
+
+
+def ledger_is_ready():
+    return PartyBalanceLedgerState.is_ready()
+
+
+def _add_grouped(moves, qs, party_field, date_field, aggregate, sign=1):
+    grouped = qs.values(party_field, date_field).order_by().annotate(t=aggregate)
+    for row in grouped:
+        moves[row[party_field]][row[date_field]] += sign * (row["t"] or ZERO)
+
+
+def _client_daily_movements(client_ids):
+    moves = defaultdict(lambda: defaultdict(lambda: ZERO))
+    invoices = _scope(
+        SalesInvoice.objects.filter(status__in=SalesInvoice.reporting_statuses()), "client_id", client_ids
+    )
+    _add_grouped(moves, invoices, "client_id", "issue_date", Sum("grand_total_usd"))
+
+    payments = _scope(
+        Payment.objects.filter(
+            party_type=Payment.PartyType.CLIENT,
+            direction=Payment.Direction.IN,
+            status=Payment.Status.POSTED,
+        ),
+        "client_id",
+        client_ids,
+    )
+    _add_grouped(moves, payments.filter(_PAYMENT_AMOUNT_IS_USD), "client_id", "date", Sum("amount"), sign=-1)
+    fx_rows = payments.exclude(_PAYMENT_AMOUNT_IS_USD).values_list(
+        "client_id", "date", "currency", "amount", "exchange_rate"
+    )
+    for client_id, day, currency, amount, rate in fx_rows:
+        moves[client_id][day] -= usd_amount(currency, amount, rate)
+
+    if PartyOpeningBalance is not None:
+        openings = _scope(
+            PartyOpeningBalance.objects.filter(party_type=PartyOpeningBalance.PartyType.CLIENT),
+            "client_id",
+            client_ids,
+        )
+        _add_grouped(moves, openings, "client_id", "as_of_date", Sum("debit_usd"))
+        _add_grouped(moves, openings, "client_id", "as_of_date", Sum("credit_usd"), sign=-1)
+    return moves
+
+
+def _supplier_daily_movements(supplier_ids):
+    moves = defaultdict(lambda: defaultdict(lambda: ZERO))
+    lines = _scope(
+        SalesInvoiceLine.objects.filter(invoice__status__in=SalesInvoice.reporting_statuses()),
+        "supplier_id",
+        supplier_ids,
+    )
+    _add_grouped(moves, lines, "supplier_id", "invoice__issue_date", _LINE_COST_USD)
+
+    payments = _scope(
+        Payment.objects.filter(
+            party_type=Payment.PartyType.SUPPLIER,
+            direction=Payment.Direction.OUT,
+            status=Payment.Status.POSTED,
+        ),
+        "supplier_id",
+        supplier_ids,
+    )
+    _add_grouped(moves, payments, "supplier_id", "date", Sum("amount"), sign=-1)
+
+    if PartyOpeningBalance is not None:
+        openings = _scope(
+            PartyOpeningBalance.objects.filter(party_type=PartyOpeningBalance.PartyType.SUPPLIER),
+            "supplier_id",
+            supplier_ids,
+        )
+        _add_grouped(moves, openings, "supplier_id", "as_of_date", Sum("credit_usd"))
+        _add_grouped(moves, openings, "supplier_id", "as_of_date", Sum("debit_usd"), sign=-1)
+    return moves
+
+
+def _rewrite(party_type, party_field, party_ids, moves):
+    _scope(PartyBalanceSnapshot.objects.filter(party_type=party_type), party_field, party_ids).delete()
+    rows = []
+    for pk, by_day in moves.items():
+        running = ZERO
+        for day in sorted(by_day):
+            running += by_day[day]
+            rows.append(
+                PartyBalanceSnapshot(
+                    party_type=party_type,
+                    date=day,
+                    movement_usd=by_day[day],
+                    balance_usd=running,
+                    **{party_field: pk},
+                )
+            )
+    PartyBalanceSnapshot.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+@transaction.atomic
+def refresh_party_ledger(client_ids=(), supplier_ids=()):
+    """Rewrite ledger rows for the given parties only."""
+    client_ids = [pk for pk in client_ids if pk]
+    supplier_ids = [pk for pk in supplier_ids if pk]
+    if client_ids:
+        _rewrite(
+            PartyBalanceSnapshot.PartyType.CLIENT, "client_id", client_ids, _client_daily_movements(client_ids)
+        )
+    if supplier_ids:
+        _rewrite(
+            PartyBalanceSnapshot.PartyType.SUPPLIER,
+            "supplier_id",
+            supplier_ids,
+            _supplier_daily_movements(supplier_ids),
+        )
+
+
+@transaction.atomic
+def rebuild_party_ledger():
+    """Rebuild every party's rows from source documents and mark the ledger ready."""
+    count = _rewrite(PartyBalanceSnapshot.PartyType.CLIENT, "client_id", None, _client_daily_movements(None))
+    count += _rewrite(PartyBalanceSnapshot.PartyType.SUPPLIER, "supplier_id", None, _supplier_daily_movements(None))
+    state = PartyBalanceLedgerState.load()
+    state.rebuilt_at = timezone.now()
+    state.save()
+    return count
+
+
+def _pending():
+    state = getattr(_dirty, "parties", None)
+    if state is None:
+        state = _dirty.parties = {"clients": set(), "suppliers": set()}
+    return state
+
+
+def mark_parties_dirty(client_ids=(), supplier_ids=()):
+    """Queue parties for a ledger refresh when the current transaction commits."""
+    client_ids = {pk for pk in client_ids if pk}
+    supplier_ids = {pk for pk in supplier_ids if pk}
+    if not client_ids and not supplier_ids:
+        return
+    state = _pending()
+    state["clients"] |= client_ids
+    state["suppliers"] |= supplier_ids
+    # Every save registers a callback; the first one to run drains the set and the rest no-op.
+    # Ids left behind by a rolled-back transaction are picked up by the next commit.
+    transaction.on_commit(flush_dirty_parties)
+
+
+def flush_dirty_parties():
+    state = _pending()
+    clients, suppliers = state["clients"], state["suppliers"]
+    if not clients and not suppliers:
+        return
+    state["clients"], state["suppliers"] = set(), set()
+    if not ledger_is_ready():
+        return
+    refresh_party_ledger(clients, suppliers)
+
+
+def _latest_balances(party_type, party_field, party_ids, on_or_before):
+    latest_day = (
+        PartyBalanceSnapshot.objects.filter(
+            party_type=party_type,
+            date__lte=on_or_before,
+            **{party_field: OuterRef(party_field)},
+        )
+        .order_by("-date")
+        .values("date")[:1]
+    )
+    snaps = _scope(
+        PartyBalanceSnapshot.objects.filter(party_type=party_type, date__lte=on_or_before),
+        party_field,
+        party_ids,
+    ).filter(date=Subquery(latest_day))
+    return dict(snaps.values_list(party_field, "balance_usd"))
+
+
+def _latest_balance(party_type, party_field, pk, on_or_before):
+    balance = (
+        PartyBalanceSnapshot.objects.filter(party_type=party_type, date__lte=on_or_before, **{party_field: pk})
+        .order_by("-date")
+        .values_list("balance_usd", flat=True)
+        .first()
+    )
+    return ZERO if balance is None else balance
+
+
+def ledger_client_balances(client_ids, on_or_before):
+    return _latest_balances(PartyBalanceSnapshot.PartyType.CLIENT, "client_id", client_ids, on_or_before)
+
+
+def ledger_supplier_balances(supplier_ids, on_or_before):
+    return _latest_balances(PartyBalanceSnapshot.PartyType.SUPPLIER, "supplier_id", supplier_ids, on_or_before)
+
+
+def ledger_client_balance(client_id, on_or_before):
+    return _latest_balance(PartyBalanceSnapshot.PartyType.CLIENT, "client_id", client_id, on_or_before)
+
+
+def ledger_supplier_balance(supplier_id, on_or_before):
+    return _latest_balance(PartyBalanceSnapshot.PartyType.SUPPLIER, "supplier_id", supplier_id, on_or_before)
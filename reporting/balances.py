@@ -1,76 +1,183 @@
+from collections import defaultdict
 from decimal import Decimal
 
-from django.db.models import Sum
+from django.db.models import DecimalField, F, Q, Sum
 
-from reporting.payment_amounts import payment_usd_amount
+from reporting.payment_amounts import usd_amount
 from sales.models import SalesInvoice, SalesInvoiceLine
 from treasury.models import Payment
 
 try:
-    from accounting_bridge.opening_balances import client_opening_balance_usd, supplier_opening_balance_usd
+    from accounting_bridge.opening_balances import client_opening_balances_usd, supplier_opening_balances_usd
 except ImportError:
-    client_opening_balance_usd = None
-    supplier_opening_balance_usd = None
+    client_opening_balances_usd = None
+    supplier_opening_balances_usd = None
 
+ZERO = Decimal("0.00")
 
-def _client_payments_qs(client, date_from=None, date_to=None, on_or_before=None):
-    from reporting.client_statement_rows import _client_payments_qs as qs_fn
+# Payments whose stored amount is already the USD figure (see payment_amounts.usd_amount).
+_PAYMENT_AMOUNT_IS_USD = Q(currency="USD") | Q(exchange_rate__isnull=True) | Q(exchange_rate__lte=0)
 
-    qs = qs_fn(client, date_from=date_from, date_to=date_to)
-    if on_or_before is not None:
-        qs = qs.filter(date__lte=on_or_before)
-    return qs
+_LINE_COST_USD = Sum(
+    F("qty") * F("cost_price_usd"),
+    output_field=DecimalField(max_digits=24, decimal_places=6),
+)
+
+
+def _scope(qs, party_field, party_ids):
+    """Restrict qs to the given party ids (None = every row that has a party)."""
+    if party_ids is None:
+        return qs.filter(**{f"{party_field}__isnull": False})
+    return qs.filter(**{f"{party_field}__in": party_ids})
+
+
+def _sum_by(qs, party_field, aggregate):
+    grouped = qs.values(party_field).order_by().annotate(t=aggregate)
+    return {row[party_field]: row["t"] or ZERO for row in grouped}
+
+
+def _ids(party_ids):
+    return None if party_ids is None else list(party_ids)
 
 
-def _supplier_payments_qs(supplier, date_from=None, date_to=None, on_or_before=None):
-    from reporting.supplier_statement_rows import _supplier_payments_qs as qs_fn
+def client_payments_usd_by_client(client_ids=None, on_or_before=None, *, on_or_after=None):
+    """Posted client receipts in USD per client id.
 
-    qs = qs_fn(supplier, date_from=date_from, date_to=date_to)
+    USD (and unconverted) receipts are summed in SQL; converted receipts are
+    fetched as bare columns so each one is rounded exactly like payment_usd_amount.
+    """
+    qs = _scope(
+        Payment.objects.filter(
+            party_type=Payment.PartyType.CLIENT,
+            direction=Payment.Direction.IN,
+            status=Payment.Status.POSTED,
+        ),
+        "client_id",
+        client_ids,
+    )
+    if on_or_after is not None:
+        qs = qs.filter(date__gte=on_or_after)
     if on_or_before is not None:
         qs = qs.filter(date__lte=on_or_before)
-    return qs
+    totals = defaultdict(lambda: ZERO, _sum_by(qs.filter(_PAYMENT_AMOUNT_IS_USD), "client_id", Sum("amount")))
+    fx_rows = qs.exclude(_PAYMENT_AMOUNT_IS_USD).values_list("client_id", "currency", "amount", "exchange_rate")
+    for client_id, currency, amount, rate in fx_rows:
+        totals[client_id] += usd_amount(currency, amount, rate)
+    return dict(totals)
 
 
-def client_ar_balance(client, on_or_before):
+def client_ar_balances(client_ids=None, on_or_before=None, *, use_ledger=True):
+    """AR balance (opening + invoices − receipts, USD) for many clients in a fixed number of queries.
+
+    client_ids: iterable of Client pks, or None for every client. Returns {client_id: Decimal};
+    clients without any activity are omitted (treat as zero). Reads the materialized
+    ledger once it has been built; use_ledger=False forces the aggregate path.
+    """
     if on_or_before is None:
-        return Decimal("0.00")
-    inv = (
-        SalesInvoice.objects.filter(
-            client=client,
-            status__in=SalesInvoice.reporting_statuses(),
-            issue_date__lte=on_or_before,
-        ).aggregate(t=Sum("grand_total_usd"))["t"]
-        or Decimal("0.00")
-    )
-    payments = sum(
-        (payment_usd_amount(p) for p in _client_payments_qs(client, on_or_before=on_or_before)),
-        Decimal("0.00"),
+        return {}
+    client_ids = _ids(client_ids)
+    if use_ledger:
+        from reporting.balance_ledger import ledger_client_balances, ledger_is_ready
+
+        if ledger_is_ready():
+            return ledger_client_balances(client_ids, on_or_before)
+    invoices = _sum_by(
+        _scope(
+            SalesInvoice.objects.filter(
+                status__in=SalesInvoice.reporting_statuses(),
+                issue_date__lte=on_or_before,
+            ),
+            "client_id",
+            client_ids,
+        ),
+        "client_id",
+        Sum("grand_total_usd"),
     )
-    opening = client_opening_balance_usd(client, on_or_before=on_or_before) if client_opening_balance_usd else Decimal("0.00")
-    return opening + inv - payments
+    payments = client_payments_usd_by_client(client_ids, on_or_before=on_or_before)
+    openings = client_opening_balances_usd(client_ids, on_or_before=on_or_before) if client_opening_balances_usd else {}
+    balances = {}
+    for pk in set(invoices) | set(payments) | set(openings):
+        balances[pk] = openings.get(pk, ZERO) + invoices.get(pk, ZERO) - payments.get(pk, ZERO)
+    return balances
 
 
-def supplier_ap_balance(supplier, on_or_before):
+def supplier_ap_balances(supplier_ids=None, on_or_before=None, *, use_ledger=True):
+    """AP balance (opening + line costs − payments, USD) for many suppliers in a fixed number of queries.
+
+    supplier_ids: iterable of Supplier pks, or None for every supplier. Returns {supplier_id: Decimal}.
+    """
     if on_or_before is None:
-        return Decimal("0.00")
-    lines = SalesInvoiceLine.objects.filter(
-        supplier=supplier,
-        invoice__status__in=SalesInvoice.reporting_statuses(),
-        invoice__issue_date__lte=on_or_before,
+        return {}
+    supplier_ids = _ids(supplier_ids)
+    if use_ledger:
+        from reporting.balance_ledger import ledger_is_ready, ledger_supplier_balances
+
+        if ledger_is_ready():
+            return ledger_supplier_balances(supplier_ids, on_or_before)
+    costs = _sum_by(
+        _scope(
+            SalesInvoiceLine.objects.filter(
+                invoice__status__in=SalesInvoice.reporting_statuses(),
+                invoice__issue_date__lte=on_or_before,
+            ),
+            "supplier_id",
+            supplier_ids,
+        ),
+        "supplier_id",
+        _LINE_COST_USD,
+    )
+    payments = _sum_by(
+        _scope(
+            Payment.objects.filter(
+                party_type=Payment.PartyType.SUPPLIER,
+                direction=Payment.Direction.OUT,
+                status=Payment.Status.POSTED,
+                date__lte=on_or_before,
+            ),
+            "supplier_id",
+            supplier_ids,
+        ),
+        "supplier_id",
+        Sum("amount"),
     )
-    costs = sum((line.line_cost_amount_usd() for line in lines), Decimal("0.00"))
-    payments = sum((p.amount for p in _supplier_payments_qs(supplier, on_or_before=on_or_before)), Decimal("0.00"))
-    opening = supplier_opening_balance_usd(supplier, on_or_before=on_or_before) if supplier_opening_balance_usd else Decimal("0.00")
-    return opening + costs - payments
+    openings = (
+        supplier_opening_balances_usd(supplier_ids, on_or_before=on_or_before) if supplier_opening_balances_usd else {}
+    )
+    balances = {}
+    for pk in set(costs) | set(payments) | set(openings):
+        balances[pk] = openings.get(pk, ZERO) + costs.get(pk, ZERO) - payments.get(pk, ZERO)
+    return balances
 
 
-def supplier_line_purchases(supplier, date_from=None, date_to=None):
-    lines = SalesInvoiceLine.objects.filter(
-        supplier=supplier,
-        invoice__status__in=SalesInvoice.reporting_statuses(),
+def supplier_line_purchases_by_supplier(supplier_ids=None, date_from=None, date_to=None):
+    """Line cost (USD) per supplier id for lines whose service date falls in the range."""
+    lines = _scope(
+        SalesInvoiceLine.objects.filter(invoice__status__in=SalesInvoice.reporting_statuses()),
+        "supplier_id",
+        _ids(supplier_ids),
     )
     if date_from:
         lines = lines.filter(service_date__gte=date_from)
     if date_to:
         lines = lines.filter(service_date__lte=date_to)
-    return sum((line.line_cost_amount_usd() for line in lines), Decimal("0.00"))
+    return _sum_by(lines, "supplier_id", _LINE_COST_USD)
+
+
+def client_ar_balance(client, on_or_before):
+    from reporting.balance_ledger import ledger_client_balance, ledger_is_ready
+
+    if on_or_before is not None and ledger_is_ready():
+        return ledger_client_balance(client.pk, on_or_before)
+    return client_ar_balances([client.pk], on_or_before, use_ledger=False).get(client.pk, ZERO)
+
+
+def supplier_ap_balance(supplier, on_or_before):
+    from reporting.balance_ledger import ledger_is_ready, ledger_supplier_balance
+
+    if on_or_before is not None and ledger_is_ready():
+        return ledger_supplier_balance(supplier.pk, on_or_before)
+    return supplier_ap_balances([supplier.pk], on_or_before, use_ledger=False).get(supplier.pk, ZERO)
+
+
+def supplier_line_purchases(supplier, date_from=None, date_to=None):
+    return supplier_line_purchases_by_supplier([supplier.pk], date_from, date_to).get(supplier.pk, ZERO)
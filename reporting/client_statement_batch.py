@@ -0,0 +1,234 @@
+"""
+Client statements for many clients at once.
+
+iter_client_statements yields each client's statement rows (the same rows as
+build_client_statement_rows) from three queries per chunk of clients;
+client_period_totals returns the period debit/credit, invoice count and latest
+invoice currency per client from a fixed number of grouped queries, for the
+all-clients statement, the clients trial balance and other summaries.
+"""
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+
+from reporting.balances import client_payments_usd_by_client
+from reporting.payment_amounts import payment_usd_amount, usd_amount
+from reporting.statement_refs import invoice_ref_url, invoice_statement_ref, payment_ref_url
+from reporting.statement_sort import sort_statement_rows
+from sales.models import SalesInvoice, SalesInvoiceLine
+from treasury.models import Payment
+
+try:
+    from accounting_bridge.opening_balances import client_opening_balances_dr_cr
+except ImportError:
+    client_opening_balances_dr_cr = None
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+# Clients whose rows are loaded together by iter_client_statements.
+CHUNK_SIZE = 500
+
+
+@dataclass
+class ClientPeriodTotals:
+    debit: Decimal = ZERO
+    credit: Decimal = ZERO
+    invoice_count: int = 0
+    currency: str = "USD"
+
+
+def dated_in_period(field, date_from=None, date_to=None):
+    """Dates in the range; rows without a date are always kept (as on the per-client statement)."""
+    q = Q()
+    if date_from:
+        q &= Q(**{f"{field}__gte": date_from})
+    if date_to:
+        q &= Q(**{f"{field}__lte": date_to})
+    return q | Q(**{f"{field}__isnull": True}) if q else q
+
+
+def statement_lines(client_ids, date_from=None, date_to=None):
+    return (
+        SalesInvoiceLine.objects.filter(
+            invoice__client_id__in=client_ids,
+            invoice__status__in=SalesInvoice.reporting_statuses(),
+        )
+        .annotate(line_date=Coalesce("service_date", "invoice__issue_date"))
+        .filter(dated_in_period("line_date", date_from, date_to))
+    )
+
+
+def statement_payments(client_ids, date_from=None, date_to=None):
+    qs = Payment.objects.filter(
+        client_id__in=client_ids,
+        party_type=Payment.PartyType.CLIENT,
+        direction=Payment.Direction.IN,
+        status=Payment.Status.POSTED,
+    )
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
+
+
+def statement_openings(client_ids, date_from=None, date_to=None):
+    """Opening (debit, credit) per client for statements that start at date_from."""
+    if not (client_opening_balances_dr_cr and date_from):
+        return {}
+    # Openings effective on or before the period end, as on the per-client statement.
+    return client_opening_balances_dr_cr(client_ids, on_or_before=date_to)
+
+
+def _selling_amount(qty, sell_price_usd, discount_usd):
+    return ((qty or Decimal("0")) * (sell_price_usd or Decimal("0")) - (discount_usd or Decimal("0"))).quantize(CENT)
+
+
+def statement_amounts(client_id, date_from=None, date_to=None):
+    """((date, seq, id), debit, credit) per line and payment of one client's statement, in statement order.
+
+    Reads bare columns only (no row dicts), for running-balance scans.
+    """
+    lines = (
+        statement_lines([client_id], date_from, date_to)
+        .order_by("line_date", "invoice__created_at", "id")
+        .values_list("line_date", "invoice__created_at", "id", "qty", "sell_price_usd", "line_discount_usd")
+    )
+    payments = (
+        statement_payments([client_id], date_from, date_to)
+        .order_by("date", "created_at", "id")
+        .values_list("date", "created_at", "id", "currency", "amount", "exchange_rate")
+    )
+    return heapq.merge(
+        (((d, seq, pk), _selling_amount(qty, price, discount), ZERO) for d, seq, pk, qty, price, discount in lines.iterator()),
+        (((d, seq, pk), ZERO, usd_amount(currency, amount, rate)) for d, seq, pk, currency, amount, rate in payments.iterator()),
+        key=lambda entry: entry[0],
+    )
+
+
+def opening_row(date_from, debit, credit):
+    return {
+        "date": date_from,
+        "type": "Opening balance",
+        "description": "Balance brought forward",
+        "destination": "—",
+        "ref": "OPEN",
+        "ref_url": None,
+        "debit": debit,
+        "credit": credit,
+        "sort_seq": None,
+        "sort_id": "opening",
+        "is_pending": False,
+    }
+
+
+def line_row(line, today):
+    inv = line.invoice
+    line_date = line.effective_service_date()
+    st = line.service_type
+    if not st and line.service_instance_id and line.service_instance:
+        st = line.service_instance.service_type
+    return {
+        "date": line_date,
+        "type": st.name if st else "Service",
+        "description": line.statement_line_details(),
+        "destination": line.destination.name if line.destination_id else "—",
+        "ref": invoice_statement_ref(inv),
+        "ref_url": invoice_ref_url(inv.id),
+        "debit": line.line_selling_amount_usd().quantize(CENT),
+        "credit": ZERO,
+        "sort_seq": inv.created_at,
+        "sort_id": str(line.id),
+        "is_pending": bool(line_date and line_date > today),
+    }
+
+
+def payment_statement_description(payment: Payment) -> str:
+    ref_no = (payment.reference or "").strip() or "—"
+    account = payment.money_account.name if payment.money_account_id else "—"
+    return f"{ref_no} - {account}"
+
+
+def payment_row(pay):
+    return {
+        "date": pay.date,
+        "type": "Payment",
+        "description": payment_statement_description(pay),
+        "destination": "—",
+        "ref": pay.receipt_no,
+        "ref_url": payment_ref_url(pay.id),
+        "debit": ZERO,
+        "credit": payment_usd_amount(pay),
+        "sort_seq": pay.created_at,
+        "sort_id": str(pay.id),
+        "is_pending": False,
+    }
+
+
+def _chunk_rows(clients, date_from, date_to, today):
+    ids = [c.pk for c in clients]
+    rows = defaultdict(list)
+    for client_id, (debit, credit) in statement_openings(ids, date_from, date_to).items():
+        if debit or credit:
+            rows[client_id].append(opening_row(date_from, debit, credit))
+    lines = statement_lines(ids, date_from, date_to).select_related(
+        "invoice", "service_type", "destination", "service_instance__service_type"
+    )
+    for line in lines:
+        rows[line.invoice.client_id].append(line_row(line, today))
+    for pay in statement_payments(ids, date_from, date_to).select_related("money_account"):
+        rows[pay.client_id].append(payment_row(pay))
+    for client in clients:
+        yield client, sort_statement_rows(rows.pop(client.pk, []))
+
+
+def iter_client_statements(clients, date_from=None, date_to=None, *, chunk_size=CHUNK_SIZE):
+    """Yield (client, rows) in the given order; rows are oldest first, without running balances."""
+    today = date.today()
+    chunk = []
+    for client in clients:
+        chunk.append(client)
+        if len(chunk) >= chunk_size:
+            yield from _chunk_rows(chunk, date_from, date_to, today)
+            chunk = []
+    if chunk:
+        yield from _chunk_rows(chunk, date_from, date_to, today)
+
+
+def client_period_totals(client_ids, date_from=None, date_to=None):
+    """{client_id: ClientPeriodTotals} for the statement period; clients without activity are omitted.
+
+    debit/credit equal the column totals of each client's statement (opening row
+    included); invoice_count and currency cover invoices issued in the period.
+    """
+    client_ids = list(client_ids)
+    totals = defaultdict(ClientPeriodTotals)
+    for client_id, (debit, credit) in statement_openings(client_ids, date_from, date_to).items():
+        totals[client_id].debit += debit
+        totals[client_id].credit += credit
+    # Bare columns, so each line is rounded exactly like its statement row.
+    lines = statement_lines(client_ids, date_from, date_to).values_list(
+        "invoice__client_id", "qty", "sell_price_usd", "line_discount_usd"
+    )
+    for client_id, qty, price, discount in lines:
+        totals[client_id].debit += _selling_amount(qty, price, discount)
+    payments = client_payments_usd_by_client(client_ids, on_or_before=date_to, on_or_after=date_from)
+    for client_id, amount in payments.items():
+        totals[client_id].credit += amount
+    invoices = SalesInvoice.objects.filter(client_id__in=client_ids, status__in=SalesInvoice.reporting_statuses())
+    if date_from:
+        invoices = invoices.filter(issue_date__gte=date_from)
+    if date_to:
+        invoices = invoices.filter(issue_date__lte=date_to)
+    for client_id, currency in invoices.order_by("client_id", "-issue_date").values_list("client_id", "currency"):
+        entry = totals[client_id]
+        if not entry.invoice_count:
+            entry.currency = currency or "USD"
+        entry.invoice_count += 1
+    return dict(totals)
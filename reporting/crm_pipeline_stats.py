@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
-from django.db.models import Count
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
 
 from display.models import Lead
 from tasks.models import LeadTask
@@ -50,8 +52,20 @@ def build_crm_pipeline_stats(date_from=None, date_to=None, *, sales_employee_id=
     ]
     chart_order_status_values = [row['c'] for row in order_status_rows]
 
+    order_counts = orders_qs.aggregate(
+        total_count=Count('id'),
+        active_count=Count('id', filter=~Q(status__in=['done', 'cancelled'])),
+        done_count=Count('id', filter=Q(status='done')),
+        cancelled_count=Count('id', filter=Q(status='cancelled')),
+    )
+
     lead_ids = orders_qs.values_list('lead_id', flat=True).distinct()
     leads_qs = Lead.objects.filter(pk__in=lead_ids)
+    lead_totals = leads_qs.aggregate(
+        leads_count=Count('id'),
+        selling_total=Sum('selling_price_amount'),
+        profit_total=Sum('profit_amount'),
+    )
     lead_status_rows = list(
         leads_qs.values('status').annotate(c=Count('id')).order_by('-c')
     )
@@ -70,11 +84,13 @@ def build_crm_pipeline_stats(date_from=None, date_to=None, *, sales_employee_id=
         synced_invoices = synced_qs.count()
 
     return {
-        'crm_orders_total': orders_qs.count(),
-        'crm_orders_active': orders_qs.exclude(status__in=['done', 'cancelled']).count(),
-        'crm_orders_done': orders_qs.filter(status='done').count(),
-        'crm_orders_cancelled': orders_qs.filter(status='cancelled').count(),
-        'crm_leads_with_orders': leads_qs.count(),
+        'crm_orders_total': order_counts['total_count'],
+        'crm_orders_active': order_counts['active_count'],
+        'crm_orders_done': order_counts['done_count'],
+        'crm_orders_cancelled': order_counts['cancelled_count'],
+        'crm_leads_with_orders': lead_totals['leads_count'],
+        'crm_orders_selling': lead_totals['selling_total'] or Decimal('0.00'),
+        'crm_orders_profit': lead_totals['profit_total'] or Decimal('0.00'),
         'crm_synced_invoices': synced_invoices,
         'chart_order_status_labels': chart_order_status_labels,
         'chart_order_status_values': chart_order_status_values,
@@ -0,0 +1,107 @@
+"""Versioned result cache for the accounting dashboard builders.
+
+Each builder result is stored under its filters plus a per-scope version
+number. Writes to the models a scope depends on bump that version (see
+reporting.signals), which orphans every cached entry at once; orphans expire
+through DASHBOARD_CACHE_TIMEOUT.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+ACCOUNTING_SCOPE = 'accounting'
+CRM_SCOPE = 'crm'
+
+_MISSING = object()
+_STATS_KEYS = ('hits', 'misses')
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 600)
+
+
+def _version_key(scope):
+    return f'dashboard:version:{scope}'
+
+
+def _seed_version():
+    # Milliseconds, not 1: if the counter is evicted, a reseeded one must not
+    # collide with versions that still have live entries.
+    return int(time.time() * 1000)
+
+
+def current_version(scope):
+    cache = _cache()
+    version = cache.get(_version_key(scope))
+    if version is None:
+        cache.add(_version_key(scope), _seed_version(), timeout=None)
+        version = cache.get(_version_key(scope)) or 0
+    return version
+
+
+def bump_version(scope):
+    cache = _cache()
+    try:
+        cache.incr(_version_key(scope))
+    except ValueError:
+        cache.set(_version_key(scope), _seed_version(), timeout=None)
+
+
+def bump_version_on_commit(scope):
+    transaction.on_commit(lambda: bump_version(scope))
+
+
+def cache_is_process_local():
+    """True when caching is on but entries live in this process's memory.
+
+    Version bumps from another process (a second web worker, invoice_sync_worker)
+    then never reach this one, so its cached sections stay stale until they expire.
+    """
+    return bool(_timeout()) and isinstance(_cache(), LocMemCache)
+
+
+def _count(stat):
+    cache = _cache()
+    key = f'dashboard:stats:{stat}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def dashboard_cache_stats():
+    """Hit/miss counters shared by every process using the cache backend."""
+    cache = _cache()
+    return {stat: cache.get(f'dashboard:stats:{stat}') or 0 for stat in _STATS_KEYS}
+
+
+def reset_dashboard_cache_stats():
+    _cache().delete_many([f'dashboard:stats:{stat}' for stat in _STATS_KEYS])
+
+
+def cached_section(name, scope, key_parts, build):
+    """Return build() for these filters, reusing a cached result while the scope is unchanged."""
+    timeout = _timeout()
+    if not timeout:
+        return build()
+    digest = hashlib.md5(repr(tuple(key_parts)).encode('utf-8')).hexdigest()
+    key = f'dashboard:{name}:{current_version(scope)}:{digest}'
+    cache = _cache()
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count('hits')
+        return value
+    _count('misses')
+    value = build()
+    cache.set(key, value, timeout=timeout)
+    return value
@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reporting.balance_ledger import ledger_client_balances, ledger_supplier_balances, rebuild_party_ledger
+from reporting.balances import client_ar_balances, supplier_ap_balances
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the materialized client/supplier balance ledger from invoices, payments and "
+        "opening balances, and optionally verify it against the aggregate (slow) path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Compare ledger balances with freshly aggregated balances after rebuilding.",
+        )
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Skip the rebuild and only compare the current ledger.",
+        )
+        parser.add_argument(
+            "--as-of",
+            default="",
+            help="Balance date to verify (YYYY-MM-DD, default today).",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            count = rebuild_party_ledger()
+            self.stdout.write(self.style.SUCCESS(f"Ledger rebuilt: {count} daily row(s)."))
+        if not (options["verify"] or options["verify_only"]):
+            return
+
+        as_of = date.fromisoformat(options["as_of"]) if options["as_of"] else date.today()
+        mismatches = self._compare(
+            "Client",
+            ledger_client_balances(None, as_of),
+            client_ar_balances(None, as_of, use_ledger=False),
+        )
+        mismatches += self._compare(
+            "Supplier",
+            ledger_supplier_balances(None, as_of),
+            supplier_ap_balances(None, as_of, use_ledger=False),
+        )
+        if mismatches:
+            raise CommandError(f"{mismatches} balance(s) differ from the aggregate path as of {as_of}.")
+        self.stdout.write(self.style.SUCCESS(f"Ledger matches aggregated balances as of {as_of}."))
+
+    def _compare(self, label, ledger, expected):
+        mismatches = 0
+        for pk in sorted(set(ledger) | set(expected), key=str):
+            got = ledger.get(pk, 0)
+            want = expected.get(pk, 0)
+            if got != want:
+                mismatches += 1
+                self.stderr.write(self.style.ERROR(f"{label} {pk}: ledger {got} ≠ aggregated {want}"))
+        return mismatches
@@ -9,7 +9,7 @@ class ReportDateDefaultsMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        if request.method == "GET" and request.GET.get("format") not in ("pdf", "xlsx"):
+        if request.method == "GET" and request.GET.get("format") not in ("pdf", "xlsx", "csv"):
             path = request.path.rstrip("/") or "/"
             if path == "/" or path.startswith("/reporting"):
                 has_dates = request.GET.get("date_from") or request.GET.get("date_to")
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.2 on 2026-10-17 18:06
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts_core', '0014_employee_salary_payroll'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartyBalanceLedgerState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Party balance ledger state',
+            },
+        ),
+        migrations.CreateModel(
+            name='PartyBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('party_type', models.CharField(choices=[('CLIENT', 'Client'), ('SUPPLIER', 'Supplier')], max_length=10)),
+                ('date', models.DateField()),
+                ('movement_usd', models.DecimalField(decimal_places=6, default=Decimal('0.00'), max_digits=20)),
+                ('balance_usd', models.DecimalField(decimal_places=6, default=Decimal('0.00'), max_digits=20)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='accounts_core.client')),
+                ('supplier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='accounts_core.supplier')),
+            ],
+            options={
+                'ordering': ['party_type', 'date'],
+                'indexes': [models.Index(fields=['party_type', 'client', 'date'], name='party_snap_client_date'), models.Index(fields=['party_type', 'supplier', 'date'], name='party_snap_supplier_date')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='partybalancesnapshot',
+            constraint=models.UniqueConstraint(fields=('client', 'date'), name='uniq_client_balance_snapshot_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='partybalancesnapshot',
+            constraint=models.UniqueConstraint(fields=('supplier', 'date'), name='uniq_supplier_balance_snapshot_day'),
+        ),
+    ]
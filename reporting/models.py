@@ -1,3 +1,68 @@
+from decimal import Decimal
+
 from django.db import models
 
-# Create your models here.
+
+class PartyBalanceSnapshot(models.Model):
+    """Materialized AR/AP ledger: one row per party per day with activity.
+
+    movement_usd is the net change on that day; balance_usd is the closing
+    balance after it, so the balance on any date is the latest row on or
+    before that date. Rows are rewritten per party by reporting.balance_ledger.
+    """
+
+    class PartyType(models.TextChoices):
+        CLIENT = 'CLIENT', 'Client'
+        SUPPLIER = 'SUPPLIER', 'Supplier'
+
+    party_type = models.CharField(max_length=10, choices=PartyType.choices)
+    client = models.ForeignKey(
+        'accounts_core.Client', null=True, blank=True, on_delete=models.CASCADE, related_name='balance_snapshots'
+    )
+    supplier = models.ForeignKey(
+        'accounts_core.Supplier', null=True, blank=True, on_delete=models.CASCADE, related_name='balance_snapshots'
+    )
+    date = models.DateField()
+    movement_usd = models.DecimalField(max_digits=20, decimal_places=6, default=Decimal('0.00'))
+    balance_usd = models.DecimalField(max_digits=20, decimal_places=6, default=Decimal('0.00'))
+
+    class Meta:
+        ordering = ['party_type', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['client', 'date'], name='uniq_client_balance_snapshot_day'),
+            models.UniqueConstraint(fields=['supplier', 'date'], name='uniq_supplier_balance_snapshot_day'),
+        ]
+        indexes = [
+            models.Index(fields=['party_type', 'client', 'date'], name='party_snap_client_date'),
+            models.Index(fields=['party_type', 'supplier', 'date'], name='party_snap_supplier_date'),
+        ]
+
+    def __str__(self):
+        party = self.client_id or self.supplier_id
+        return f'{self.party_type} {party} @ {self.date}: {self.balance_usd}'
+
+
+class PartyBalanceLedgerState(models.Model):
+    """Singleton marking whether the snapshot ledger has been fully built."""
+
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Party balance ledger state'
+
+    def __str__(self):
+        return 'Party balance ledger state'
+
+    @classmethod
+    def load(cls):
+        row, _ = cls.objects.get_or_create(pk=1)
+        return row
+
+    @classmethod
+    def is_ready(cls):
+        return cls.objects.filter(pk=1, rebuilt_at__isnull=False).exists()
+
+    def save(self, *args, **kwargs):
+        self.pk = 1
+        super().save(*args, **kwargs)
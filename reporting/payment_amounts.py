@@ -3,11 +3,15 @@ from decimal import Decimal
 from treasury.models import Payment
 
 
+def usd_amount(currency, amount, exchange_rate) -> Decimal:
+    """USD equivalent from raw payment columns (shared by per-row and bulk paths)."""
+    if currency == "USD":
+        return amount
+    if exchange_rate is not None and exchange_rate > 0:
+        return (amount * exchange_rate).quantize(Decimal("0.01"))
+    return amount
+
+
 def payment_usd_amount(payment: Payment) -> Decimal:
     """USD equivalent for statements and AR/AP balances (matches invoice USD logic)."""
-    if payment.currency == "USD":
-        return payment.amount
-    rate = payment.exchange_rate
-    if rate is not None and rate > 0:
-        return (payment.amount * rate).quantize(Decimal("0.01"))
-    return payment.amount
+    return usd_amount(payment.currency, payment.amount, payment.exchange_rate)
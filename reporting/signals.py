@@ -0,0 +1,119 @@
+"""Keep derived reporting data current: the party balance ledger and dashboard cache versions."""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounting_bridge.models import InvoiceSyncQueue, PartyOpeningBalance
+from display.models import Lead
+from expenses.models import OperatingExpense
+from purchases.models import SupplierBill, SupplierBillLine
+from reporting.balance_ledger import mark_parties_dirty
+from reporting.dashboard_cache import ACCOUNTING_SCOPE, CRM_SCOPE, bump_version_on_commit
+from sales.models import SalesInvoice, SalesInvoiceLine
+from tasks.models import LeadTask
+from treasury.models import APAllocation, ARAllocation, Payment
+
+
+def _remember_parties(sender, instance, **kwargs):
+    """Make sure the pre-save snapshot exists before the row is written.
+
+    Rows loaded from the DB already carry it (TrackedFieldsMixin); only hand-built
+    instances of existing rows are read here, once.
+    """
+    if not instance._state.adding:
+        instance.tracked_original()
+
+
+def _original(instance, created):
+    return None if created else instance.tracked_original()
+
+
+def _parties(instance, original, field):
+    """Current and saved party ids, so a party change refreshes the old party too."""
+    return {getattr(instance, field), getattr(original, field, None)}
+
+
+@receiver(post_save, sender=SalesInvoice)
+def _invoice_moves_balances(sender, instance, created, **kwargs):
+    original = _original(instance, created)
+    # Status and issue date also decide which line costs count toward supplier balances.
+    supplier_ids = ()
+    if original is not None and (original.status, original.issue_date) != (instance.status, instance.issue_date):
+        supplier_ids = set(instance.lines.values_list('supplier_id', flat=True))
+    mark_parties_dirty(client_ids=_parties(instance, original, 'client_id'), supplier_ids=supplier_ids)
+
+
+@receiver(post_delete, sender=SalesInvoice)
+def _invoice_deleted(sender, instance, **kwargs):
+    mark_parties_dirty(client_ids=[instance.client_id])
+
+
+@receiver(post_save, sender=SalesInvoiceLine)
+def _line_moves_balances(sender, instance, created, **kwargs):
+    mark_parties_dirty(supplier_ids=_parties(instance, _original(instance, created), 'supplier_id'))
+
+
+@receiver(post_delete, sender=SalesInvoiceLine)
+def _line_deleted(sender, instance, **kwargs):
+    mark_parties_dirty(supplier_ids=[instance.supplier_id])
+
+
+@receiver(post_save, sender=Payment)
+def _payment_moves_balances(sender, instance, created, **kwargs):
+    original = _original(instance, created)
+    mark_parties_dirty(
+        client_ids=_parties(instance, original, 'client_id'),
+        supplier_ids=_parties(instance, original, 'supplier_id'),
+    )
+
+
+@receiver(post_delete, sender=Payment)
+def _payment_deleted(sender, instance, **kwargs):
+    mark_parties_dirty(client_ids=[instance.client_id], supplier_ids=[instance.supplier_id])
+
+
+@receiver(post_save, sender=PartyOpeningBalance)
+def _opening_moves_balances(sender, instance, created, **kwargs):
+    original = _original(instance, created)
+    mark_parties_dirty(
+        client_ids=_parties(instance, original, 'client_id'),
+        supplier_ids=_parties(instance, original, 'supplier_id'),
+    )
+
+
+@receiver(post_delete, sender=PartyOpeningBalance)
+def _opening_deleted(sender, instance, **kwargs):
+    mark_parties_dirty(client_ids=[instance.client_id], supplier_ids=[instance.supplier_id])
+
+
+for _model in (SalesInvoice, SalesInvoiceLine, Payment, PartyOpeningBalance):
+    pre_save.connect(_remember_parties, sender=_model, dispatch_uid=f'ledger_remember_{_model.__name__}')
+
+_ACCOUNTING_DASHBOARD_MODELS = (
+    SalesInvoice,
+    SalesInvoiceLine,
+    Payment,
+    ARAllocation,
+    APAllocation,
+    SupplierBill,
+    SupplierBillLine,
+    OperatingExpense,
+    PartyOpeningBalance,
+)
+_CRM_DASHBOARD_MODELS = (Lead, LeadTask, InvoiceSyncQueue)
+
+
+def _invalidate_accounting_dashboard(sender, **kwargs):
+    bump_version_on_commit(ACCOUNTING_SCOPE)
+
+
+def _invalidate_crm_dashboard(sender, **kwargs):
+    bump_version_on_commit(CRM_SCOPE)
+
+
+for _model in _ACCOUNTING_DASHBOARD_MODELS:
+    post_save.connect(_invalidate_accounting_dashboard, sender=_model, dispatch_uid=f'dashboard_cache_save_{_model.__name__}')
+    post_delete.connect(_invalidate_accounting_dashboard, sender=_model, dispatch_uid=f'dashboard_cache_delete_{_model.__name__}')
+for _model in _CRM_DASHBOARD_MODELS:
+    post_save.connect(_invalidate_crm_dashboard, sender=_model, dispatch_uid=f'dashboard_cache_save_{_model.__name__}')
+    post_delete.connect(_invalidate_crm_dashboard, sender=_model, dispatch_uid=f'dashboard_cache_delete_{_model.__name__}')
@@ -0,0 +1,154 @@
+"""
+Paginated single-party statements.
+
+A checkpoint scan walks the statement's amounts (bare columns, no row dicts)
+once and records the totals and the last entry key at every page boundary.
+Page K then only builds its own rows: statement_stream resumes after the
+checkpoint's key and the running balance starts from the checkpoint's
+carried-forward figures.
+
+The scan is read fresh on every request, just before the page rows. A cached
+scan would go stale when another process writes (other web workers,
+invoice_sync_worker), and its page boundaries and totals would then disagree
+with the rows shown.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import chain, islice
+
+from django.conf import settings
+
+from reporting.statement_running import StatementTotals, with_running_balance
+from reporting.statement_stream import CLIENT, SUPPLIER, iter_statement_rows, opening_for
+
+ZERO = Decimal("0.00")
+
+
+def statement_page_size():
+    return getattr(settings, "STATEMENT_PAGE_SIZE", 200)
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Statement state just before a page: figures carried forward and where the stream resumes."""
+
+    after: tuple | None = None  # (date, seq, id) of the last entry before the page
+    opening_done: bool = False
+    debit: Decimal = ZERO
+    credit: Decimal = ZERO
+    balance: Decimal = ZERO
+
+    def totals(self):
+        return StatementTotals(debit=self.debit, credit=self.credit, balance=self.balance)
+
+
+@dataclass(frozen=True)
+class CheckpointScan:
+    checkpoints: list  # checkpoints[k] is the state before page k + 1
+    row_count: int
+    debit: Decimal
+    credit: Decimal
+    balance: Decimal
+
+
+def _scan(side, party, date_from, date_to, page_size):
+    entries = side.statement_amounts(party.pk, date_from, date_to)
+    opening = opening_for(side, party.pk, date_from, date_to) if date_from else None
+    if opening:
+        entries = chain([(None, opening["debit"], opening["credit"])], entries)
+    checkpoints = [Checkpoint()]
+    state = Checkpoint()
+    count = 0
+    for key, debit, credit in entries:
+        if count and count % page_size == 0:
+            checkpoints.append(state)
+        state = Checkpoint(
+            after=key if key is not None else state.after,
+            opening_done=state.opening_done or key is None,
+            debit=state.debit + debit,
+            credit=state.credit + credit,
+            balance=state.balance + debit - credit,
+        )
+        count += 1
+    return CheckpointScan(checkpoints, count, state.debit, state.credit, state.balance)
+
+
+def statement_checkpoints(side, party, date_from=None, date_to=None, page_size=None):
+    return _scan(side, party, date_from, date_to, page_size or statement_page_size())
+
+
+@dataclass
+class StatementPage:
+    number: int
+    num_pages: int
+    page_size: int
+    row_count: int
+    rows: list = field(default_factory=list)
+    brought_forward: StatementTotals = field(default_factory=StatementTotals)
+    totals: StatementTotals = field(default_factory=StatementTotals)
+
+    @property
+    def has_previous(self):
+        return self.number > 1
+
+    @property
+    def has_next(self):
+        return self.number < self.num_pages
+
+    @property
+    def previous_page_number(self):
+        return self.number - 1
+
+    @property
+    def next_page_number(self):
+        return self.number + 1
+
+    @property
+    def start_index(self):
+        return (self.number - 1) * self.page_size + 1 if self.row_count else 0
+
+    @property
+    def end_index(self):
+        return self.start_index + len(self.rows) - 1 if self.rows else 0
+
+
+def _page_number(value, num_pages):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return min(max(number, 1), num_pages)
+
+
+def statement_page(side, party, date_from=None, date_to=None, page=1, *, page_size=None):
+    """Rows of one statement page (with running balances) plus brought-forward and grand totals.
+
+    page may be any value from the query string; it is clamped to the valid range.
+    """
+    page_size = page_size or statement_page_size()
+    scan = statement_checkpoints(side, party, date_from, date_to, page_size)
+    num_pages = max(1, len(scan.checkpoints))
+    number = _page_number(page, num_pages)
+    start = scan.checkpoints[number - 1]
+    running = start.totals()
+    stream = iter_statement_rows(
+        side, party, date_from, date_to, after=start.after, opening=not start.opening_done, chunk_size=page_size
+    )
+    rows = list(islice(with_running_balance(stream, running), page_size))
+    return StatementPage(
+        number=number,
+        num_pages=num_pages,
+        page_size=page_size,
+        row_count=scan.row_count,
+        rows=rows,
+        brought_forward=start.totals(),
+        totals=StatementTotals(debit=scan.debit, credit=scan.credit, balance=scan.balance, rows=scan.row_count),
+    )
+
+
+def client_statement_page(client, date_from=None, date_to=None, page=1, **kwargs):
+    return statement_page(CLIENT, client, date_from, date_to, page, **kwargs)
+
+
+def supplier_statement_page(supplier, date_from=None, date_to=None, page=1, **kwargs):
+    return statement_page(SUPPLIER, supplier, date_from, date_to, page, **kwargs)
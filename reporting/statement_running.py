@@ -1,27 +1,40 @@
+from dataclasses import dataclass
 from decimal import Decimal
 
+ZERO = Decimal("0.00")
+
+
+@dataclass
+class StatementTotals:
+    """Column totals and balance (debit − credit, so positive = client owes us / we prepaid a supplier)."""
+
+    debit: Decimal = ZERO
+    credit: Decimal = ZERO
+    balance: Decimal = ZERO
+    rows: int = 0
+
+
+def with_running_balance(rows, totals=None):
+    """Yield rows with running_balance set; totals (if given) keeps the figures up to the last row."""
+    totals = totals if totals is not None else StatementTotals()
+    for row in rows:
+        totals.debit += row["debit"]
+        totals.credit += row["credit"]
+        totals.balance += row["debit"] - row["credit"]
+        totals.rows += 1
+        row["running_balance"] = totals.balance
+        yield row
+
 
 def annotate_client_statement_rows(rows):
     """Oldest-first rows with running balance (positive = client owes us)."""
-    running = Decimal("0.00")
-    total_dr = Decimal("0.00")
-    total_cr = Decimal("0.00")
-    for row in rows:
-        total_dr += row["debit"]
-        total_cr += row["credit"]
-        running = running + row["debit"] - row["credit"]
-        row["running_balance"] = running
-    return rows, total_dr, total_cr, running
+    totals = StatementTotals()
+    rows = list(with_running_balance(rows, totals))
+    return rows, totals.debit, totals.credit, totals.balance
 
 
 def annotate_supplier_statement_rows(rows):
     """Oldest-first rows; balance shown negative when we owe the supplier."""
-    running = Decimal("0.00")
-    total_dr = Decimal("0.00")
-    total_cr = Decimal("0.00")
-    for row in rows:
-        total_dr += row["debit"]
-        total_cr += row["credit"]
-        running = running + row["credit"] - row["debit"]
-        row["running_balance"] = -running
-    return rows, total_dr, total_cr, -running
+    totals = StatementTotals()
+    rows = list(with_running_balance(rows, totals))
+    return rows, totals.debit, totals.credit, totals.balance
@@ -0,0 +1,110 @@
+"""
+One party's statement as an ordered stream of rows.
+
+Invoice lines and payments are read as a single SQL UNION ordered the way
+sort_statement_rows orders rows — (date, created time, id) — in keyset chunks;
+each chunk's lines and payments are then loaded in bulk and turned into row
+dicts. statement_running.with_running_balance adds the running balance as rows go by, so no
+step needs the whole statement in memory.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import CharField, F, Q, Value
+
+from reporting import client_statement_batch, supplier_statement_batch
+from sales.models import SalesInvoiceLine
+from treasury.models import Payment
+
+ZERO = Decimal("0.00")
+
+# Entries read (and rows built) per UNION query.
+STREAM_CHUNK_SIZE = 500
+
+# Each side is the batch engine module that knows the party's queries and row builders.
+CLIENT = client_statement_batch
+SUPPLIER = supplier_statement_batch
+
+
+def _after(key):
+    """Entries strictly after key = (date, seq, id) in statement order."""
+    if key is None:
+        return Q()
+    d, seq, pk = key
+    return (
+        Q(entry_date__gt=d)
+        | Q(entry_date=d, seq__gt=seq)
+        | Q(entry_date=d, seq=seq, id__gt=pk)
+    )
+
+
+def statement_entries(side, party_id, date_from=None, date_to=None, *, after=None):
+    """UNION of (kind, id, entry_date, seq) for the party's lines and payments, in statement order."""
+    lines = (
+        side.statement_lines([party_id], date_from, date_to)
+        .annotate(kind=Value("line", output_field=CharField()), entry_date=F("line_date"), seq=F("invoice__created_at"))
+        .filter(_after(after))
+        .values_list("kind", "id", "entry_date", "seq")
+        .order_by()
+    )
+    payments = (
+        side.statement_payments([party_id], date_from, date_to)
+        .annotate(kind=Value("payment", output_field=CharField()), entry_date=F("date"), seq=F("created_at"))
+        .filter(_after(after))
+        .values_list("kind", "id", "entry_date", "seq")
+        .order_by()
+    )
+    return lines.union(payments, all=True).order_by("entry_date", "seq", "id")
+
+
+def opening_for(side, party_id, date_from, date_to):
+    debit, credit = side.statement_openings([party_id], date_from, date_to).get(party_id, (ZERO, ZERO))
+    if debit or credit:
+        return side.opening_row(date_from, debit, credit)
+    return None
+
+
+def _entry_rows(side, entries, today):
+    line_ids = [pk for kind, pk, *_ in entries if kind == "line"]
+    payment_ids = [pk for kind, pk, *_ in entries if kind == "payment"]
+    lines = SalesInvoiceLine.objects.select_related(
+        "invoice", "service_type", "destination", "service_instance__service_type"
+    ).in_bulk(line_ids) if line_ids else {}
+    payments = Payment.objects.select_related("money_account").in_bulk(payment_ids) if payment_ids else {}
+    for kind, pk, *_ in entries:
+        if kind == "line":
+            yield side.line_row(lines[pk], today)
+        else:
+            yield side.payment_row(payments[pk])
+
+
+def iter_statement_rows(
+    side, party, date_from=None, date_to=None, *, after=None, opening=True, chunk_size=STREAM_CHUNK_SIZE
+):
+    """Yield the party's statement rows oldest first, reading chunk_size entries per query.
+
+    after=(date, seq, id) resumes after that entry and skips the opening row;
+    opening=False skips it too.
+    """
+    today = date.today()
+    if opening and after is None and date_from:
+        row = opening_for(side, party.pk, date_from, date_to)
+        if row:
+            yield row
+    while True:
+        entries = list(statement_entries(side, party.pk, date_from, date_to, after=after)[:chunk_size])
+        if not entries:
+            return
+        yield from _entry_rows(side, entries, today)
+        if len(entries) < chunk_size:
+            return
+        _kind, pk, entry_date, seq = entries[-1]
+        after = (entry_date, seq, pk)
+
+
+def iter_client_statement_rows(client, date_from=None, date_to=None, **kwargs):
+    return iter_statement_rows(CLIENT, client, date_from, date_to, **kwargs)
+
+
+def iter_supplier_statement_rows(supplier, date_from=None, date_to=None, **kwargs):
+    return iter_statement_rows(SUPPLIER, supplier, date_from, date_to, **kwargs)
@@ -4,11 +4,9 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from accounts_core.models import Client, Supplier
-from purchases.models import SupplierBill
-from reporting.balances import client_ar_balance, supplier_ap_balance
-from reporting.client_statement_rows import build_client_statement_rows
-from reporting.supplier_statement_rows import build_supplier_statement_rows
-from sales.models import SalesInvoice
+from reporting.balances import client_ar_balances, supplier_ap_balances
+from reporting.client_statement_batch import ClientPeriodTotals, client_period_totals
+from reporting.supplier_statement_batch import SupplierPeriodTotals, supplier_period_totals
 
 
 def _split_balance_dr_cr(net):
@@ -57,42 +55,27 @@ def profit_summary_row(label, amount, curr="USD"):
     }
 
 
-def _client_period_movement(client, date_from=None, date_to=None):
-    sub = build_client_statement_rows(client, date_from, date_to)
-    debit = sum((r["debit"] for r in sub), Decimal("0.00"))
-    credit = sum((r["credit"] for r in sub), Decimal("0.00"))
-    return debit, credit
-
-
-def _supplier_period_movement(supplier, date_from=None, date_to=None):
-    sub = build_supplier_statement_rows(supplier, date_from, date_to)
-    debit = sum((r["debit"] for r in sub), Decimal("0.00"))
-    credit = sum((r["credit"] for r in sub), Decimal("0.00"))
-    return debit, credit
-
-
 def build_client_summary_rows(clients, date_from=None, date_to=None):
     day_before = (date_from - timedelta(days=1)) if date_from else None
+    clients = list(clients)
+    ids = [c.pk for c in clients]
+    openings = client_ar_balances(ids, day_before) if date_from else {}
+    totals = client_period_totals(ids, date_from, date_to)
     rows = []
     for client in clients:
-        opening = client_ar_balance(client, day_before) if date_from else Decimal("0.00")
-        debit, credit = _client_period_movement(client, date_from, date_to)
+        opening = openings.get(client.pk, Decimal("0.00"))
+        period = totals.get(client.pk) or ClientPeriodTotals()
+        debit, credit = period.debit, period.credit
         closing = opening + debit - credit
         if debit == 0 and credit == 0 and opening == 0 and closing == 0:
             continue
-        inv_q = SalesInvoice.objects.filter(client=client, status__in=SalesInvoice.reporting_statuses())
-        if date_from:
-            inv_q = inv_q.filter(issue_date__gte=date_from)
-        if date_to:
-            inv_q = inv_q.filter(issue_date__lte=date_to)
-        row_curr = inv_q.order_by("-issue_date").values_list("currency", flat=True).first() or "USD"
         bal_dr, bal_cr = _split_balance_dr_cr(closing)
         rows.append(
             {
                 "account": client.client_code,
                 "name": client.name_en,
                 "client_id": client.id,
-                "curr": row_curr,
+                "curr": period.currency,
                 "tot_dr": debit,
                 "tot_cr": credit,
                 "bal_dr": bal_dr,
@@ -105,28 +88,25 @@ def build_client_summary_rows(clients, date_from=None, date_to=None):
 
 def build_supplier_summary_rows(suppliers, date_from=None, date_to=None):
     day_before = (date_from - timedelta(days=1)) if date_from else None
+    suppliers = list(suppliers)
+    ids = [s.pk for s in suppliers]
+    openings = supplier_ap_balances(ids, day_before) if date_from else {}
+    totals = supplier_period_totals(ids, date_from, date_to)
     rows = []
     for supplier in suppliers:
-        opening = supplier_ap_balance(supplier, day_before) if date_from else Decimal("0.00")
-        debit, credit = _supplier_period_movement(supplier, date_from, date_to)
+        opening = openings.get(supplier.pk, Decimal("0.00"))
+        period = totals.get(supplier.pk) or SupplierPeriodTotals()
+        debit, credit = period.debit, period.credit
         closing = opening + credit - debit
         if debit == 0 and credit == 0 and opening == 0 and closing == 0:
             continue
-        bill_q = SupplierBill.objects.filter(supplier=supplier, status=SupplierBill.Status.POSTED)
-        if date_from:
-            bill_q = bill_q.filter(bill_date__gte=date_from)
-        if date_to:
-            bill_q = bill_q.filter(bill_date__lte=date_to)
-        row_curr = bill_q.order_by("-bill_date").values_list("currency", flat=True).first()
-        if not row_curr:
-            row_curr = supplier.default_currency or "USD"
         bal_dr, bal_cr = _split_movement_balance_dr_cr(debit, credit)
         rows.append(
             {
                 "account": supplier.supplier_code,
                 "name": supplier.name,
                 "supplier_id": supplier.id,
-                "curr": row_curr,
+                "curr": period.currency or supplier.default_currency or "USD",
                 "tot_dr": debit,
                 "tot_cr": credit,
                 "bal_dr": bal_dr,
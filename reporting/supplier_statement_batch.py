@@ -0,0 +1,193 @@
+"""
+Supplier statements for many suppliers at once (mirrors client_statement_batch).
+
+iter_supplier_statements yields each supplier's statement rows from three
+queries per chunk of suppliers; supplier_period_totals returns the period
+debit/credit, posted bill count and latest bill currency per supplier from a
+fixed number of grouped queries.
+"""
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from purchases.models import SupplierBill
+from reporting.client_statement_batch import CENT, CHUNK_SIZE, ZERO, dated_in_period, opening_row
+from reporting.statement_refs import invoice_ref_url, invoice_statement_ref, payment_ref_url
+from reporting.statement_sort import sort_statement_rows
+from sales.models import SalesInvoice, SalesInvoiceLine
+from treasury.models import Payment
+
+try:
+    from accounting_bridge.opening_balances import supplier_opening_balances_dr_cr
+except ImportError:
+    supplier_opening_balances_dr_cr = None
+
+
+@dataclass
+class SupplierPeriodTotals:
+    debit: Decimal = ZERO
+    credit: Decimal = ZERO
+    bill_count: int = 0
+    currency: str | None = None  # latest posted bill in the period, if any
+
+
+def statement_lines(supplier_ids, date_from=None, date_to=None):
+    return (
+        SalesInvoiceLine.objects.filter(
+            supplier_id__in=supplier_ids,
+            crm_issued=True,
+            invoice__status__in=SalesInvoice.reporting_statuses(),
+        )
+        .annotate(line_date=Coalesce("service_date", "invoice__issue_date"))
+        .filter(dated_in_period("line_date", date_from, date_to))
+    )
+
+
+def statement_payments(supplier_ids, date_from=None, date_to=None):
+    qs = Payment.objects.filter(
+        supplier_id__in=supplier_ids,
+        party_type=Payment.PartyType.SUPPLIER,
+        direction=Payment.Direction.OUT,
+        status=Payment.Status.POSTED,
+    )
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
+
+
+def statement_openings(supplier_ids, date_from=None, date_to=None):
+    if not (supplier_opening_balances_dr_cr and date_from):
+        return {}
+    return supplier_opening_balances_dr_cr(supplier_ids, on_or_before=date_to)
+
+
+def statement_amounts(supplier_id, date_from=None, date_to=None):
+    """((date, seq, id), debit, credit) per line and payment of one supplier's statement, in statement order."""
+    lines = (
+        statement_lines([supplier_id], date_from, date_to)
+        .order_by("line_date", "invoice__created_at", "id")
+        .values_list("line_date", "invoice__created_at", "id", "qty", "cost_price_usd")
+    )
+    payments = (
+        statement_payments([supplier_id], date_from, date_to)
+        .order_by("date", "created_at", "id")
+        .values_list("date", "created_at", "id", "amount")
+    )
+    return heapq.merge(
+        (
+            ((d, seq, pk), ZERO, ((qty or Decimal("0")) * (cost or Decimal("0"))).quantize(CENT))
+            for d, seq, pk, qty, cost in lines.iterator()
+        ),
+        (((d, seq, pk), amount, ZERO) for d, seq, pk, amount in payments.iterator()),
+        key=lambda entry: entry[0],
+    )
+
+
+def line_row(line, today):
+    inv = line.invoice
+    svc_date = line.effective_service_date()
+    st = line.service_type
+    if not st and line.service_instance_id and line.service_instance:
+        st = line.service_instance.service_type
+    return {
+        "date": svc_date,
+        "type": st.name if st else "Service",
+        "description": line.supplier_statement_description(),
+        "destination": line.destination.name if line.destination_id else "—",
+        "ref": invoice_statement_ref(inv),
+        "ref_url": invoice_ref_url(inv.id),
+        "debit": ZERO,
+        "credit": line.line_cost_amount_usd().quantize(CENT),
+        "sort_seq": inv.created_at,
+        "sort_id": str(line.id),
+        "is_pending": bool(svc_date and svc_date > today),
+    }
+
+
+def payment_row(pay):
+    return {
+        "date": pay.date,
+        "type": "Payment",
+        "description": pay.money_account.name if pay.money_account_id else "—",
+        "destination": "—",
+        "ref": pay.receipt_no,
+        "ref_url": payment_ref_url(pay.id),
+        "debit": pay.amount,
+        "credit": ZERO,
+        "sort_seq": pay.created_at,
+        "sort_id": str(pay.id),
+        "is_pending": False,
+    }
+
+
+def _chunk_rows(suppliers, date_from, date_to, today):
+    ids = [s.pk for s in suppliers]
+    rows = defaultdict(list)
+    for supplier_id, (debit, credit) in statement_openings(ids, date_from, date_to).items():
+        if debit or credit:
+            rows[supplier_id].append(opening_row(date_from, debit, credit))
+    lines = statement_lines(ids, date_from, date_to).select_related(
+        "invoice", "service_type", "destination", "service_instance__service_type"
+    )
+    for line in lines:
+        rows[line.supplier_id].append(line_row(line, today))
+    for pay in statement_payments(ids, date_from, date_to).select_related("money_account"):
+        rows[pay.supplier_id].append(payment_row(pay))
+    for supplier in suppliers:
+        yield supplier, sort_statement_rows(rows.pop(supplier.pk, []))
+
+
+def iter_supplier_statements(suppliers, date_from=None, date_to=None, *, chunk_size=CHUNK_SIZE):
+    """Yield (supplier, rows) in the given order; rows are oldest first, without running balances."""
+    today = date.today()
+    chunk = []
+    for supplier in suppliers:
+        chunk.append(supplier)
+        if len(chunk) >= chunk_size:
+            yield from _chunk_rows(chunk, date_from, date_to, today)
+            chunk = []
+    if chunk:
+        yield from _chunk_rows(chunk, date_from, date_to, today)
+
+
+def supplier_period_totals(supplier_ids, date_from=None, date_to=None):
+    """{supplier_id: SupplierPeriodTotals} for the statement period; suppliers without activity are omitted.
+
+    debit/credit equal the column totals of each supplier's statement (opening
+    row included); bill_count and currency cover posted bills dated in the period.
+    """
+    supplier_ids = list(supplier_ids)
+    totals = defaultdict(SupplierPeriodTotals)
+    for supplier_id, (debit, credit) in statement_openings(supplier_ids, date_from, date_to).items():
+        totals[supplier_id].debit += debit
+        totals[supplier_id].credit += credit
+    # Bare columns, so each line is rounded exactly like its statement row.
+    lines = statement_lines(supplier_ids, date_from, date_to).values_list("supplier_id", "qty", "cost_price_usd")
+    for supplier_id, qty, cost in lines:
+        totals[supplier_id].credit += ((qty or Decimal("0")) * (cost or Decimal("0"))).quantize(CENT)
+    payments = (
+        statement_payments(supplier_ids, date_from, date_to)
+        .values("supplier_id")
+        .order_by()
+        .annotate(t=Sum("amount"))
+    )
+    for row in payments:
+        totals[row["supplier_id"]].debit += row["t"] or ZERO
+    bills = SupplierBill.objects.filter(supplier_id__in=supplier_ids, status=SupplierBill.Status.POSTED)
+    if date_from:
+        bills = bills.filter(bill_date__gte=date_from)
+    if date_to:
+        bills = bills.filter(bill_date__lte=date_to)
+    for supplier_id, currency in bills.order_by("supplier_id", "-bill_date").values_list("supplier_id", "currency"):
+        entry = totals[supplier_id]
+        if not entry.bill_count:
+            entry.currency = currency or None
+        entry.bill_count += 1
+    return dict(totals)
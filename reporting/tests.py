@@ -2,7 +2,7 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from accounts_core.models import Client, Employee, Supplier
 from catalog.models import Destination, ServiceInstance, ServiceType
@@ -393,3 +393,287 @@ class OpeningBalanceStatementTests(TestCase):
         opening = [r for r in rows if r.get("sort_id") == "opening"]
         self.assertEqual(opening, [])
 
+
+
+class BulkPartyBalanceTests(TestCase):
+    """Grouped AR/AP balances match the per-party results and do not scale queries with party count."""
+
+    def setUp(self):
+        from accounting_bridge.models import PartyOpeningBalance
+
+        self.user = get_user_model().objects.create_user(username="bulk1", password="test12345")
+        self.employee = Employee.objects.create(name="Bulk Emp", role=Employee.EmployeeRole.SALES)
+        self.service_type = ServiceType.objects.create(name="Hotel", code="HTB")
+        self.destination = Destination.objects.create(name="Rome")
+        self.usd_account = MoneyAccount.objects.create(name="Bulk USD", currency="USD")
+        self.eur_account = MoneyAccount.objects.create(name="Bulk EUR", currency="EUR")
+        self.suppliers = [
+            Supplier.objects.create(supplier_code=f"S-BK{i}", name=f"Bulk Supplier {i}", managing_number=f"+9617000010{i}")
+            for i in range(3)
+        ]
+        self.clients = [Client.objects.create(client_code=f"C-BK{i}", name_en=f"Bulk Client {i}") for i in range(3)]
+        for i, (client, supplier) in enumerate(zip(self.clients, self.suppliers)):
+            inv = SalesInvoice.objects.create(
+                invoice_no=f"TMP-BK{i}",
+                client=client,
+                sales_employee=self.employee,
+                issue_date=date.today(),
+                currency="USD",
+            )
+            SalesInvoiceLine.objects.create(
+                invoice=inv,
+                supplier=supplier,
+                service_type=self.service_type,
+                destination=self.destination,
+                line_employee=self.employee,
+                qty=Decimal("2"),
+                sell_price=Decimal("100") * (i + 1),
+                cost_price=Decimal("30.25"),
+            )
+            inv.recalc_usd_amounts()
+            inv.post(self.user)
+        Payment.objects.create(
+            receipt_no="TMP-BK-EUR",
+            direction=Payment.Direction.IN,
+            party_type=Payment.PartyType.CLIENT,
+            client=self.clients[0],
+            money_account=self.eur_account,
+            date=date.today(),
+            currency="EUR",
+            amount=Decimal("33.33"),
+            exchange_rate=Decimal("1.085"),
+        ).post(self.user)
+        Payment.objects.create(
+            receipt_no="TMP-BK-OUT",
+            direction=Payment.Direction.OUT,
+            party_type=Payment.PartyType.SUPPLIER,
+            supplier=self.suppliers[1],
+            money_account=self.usd_account,
+            date=date.today(),
+            currency="USD",
+            amount=Decimal("20.00"),
+        ).post(self.user)
+        PartyOpeningBalance.objects.create(
+            party_type=PartyOpeningBalance.PartyType.CLIENT,
+            client=self.clients[2],
+            as_of_date=date.today() - timedelta(days=30),
+            debit_usd=Decimal("75.00"),
+        )
+
+    def test_bulk_client_balances_match_single_party(self):
+        from reporting.balances import client_ar_balances
+
+        balances = client_ar_balances([c.pk for c in self.clients], date.today())
+        self.assertEqual(balances[self.clients[0].pk], Decimal("200.00") - Decimal("36.16"))
+        self.assertEqual(balances[self.clients[2].pk], Decimal("675.00"))
+        for client in self.clients:
+            self.assertEqual(balances[client.pk], client_ar_balance(client, date.today()))
+
+    def test_bulk_supplier_balances_match_single_party(self):
+        from reporting.balances import supplier_ap_balance, supplier_ap_balances
+
+        balances = supplier_ap_balances(None, date.today())
+        self.assertEqual(balances[self.suppliers[1].pk], Decimal("40.50"))
+        for supplier in self.suppliers:
+            self.assertEqual(balances[supplier.pk], supplier_ap_balance(supplier, date.today()))
+
+    def test_bulk_query_count_is_independent_of_party_count(self):
+        from reporting.balances import client_ar_balances, supplier_ap_balances
+
+        with self.assertNumQueries(4):
+            client_ar_balances([c.pk for c in self.clients], date.today(), use_ledger=False)
+        with self.assertNumQueries(3):
+            supplier_ap_balances([s.pk for s in self.suppliers], date.today(), use_ledger=False)
+
+
+class PartyBalanceLedgerTests(BulkPartyBalanceTests):
+    """Materialized ledger agrees with the aggregate path and follows later postings."""
+
+    def setUp(self):
+        from reporting.balance_ledger import rebuild_party_ledger
+
+        super().setUp()
+        rebuild_party_ledger()
+
+    def test_ledger_matches_aggregate_path(self):
+        from reporting.balances import client_ar_balances, supplier_ap_balances
+
+        today = date.today()
+        self.assertEqual(client_ar_balances(None, today), client_ar_balances(None, today, use_ledger=False))
+        self.assertEqual(supplier_ap_balances(None, today), supplier_ap_balances(None, today, use_ledger=False))
+        self.assertEqual(client_ar_balance(self.clients[2], today - timedelta(days=1)), Decimal("75.00"))
+
+    def test_single_party_read_is_constant_queries(self):
+        with self.assertNumQueries(2):
+            client_ar_balance(self.clients[1], date.today())
+
+    def test_posting_and_voiding_payment_updates_ledger(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(
+                receipt_no="TMP-BK-IN2",
+                direction=Payment.Direction.IN,
+                party_type=Payment.PartyType.CLIENT,
+                client=self.clients[1],
+                money_account=self.usd_account,
+                date=date.today(),
+                currency="USD",
+                amount=Decimal("150.00"),
+            )
+            payment.post(self.user)
+        self.assertEqual(client_ar_balance(self.clients[1], date.today()), Decimal("250.00"))
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.void("duplicate")
+        self.assertEqual(client_ar_balance(self.clients[1], date.today()), Decimal("400.00"))
+
+    def test_changing_line_supplier_refreshes_both_suppliers(self):
+        from reporting.balances import supplier_ap_balance
+
+        line = SalesInvoiceLine.objects.get(supplier=self.suppliers[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            line.supplier = self.suppliers[2]
+            line.save()
+        self.assertEqual(supplier_ap_balance(self.suppliers[0], date.today()), Decimal("0.00"))
+        self.assertEqual(supplier_ap_balance(self.suppliers[2], date.today()), Decimal("121.00"))
+
+    def test_exchange_rate_only_edit_refreshes_line_suppliers(self):
+        from reporting.balance_ledger import _pending, rebuild_party_ledger
+        from reporting.balances import supplier_ap_balances
+
+        inv = SalesInvoice.objects.create(
+            invoice_no="TMP-BK-FX",
+            client=self.clients[0],
+            sales_employee=self.employee,
+            issue_date=date.today(),
+            currency="EUR",
+            exchange_rate_to_usd=Decimal("1.10"),
+        )
+        SalesInvoiceLine.objects.create(
+            invoice=inv,
+            supplier=self.suppliers[0],
+            service_type=self.service_type,
+            destination=self.destination,
+            line_employee=self.employee,
+            qty=Decimal("1"),
+            sell_price=Decimal("200"),
+            cost_price=Decimal("100"),
+        )
+        inv.recalc_usd_amounts()
+        inv.post(self.user)
+        rebuild_party_ledger()
+        # setUp's on_commit callbacks never ran; drop their queued parties so only this edit counts.
+        _pending().update(clients=set(), suppliers=set())
+
+        inv = SalesInvoice.objects.get(pk=inv.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            inv.exchange_rate_to_usd = Decimal("1.50")
+            inv.save(update_fields=["exchange_rate_to_usd"])
+            inv.recalc_usd_amounts()
+            inv.publish_changes(self.user)
+        ids = [self.suppliers[0].pk]
+        self.assertEqual(supplier_ap_balances(ids, date.today()), supplier_ap_balances(ids, date.today(), use_ledger=False))
+
+    def test_saving_loaded_rows_does_not_reread_them(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        line = SalesInvoiceLine.objects.select_related("invoice").get(supplier=self.suppliers[0])
+        payment = Payment.objects.filter(client__isnull=False).first()
+        with CaptureQueriesContext(connection) as ctx:
+            line.save()
+            line.invoice.save()
+            payment.save()
+        tables = ('FROM "sales_salesinvoiceline"', 'FROM "sales_salesinvoice"', 'FROM "treasury_payment"')
+        rereads = [q["sql"] for q in ctx.captured_queries if any(t in q["sql"] for t in tables)]
+        self.assertEqual(rereads, [])
+
+    def test_rebuild_command_verifies(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("rebuild_party_balances", "--verify", stdout=out)
+        self.assertIn("matches", out.getvalue())
+
+
+class AgingEngineTests(TestCase):
+    """Open amounts come from one annotated query and land in the right bucket."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="aging1", password="test12345")
+        self.client_obj = Client.objects.create(client_code="C-AG", name_en="Aging Client")
+        self.account = MoneyAccount.objects.create(name="Aging Cash", currency="USD")
+        self.today = date(2026, 6, 30)
+        self.invoices = []
+        for i, days_overdue in enumerate((-5, 10, 45, 75, 120)):
+            due = self.today - timedelta(days=days_overdue)
+            self.invoices.append(
+                SalesInvoice.objects.create(
+                    invoice_no=f"TMP-AG{i}",
+                    client=self.client_obj,
+                    issue_date=due - timedelta(days=1),
+                    due_date=due,
+                    grand_total=Decimal("100.00"),
+                    status=SalesInvoice.Status.POSTED,
+                )
+            )
+        payment = Payment.objects.create(
+            receipt_no="TMP-AG-PAY",
+            direction=Payment.Direction.IN,
+            party_type=Payment.PartyType.CLIENT,
+            client=self.client_obj,
+            money_account=self.account,
+            date=self.today,
+            amount=Decimal("140.00"),
+        )
+        payment.post(self.user)
+        from treasury.models import ARAllocation
+
+        ARAllocation.objects.create(payment=payment, sales_invoice=self.invoices[1], allocated_amount=Decimal("40.00"))
+        ARAllocation.objects.create(payment=payment, sales_invoice=self.invoices[4], allocated_amount=Decimal("100.00"))
+
+    def test_buckets_and_remaining(self):
+        from reporting.aging import receivables_aging
+
+        with self.assertNumQueries(1):
+            rows, totals = receivables_aging(today=self.today)
+        self.assertEqual([r["invoice"].pk for r in rows], [inv.pk for inv in self.invoices[3::-1]])
+        self.assertEqual(totals["not_due"], Decimal("100.00"))
+        self.assertEqual(totals["b0_30"], Decimal("60.00"))
+        self.assertEqual(totals["b31_60"], Decimal("100.00"))
+        self.assertEqual(totals["b61_90"], Decimal("100.00"))
+        self.assertEqual(totals["b90_plus"], Decimal("0.00"))
+        partial = next(r for r in rows if r["invoice"].pk == self.invoices[1].pk)
+        self.assertEqual(partial["paid"], Decimal("40.00"))
+        self.assertEqual(partial["b0_30"], Decimal("60.00"))
+
+
+@override_settings(DASHBOARD_CACHE_TIMEOUT=60)
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        from reporting.dashboard_cache import reset_dashboard_cache_stats
+
+        reset_dashboard_cache_stats()
+        self.calls = 0
+
+    def _build(self):
+        self.calls += 1
+        return {"value": self.calls}
+
+    def test_hit_until_accounting_write_commits(self):
+        from reporting.dashboard_cache import ACCOUNTING_SCOPE, cached_section, dashboard_cache_stats
+
+        key = (date(2026, 1, 1), date(2026, 12, 31), "", "", date.today())
+        self.assertEqual(cached_section("t", ACCOUNTING_SCOPE, key, self._build), {"value": 1})
+        self.assertEqual(cached_section("t", ACCOUNTING_SCOPE, key, self._build), {"value": 1})
+        self.assertEqual(cached_section("t", ACCOUNTING_SCOPE, key[:1], self._build), {"value": 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.create(client_code="C-DC", name_en="Cache Client")
+        self.assertEqual(cached_section("t", ACCOUNTING_SCOPE, key, self._build), {"value": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MoneyAccount.objects.create(name="Cache Cash", currency="USD")
+            SalesInvoice.objects.create(invoice_no="TMP-DC", issue_date=date.today())
+        self.assertEqual(cached_section("t", ACCOUNTING_SCOPE, key, self._build), {"value": 3})
+        self.assertEqual(dashboard_cache_stats(), {"hits": 2, "misses": 3})
@@ -0,0 +1,356 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounting_bridge.models import PartyOpeningBalance
+from accounts_core.models import Client, Employee, Supplier
+from purchases.models import SupplierBill
+from catalog.models import Destination, ServiceType
+from reporting.client_statement_batch import client_period_totals, iter_client_statements
+from reporting.client_statement_rows import build_client_statement_rows
+from reporting.statement_pages import client_statement_page, supplier_statement_page
+from reporting.statement_running import StatementTotals, with_running_balance
+from reporting.statement_stream import iter_client_statement_rows, iter_supplier_statement_rows
+from reporting.statement_summary import build_client_summary_rows, build_supplier_summary_rows
+from reporting.supplier_statement_batch import iter_supplier_statements, supplier_period_totals
+from reporting.supplier_statement_rows import build_supplier_statement_rows
+from sales.models import SalesInvoice, SalesInvoiceLine
+from treasury.models import MoneyAccount, Payment
+
+
+class StatementBatchTestData(TestCase):
+    """Three clients and suppliers with lines inside and outside the period, FX payments and openings."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="batch1", password="test12345")
+        self.employee = Employee.objects.create(name="Batch Emp", role=Employee.EmployeeRole.SALES)
+        self.service_type = ServiceType.objects.create(name="Hotel", code="HTS")
+        self.destination = Destination.objects.create(name="Vienna")
+        self.usd_account = MoneyAccount.objects.create(name="Batch USD", currency="USD")
+        self.eur_account = MoneyAccount.objects.create(name="Batch EUR", currency="EUR")
+        self.today = date.today()
+        self.date_from = self.today - timedelta(days=10)
+        self.date_to = self.today + timedelta(days=10)
+        self.clients = [Client.objects.create(client_code=f"C-SB{i}", name_en=f"Batch Client {i}") for i in range(3)]
+        self.suppliers = [
+            Supplier.objects.create(supplier_code=f"S-SB{i}", name=f"Batch Supplier {i}", managing_number=f"+9617000020{i}")
+            for i in range(3)
+        ]
+        for i, (client, supplier) in enumerate(zip(self.clients, self.suppliers)):
+            inv = SalesInvoice.objects.create(
+                invoice_no=f"TMP-SB{i}",
+                client=client,
+                sales_employee=self.employee,
+                issue_date=self.today,
+                currency="EUR" if i == 1 else "USD",
+                exchange_rate_to_usd=Decimal("1.1") if i == 1 else None,
+            )
+            for service_date, qty in ((self.today, "3"), (self.today - timedelta(days=40), "1")):
+                SalesInvoiceLine.objects.create(
+                    invoice=inv,
+                    supplier=supplier,
+                    service_type=self.service_type,
+                    destination=self.destination,
+                    line_employee=self.employee,
+                    service_date=service_date,
+                    qty=Decimal(qty),
+                    sell_price=Decimal("33.335") * (i + 1),
+                    cost_price=Decimal("10.125"),
+                    crm_issued=True,
+                )
+            inv.recalc_usd_amounts()
+            inv.post(self.user)
+        Payment.objects.create(
+            receipt_no="TMP-SB-EUR",
+            direction=Payment.Direction.IN,
+            party_type=Payment.PartyType.CLIENT,
+            client=self.clients[0],
+            money_account=self.eur_account,
+            date=self.today,
+            currency="EUR",
+            amount=Decimal("33.33"),
+            exchange_rate=Decimal("1.085"),
+        ).post(self.user)
+        Payment.objects.create(
+            receipt_no="TMP-SB-OUT",
+            direction=Payment.Direction.OUT,
+            party_type=Payment.PartyType.SUPPLIER,
+            supplier=self.suppliers[1],
+            money_account=self.usd_account,
+            date=self.today,
+            currency="USD",
+            amount=Decimal("20.00"),
+        ).post(self.user)
+        PartyOpeningBalance.objects.create(
+            party_type=PartyOpeningBalance.PartyType.CLIENT,
+            client=self.clients[2],
+            as_of_date=self.today - timedelta(days=30),
+            debit_usd=Decimal("75.00"),
+        )
+        PartyOpeningBalance.objects.create(
+            party_type=PartyOpeningBalance.PartyType.SUPPLIER,
+            supplier=self.suppliers[2],
+            as_of_date=self.today - timedelta(days=30),
+            credit_usd=Decimal("60.00"),
+        )
+
+
+def statement_entries(rows):
+    return [(r["date"], r["type"], r["ref"], r["debit"], r["credit"]) for r in rows]
+
+
+class ClientStatementBatchTests(StatementBatchTestData):
+    def test_statement_rows_match_expected_entries(self):
+        client = self.clients[0]
+        PartyOpeningBalance.objects.create(
+            party_type=PartyOpeningBalance.PartyType.CLIENT,
+            client=client,
+            as_of_date=self.today - timedelta(days=60),
+            debit_usd=Decimal("12.50"),
+        )
+        invoice_no = SalesInvoice.objects.get(client=client).invoice_no
+        receipt_no = Payment.objects.get(client=client).receipt_no
+        zero = Decimal("0.00")
+        in_period = [
+            (self.today, "Hotel", invoice_no, Decimal("100.02"), zero),  # 3 x 33.34
+            (self.today, "Payment", receipt_no, zero, Decimal("36.16")),  # EUR 33.33 x 1.085
+        ]
+        # The opening row carries the opening balance only; the line dated 40 days back is left out.
+        expected = [(self.date_from, "Opening balance", "OPEN", Decimal("12.50"), zero)] + in_period
+        self.assertEqual(statement_entries(build_client_statement_rows(client, self.date_from, self.date_to)), expected)
+        streamed = dict(iter_client_statements([client], self.date_from, self.date_to))
+        self.assertEqual(statement_entries(streamed[client]), expected)
+
+        expected = [(self.today - timedelta(days=40), "Hotel", invoice_no, Decimal("33.34"), zero)] + in_period
+        self.assertEqual(statement_entries(build_client_statement_rows(client)), expected)
+
+    def test_totals_match_statement_rows(self):
+        for period in ((None, None), (self.date_from, self.date_to)):
+            totals = client_period_totals([c.pk for c in self.clients], *period)
+            for client in self.clients:
+                rows = build_client_statement_rows(client, *period)
+                self.assertEqual(totals[client.pk].debit, sum(r["debit"] for r in rows))
+                self.assertEqual(totals[client.pk].credit, sum(r["credit"] for r in rows))
+        self.assertEqual(totals[self.clients[1].pk].currency, "EUR")
+        self.assertEqual(totals[self.clients[2].pk].debit, Decimal("375.00"))
+
+    def test_chunked_stream_matches_single_client_rows(self):
+        streamed = dict(iter_client_statements(self.clients, self.date_from, self.date_to, chunk_size=2))
+        for client in self.clients:
+            single = build_client_statement_rows(client, self.date_from, self.date_to)
+            self.assertEqual(streamed[client], single)
+        self.assertEqual([r["sort_id"] for r in streamed[self.clients[2]]][0], "opening")
+
+    def test_query_count_is_independent_of_client_count(self):
+        with self.assertNumQueries(5):  # openings, lines, USD payments, FX payments, invoices
+            client_period_totals([c.pk for c in self.clients], self.date_from, self.date_to)
+        with self.assertNumQueries(3):  # openings, lines, payments
+            list(iter_client_statements(self.clients, self.date_from, self.date_to))
+        with self.assertNumQueries(10):  # + ledger check and AR balances on the day before the period
+            build_client_summary_rows(self.clients, self.date_from, self.date_to)
+
+    def test_trial_balance_and_all_clients_views(self):
+        self.client.force_login(get_user_model().objects.create_superuser("batchadmin", password="test12345"))
+        params = {"date_from": self.date_from.isoformat(), "date_to": self.date_to.isoformat()}
+        response = self.client.get(reverse("reporting:clients_trial_balance"), params)
+        row = next(r for r in response.context["rows"] if r["client_id"] == self.clients[1].pk)
+        self.assertEqual((row["invoice_count"], row["curr"], row["tot_dr"]), (1, "EUR", Decimal("220.01")))
+        response = self.client.get(reverse("reporting:all_clients_statement"), params)
+        self.assertEqual(len(response.context["rows"]), 3)
+
+
+class SupplierStatementBatchTests(StatementBatchTestData):
+    def setUp(self):
+        super().setUp()
+        # Posting each invoice already filed a USD bill dated today.
+        for i, (days, currency) in enumerate(((1, "EUR"), (3, "TRY"), (60, "GBP"))):
+            SupplierBill.objects.create(
+                bill_no=f"TMP-SB-BILL{i}",
+                supplier=self.suppliers[0],
+                bill_date=self.today + timedelta(days=days),
+                currency=currency,
+                status=SupplierBill.Status.POSTED,
+            )
+
+    def test_totals_match_statement_rows(self):
+        for period in ((None, None), (self.date_from, self.date_to)):
+            totals = supplier_period_totals([s.pk for s in self.suppliers], *period)
+            for supplier in self.suppliers:
+                rows = build_supplier_statement_rows(supplier, *period)
+                self.assertEqual(totals[supplier.pk].debit, sum(r["debit"] for r in rows))
+                self.assertEqual(totals[supplier.pk].credit, sum(r["credit"] for r in rows))
+        first = totals[self.suppliers[0].pk]
+        self.assertEqual((first.bill_count, first.currency, first.credit), (3, "TRY", Decimal("30.36")))
+        self.assertEqual(totals[self.suppliers[2].pk].credit, Decimal("90.36"))
+
+    def test_statement_rows_match_expected_entries(self):
+        supplier = self.suppliers[2]
+        payment = Payment.objects.create(
+            receipt_no="TMP-SB-EUR-OUT",
+            direction=Payment.Direction.OUT,
+            party_type=Payment.PartyType.SUPPLIER,
+            supplier=supplier,
+            money_account=self.eur_account,
+            date=self.today,
+            currency="EUR",
+            amount=Decimal("20.00"),
+            exchange_rate=Decimal("1.085"),
+        )
+        payment.post(self.user)
+        payment.refresh_from_db()
+        invoice_no = SalesInvoice.objects.get(client=self.clients[2]).invoice_no
+        zero = Decimal("0.00")
+        in_period = [
+            (self.today, "Hotel", invoice_no, zero, Decimal("30.36")),  # 3 x 10.12 cost
+            (self.today, "Payment", payment.receipt_no, Decimal("20.00"), zero),  # payment currency amount
+        ]
+        expected = [(self.date_from, "Opening balance", "OPEN", zero, Decimal("60.00"))] + in_period
+        self.assertEqual(
+            statement_entries(build_supplier_statement_rows(supplier, self.date_from, self.date_to)), expected
+        )
+        streamed = dict(iter_supplier_statements([supplier], self.date_from, self.date_to))
+        self.assertEqual(statement_entries(streamed[supplier]), expected)
+
+        expected = [(self.today - timedelta(days=40), "Hotel", invoice_no, zero, Decimal("10.12"))] + in_period
+        self.assertEqual(statement_entries(build_supplier_statement_rows(supplier)), expected)
+
+    def test_chunked_stream_matches_single_supplier_rows(self):
+        streamed = dict(iter_supplier_statements(self.suppliers, self.date_from, self.date_to, chunk_size=2))
+        for supplier in self.suppliers:
+            self.assertEqual(streamed[supplier], build_supplier_statement_rows(supplier, self.date_from, self.date_to))
+
+    def test_query_count_is_independent_of_supplier_count(self):
+        with self.assertNumQueries(4):  # openings, lines, payments, bills
+            supplier_period_totals([s.pk for s in self.suppliers], self.date_from, self.date_to)
+        with self.assertNumQueries(3):  # openings, lines, payments
+            list(iter_supplier_statements(self.suppliers, self.date_from, self.date_to))
+        with self.assertNumQueries(8):  # + ledger check and AP balances on the day before the period
+            rows = build_supplier_summary_rows(self.suppliers, self.date_from, self.date_to)
+        self.assertEqual([r["curr"] for r in rows], ["TRY", "USD", "USD"])
+
+    def test_trial_balance_and_all_suppliers_views(self):
+        self.client.force_login(get_user_model().objects.create_superuser("batchadmin", password="test12345"))
+        params = {"date_from": self.date_from.isoformat(), "date_to": self.date_to.isoformat()}
+        response = self.client.get(reverse("reporting:suppliers_trial_balance"), params)
+        row = next(r for r in response.context["rows"] if r["supplier_id"] == self.suppliers[1].pk)
+        self.assertEqual((row["bill_count"], row["curr"], row["tot_dr"]), (1, "USD", Decimal("20.00")))
+        response = self.client.get(reverse("reporting:all_suppliers_statement"), params)
+        self.assertEqual(len(response.context["rows"]), 3)
+
+
+class StatementStreamTests(StatementBatchTestData):
+    def test_stream_matches_sorted_batch_rows_at_any_chunk_size(self):
+        for period in ((None, None), (self.date_from, self.date_to)):
+            batch = dict(iter_client_statements(self.clients, *period))
+            supplier_batch = dict(iter_supplier_statements(self.suppliers, *period))
+            for chunk_size in (1, 2, 500):
+                for client in self.clients:
+                    self.assertEqual(list(iter_client_statement_rows(client, *period, chunk_size=chunk_size)), batch[client])
+                for supplier in self.suppliers:
+                    streamed = list(iter_supplier_statement_rows(supplier, *period, chunk_size=chunk_size))
+                    self.assertEqual(streamed, supplier_batch[supplier])
+
+    def test_running_balance_is_computed_in_the_stream(self):
+        totals = StatementTotals()
+        stream = with_running_balance(iter_client_statement_rows(self.clients[0], chunk_size=1), totals)
+        first = next(stream)
+        self.assertEqual(totals.rows, 1)
+        self.assertEqual(first["running_balance"], first["debit"] - first["credit"])
+        rows = [first, *stream]
+        self.assertEqual(totals.rows, len(rows))
+        self.assertEqual(totals.balance, rows[-1]["running_balance"])
+        self.assertEqual(totals.balance, totals.debit - totals.credit)
+
+    def test_each_chunk_is_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(3):  # entries, lines, payments
+            list(iter_client_statement_rows(self.clients[0], chunk_size=500))
+        # Opening, two one-entry chunks (entries + one bulk load each), then the empty read that ends the stream.
+        with self.assertNumQueries(1 + 2 * 2 + 1):
+            list(iter_client_statement_rows(self.clients[0], self.date_from, self.date_to, chunk_size=1))
+
+
+class StatementPaginationTests(StatementBatchTestData):
+    def setUp(self):
+        super().setUp()
+        for i in range(4):
+            Payment.objects.create(
+                receipt_no=f"TMP-SB-PG{i}",
+                direction=Payment.Direction.IN,
+                party_type=Payment.PartyType.CLIENT,
+                client=self.clients[2],
+                money_account=self.usd_account,
+                date=self.today - timedelta(days=i),
+                currency="USD",
+                amount=Decimal("10.00"),
+            ).post(self.user)
+
+    def test_pages_join_up_to_the_full_statement(self):
+        client = self.clients[2]
+        full = list(with_running_balance(iter_client_statement_rows(client, self.date_from, self.date_to)))
+        self.assertEqual(len(full), 6)  # opening, one line, four payments
+        pages = [client_statement_page(client, self.date_from, self.date_to, n, page_size=4) for n in (1, 2)]
+        self.assertEqual(pages[0].rows + pages[1].rows, full)
+        self.assertEqual((pages[1].number, pages[1].num_pages, pages[1].start_index), (2, 2, 5))
+        self.assertEqual(pages[1].brought_forward.balance, full[3]["running_balance"])
+        self.assertEqual(pages[0].totals.balance, full[-1]["running_balance"])
+        self.assertEqual(client_statement_page(client, self.date_from, self.date_to, "99", page_size=4).number, 2)
+        self.assertEqual(client_statement_page(client, page="x", page_size=4).number, 1)
+
+    def test_page_after_the_opening_row_skips_it(self):
+        supplier = self.suppliers[2]
+        full = list(with_running_balance(iter_supplier_statement_rows(supplier, self.date_from, self.date_to)))
+        second = supplier_statement_page(supplier, self.date_from, self.date_to, 2, page_size=1)
+        self.assertEqual(full[0]["sort_id"], "opening")
+        self.assertEqual(second.rows, full[1:2])
+        self.assertEqual(second.brought_forward.credit, Decimal("60.00"))
+
+    @override_settings(DASHBOARD_CACHE_TIMEOUT=60, STATEMENT_PAGE_SIZE=2)
+    def test_page_follows_writes_that_bump_no_cache_version(self):
+        client = self.clients[2]
+        first = client_statement_page(client, self.date_from, self.date_to, 3)
+        with self.assertNumQueries(6):  # scan (opening, lines, payments) + page rows (entries, lines, payments)
+            client_statement_page(client, self.date_from, self.date_to, 3)
+
+        # A write from another process: this process's cache versions are not bumped.
+        updated = Payment.objects.filter(client=client, date=self.today).update(amount=Decimal("25.00"))
+        self.assertEqual(updated, 1)
+        page = client_statement_page(client, self.date_from, self.date_to, 3)
+        self.assertEqual(page.totals.credit, first.totals.credit + Decimal("15.00"))
+        self.assertEqual(page.totals.balance, first.totals.balance - Decimal("15.00"))
+        self.assertEqual(page.rows[-1]["running_balance"], page.totals.balance)
+
+        self.client.force_login(get_user_model().objects.create_superuser("pageadmin", password="test12345"))
+        url = reverse("reporting:client_statement", args=[client.pk])
+        response = self.client.get(url, {"date_from": self.date_from.isoformat(), "page": "2"})
+        self.assertEqual(len(response.context["rows"]), 2)
+        self.assertContains(response, "Brought forward from page 1")
+        self.assertContains(response, "Page 2 of 3")
+        self.assertEqual(response.context["closing_balance"], page.totals.balance)
+
+    def test_statement_exports_stream_every_row(self):
+        import csv
+        from io import BytesIO, StringIO
+
+        from openpyxl import load_workbook
+
+        from accounts_core.pdf_utils import STATEMENT_HEADERS
+
+        client = self.clients[2]
+        full = list(iter_client_statement_rows(client, self.date_from, self.date_to))
+        self.client.force_login(get_user_model().objects.create_superuser("exportadmin", password="test12345"))
+        url = reverse("reporting:client_statement", args=[client.pk])
+        params = {"date_from": self.date_from.isoformat(), "date_to": self.date_to.isoformat()}
+
+        response = self.client.get(url, {**params, "format": "xlsx"})
+        values = list(load_workbook(BytesIO(b"".join(response.streaming_content))).active.iter_rows(values_only=True))
+        self.assertEqual(list(values[0]), STATEMENT_HEADERS)
+        self.assertEqual(len(values), len(full) + 1)
+
+        response = self.client.get(url, {**params, "format": "csv"})
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(StringIO(b"".join(response.streaming_content).decode("utf-8").lstrip("\ufeff"))))
+        self.assertEqual(rows[0], STATEMENT_HEADERS)
+        self.assertEqual(len(rows), len(full) + 1)
@@ -7,24 +7,25 @@ from django.shortcuts import get_object_or_404, redirect, render
 from reporting.date_ranges import resolve_report_dates
 from accounts_core.export_names import export_filename, export_period_suffix
 from accounts_core.models import Client, Employee, Supplier
-from accounts_core.pdf_utils import pdf_download_query, render_or_pdf
+from accounts_core.pdf_utils import STATEMENT_HEADERS, pdf_download_query, render_or_pdf, statement_export_rows
 from reporting.salesman import build_brief_report, build_detailed_report
-from reporting.balances import client_ar_balance, supplier_ap_balance, supplier_line_purchases
-from reporting.client_statement_rows import build_client_statement_rows
+from reporting.aging import payables_aging, receivables_aging
+from reporting.balances import client_ar_balances, supplier_ap_balances
+from reporting.client_statement_batch import ClientPeriodTotals, client_period_totals
 from reporting.payment_amounts import payment_usd_amount
 from reporting.statement_refs import payment_ref_url
 from reporting.statement_summary import (
-    _client_period_movement,
     _split_balance_dr_cr,
-    _supplier_period_movement,
     build_client_summary_rows,
     build_supplier_summary_rows,
     profit_summary_row,
     summarize_totals,
     summarize_supplier_totals,
 )
-from reporting.statement_running import annotate_client_statement_rows, annotate_supplier_statement_rows
-from reporting.supplier_statement_rows import build_supplier_statement_rows
+from reporting.statement_pages import statement_page
+from reporting.statement_running import StatementTotals, with_running_balance
+from reporting.statement_stream import CLIENT, SUPPLIER, iter_statement_rows
+from reporting.supplier_statement_batch import SupplierPeriodTotals, supplier_period_totals
 from purchases.models import SupplierBill, SupplierBillLine
 from sales.models import SalesInvoice
 from treasury.models import APAllocation, ARAllocation, MoneyAccount, Payment, ReconciliationRecord
@@ -95,24 +96,48 @@ def reports_home(request):
     )
 
 
-def _client_rows_raw(client, date_from=None, date_to=None):
-    return build_client_statement_rows(client, date_from, date_to)
+def _export_format(request):
+    fmt = (request.GET.get("format") or "").lower()
+    return fmt if fmt in ("pdf", "xlsx", "csv") else None
+
+
+def _statement_context(request, side, party, date_from, date_to):
+    """Statement rows and totals: one page on screen, the full statement for exports.
+
+    XLSX/CSV exports get the rows as a stream that is written while the statement is read.
+    """
+    fmt = _export_format(request)
+    if fmt in ("xlsx", "csv"):
+        rows = with_running_balance(iter_statement_rows(side, party, date_from, date_to))
+        return {"export_headers": STATEMENT_HEADERS, "export_rows": statement_export_rows(rows)}
+    if fmt == "pdf":
+        totals = StatementTotals()
+        rows = list(with_running_balance(iter_statement_rows(side, party, date_from, date_to), totals))
+        page = None
+    else:
+        page = statement_page(side, party, date_from, date_to, request.GET.get("page"))
+        rows, totals = page.rows, page.totals
+    params = request.GET.copy()
+    params.pop("page", None)
+    return {
+        "rows": rows,
+        "page": page,
+        "page_query": params.urlencode(),
+        "tot_dr": totals.debit,
+        "tot_cr": totals.credit,
+        "closing_balance": totals.balance,
+    }
 
 
 def client_statement(request, client_id):
     client = get_object_or_404(Client, pk=client_id)
     df, dt, _ = resolve_report_dates(request)
-    rows = _client_rows_raw(client, df, dt)
-    rows, tot_dr, tot_cr, closing_balance = annotate_client_statement_rows(rows)
     return render_or_pdf(
         request,
         "reporting/client_statement.html",
         {
             "client": client,
-            "rows": rows,
-            "tot_dr": tot_dr,
-            "tot_cr": tot_cr,
-            "closing_balance": closing_balance,
+            **_statement_context(request, CLIENT, client, df, dt),
             "date_from": df,
             "date_to": dt,
             "pdf_report_title": "Statement of Account",
@@ -154,39 +179,8 @@ def all_clients_statement(request):
 
 
 def ar_aging(request):
-    today = date.today()
     df, dt, _ = resolve_report_dates(request)
-    data = []
-    qs = SalesInvoice.objects.filter(status__in=SalesInvoice.reporting_statuses()).select_related("client")
-    if df:
-        qs = qs.filter(issue_date__gte=df)
-    if dt:
-        qs = qs.filter(issue_date__lte=dt)
-    for invoice in qs:
-        allocated = sum([x.allocated_amount for x in invoice.allocations.all()], Decimal("0.00"))
-        due = invoice.grand_total - allocated
-        if due <= 0:
-            continue
-        due_date = invoice.due_date or invoice.issue_date
-        days = (today - due_date).days
-        buckets = {
-            "not_due": Decimal("0.00"),
-            "b0_30": Decimal("0.00"),
-            "b31_60": Decimal("0.00"),
-            "b61_90": Decimal("0.00"),
-            "b90_plus": Decimal("0.00"),
-        }
-        if days < 0:
-            buckets["not_due"] = due
-        elif days <= 30:
-            buckets["b0_30"] = due
-        elif days <= 60:
-            buckets["b31_60"] = due
-        elif days <= 90:
-            buckets["b61_90"] = due
-        else:
-            buckets["b90_plus"] = due
-        data.append({"invoice": invoice, "due": due, **buckets})
+    data, _ = receivables_aging(df, dt)
     return render_or_pdf(
         request,
         "reporting/ar_aging.html",
@@ -212,17 +206,12 @@ def _supplier_pdf_subtitle(supplier):
 def supplier_statement(request, supplier_id):
     supplier = get_object_or_404(Supplier, pk=supplier_id)
     df, dt, _ = resolve_report_dates(request)
-    rows = build_supplier_statement_rows(supplier, df, dt)
-    rows, tot_dr, tot_cr, closing_balance = annotate_supplier_statement_rows(rows)
     return render_or_pdf(
         request,
         "reporting/supplier_statement.html",
         {
             "supplier": supplier,
-            "rows": rows,
-            "tot_dr": tot_dr,
-            "tot_cr": tot_cr,
-            "closing_balance": closing_balance,
+            **_statement_context(request, SUPPLIER, supplier, df, dt),
             "date_from": df,
             "date_to": dt,
             "pdf_report_title": "Supplier Statement",
@@ -264,39 +253,8 @@ def all_suppliers_statement(request):
 
 
 def ap_aging(request):
-    today = date.today()
     df, dt, _ = resolve_report_dates(request)
-    data = []
-    qs = SupplierBill.objects.filter(status=SupplierBill.Status.POSTED).select_related("supplier")
-    if df:
-        qs = qs.filter(bill_date__gte=df)
-    if dt:
-        qs = qs.filter(bill_date__lte=dt)
-    for bill in qs:
-        allocated = sum([x.allocated_amount for x in bill.allocations.all()], Decimal("0.00"))
-        due = bill.grand_total - allocated
-        if due <= 0:
-            continue
-        due_date = bill.due_date or bill.bill_date
-        days = (today - due_date).days
-        buckets = {
-            "not_due": Decimal("0.00"),
-            "b0_30": Decimal("0.00"),
-            "b31_60": Decimal("0.00"),
-            "b61_90": Decimal("0.00"),
-            "b90_plus": Decimal("0.00"),
-        }
-        if days < 0:
-            buckets["not_due"] = due
-        elif days <= 30:
-            buckets["b0_30"] = due
-        elif days <= 60:
-            buckets["b31_60"] = due
-        elif days <= 90:
-            buckets["b61_90"] = due
-        else:
-            buckets["b90_plus"] = due
-        data.append({"bill": bill, "due": due, **buckets})
+    data, _ = payables_aging(df, dt)
     return render_or_pdf(
         request,
         "reporting/ap_aging.html",
@@ -475,20 +433,18 @@ def clients_trial_balance(request):
     if q:
         clients = clients.filter(Q(name_en__icontains=q) | Q(client_code__icontains=q))
     day_before = (df - timedelta(days=1)) if df else None
+    clients = list(clients)
+    ids = [c.pk for c in clients]
+    openings = client_ar_balances(ids, day_before) if df else {}
+    totals = client_period_totals(ids, df, dt)
     rows = []
     for client in clients:
-        opening = client_ar_balance(client, day_before) if df else Decimal("0.00")
-        debit, credit = _client_period_movement(client, df, dt)
+        opening = openings.get(client.pk, Decimal("0.00"))
+        period = totals.get(client.pk) or ClientPeriodTotals()
+        debit, credit = period.debit, period.credit
         closing = opening + debit - credit
         if debit == 0 and credit == 0 and opening == 0 and closing == 0:
             continue
-        inv_q = SalesInvoice.objects.filter(client=client, status__in=SalesInvoice.reporting_statuses())
-        if df:
-            inv_q = inv_q.filter(issue_date__gte=df)
-        if dt:
-            inv_q = inv_q.filter(issue_date__lte=dt)
-        inv_n = inv_q.count()
-        row_curr = inv_q.order_by("-issue_date").values_list("currency", flat=True).first() or "USD"
         bd, bc = _split_balance_dr_cr(closing)
         rows.append(
             {
@@ -496,8 +452,8 @@ def clients_trial_balance(request):
                 "name": client.name_en,
                 "client_id": client.id,
                 "client_code": client.client_code,
-                "invoice_count": inv_n,
-                "curr": row_curr,
+                "invoice_count": period.invoice_count,
+                "curr": period.currency,
                 "opening_dr": _split_balance_dr_cr(opening)[0],
                 "opening_cr": _split_balance_dr_cr(opening)[1],
                 "tot_dr": debit,
@@ -538,20 +494,18 @@ def suppliers_trial_balance(request):
     if q:
         suppliers = suppliers.filter(Q(name__icontains=q) | Q(supplier_code__icontains=q))
     day_before = (df - timedelta(days=1)) if df else None
+    suppliers = list(suppliers)
+    ids = [s.pk for s in suppliers]
+    openings = supplier_ap_balances(ids, day_before) if df else {}
+    totals = supplier_period_totals(ids, df, dt)
     rows = []
     for supplier in suppliers:
-        opening = supplier_ap_balance(supplier, day_before) if df else Decimal("0.00")
-        debit, credit = _supplier_period_movement(supplier, df, dt)
+        opening = openings.get(supplier.pk, Decimal("0.00"))
+        period = totals.get(supplier.pk) or SupplierPeriodTotals()
+        debit, credit = period.debit, period.credit
         closing = opening + credit - debit
         if debit == 0 and credit == 0 and opening == 0 and closing == 0:
             continue
-        bill_q = SupplierBill.objects.filter(supplier=supplier, status=SupplierBill.Status.POSTED)
-        if df:
-            bill_q = bill_q.filter(bill_date__gte=df)
-        if dt:
-            bill_q = bill_q.filter(bill_date__lte=dt)
-        bill_n = bill_q.count()
-        row_curr = bill_q.order_by("-bill_date").values_list("currency", flat=True).first() or "USD"
         bd, bc = _split_balance_dr_cr(closing)
         rows.append(
             {
@@ -559,8 +513,8 @@ def suppliers_trial_balance(request):
                 "name": supplier.name,
                 "supplier_id": supplier.id,
                 "supplier_code": supplier.supplier_code,
-                "bill_count": bill_n,
-                "curr": row_curr,
+                "bill_count": period.bill_count,
+                "curr": period.currency or "USD",
                 "opening_dr": _split_balance_dr_cr(opening)[0],
                 "opening_cr": _split_balance_dr_cr(opening)[1],
                 "tot_dr": debit,
@@ -5,8 +5,13 @@ from django.conf import settings
 from django.db import models, transaction
 from django.utils import timezone
 
+from common.field_tracking import TrackedFieldsMixin
+
+
+class SalesInvoice(TrackedFieldsMixin, models.Model):
+    # Fields that move client/supplier balances (reporting.signals).
+    tracked_fields = ("client_id", "status", "issue_date")
 
-class SalesInvoice(models.Model):
     class Status(models.TextChoices):
         DRAFT = "DRAFT", "Draft"
         POSTED = "POSTED", "Posted"
@@ -172,9 +177,13 @@ class SalesInvoice(models.Model):
             line.line_discount_usd = ((line.line_discount or Decimal("0")) * r).quantize(Decimal("0.0001"))
             line_updates.append(line)
         if line_updates:
+            from reporting.balance_ledger import mark_parties_dirty
+
             SalesInvoiceLine.objects.bulk_update(
                 line_updates, ["sell_price_usd", "cost_price_usd", "line_discount_usd"]
             )
+            # bulk_update sends no post_save; the new USD costs move these suppliers' balances.
+            mark_parties_dirty(supplier_ids={line.supplier_id for line in line_updates})
         self.save(update_fields=["subtotal", "discount_total", "grand_total", "grand_total_usd"])
 
     def _clear_auto_supplier_bills(self):
@@ -319,7 +328,9 @@ class SalesInvoice(models.Model):
         self.save()
 
 
-class SalesInvoiceLine(models.Model):
+class SalesInvoiceLine(TrackedFieldsMixin, models.Model):
+    tracked_fields = ("supplier_id",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     invoice = models.ForeignKey(SalesInvoice, on_delete=models.CASCADE, related_name="lines")
     service_type = models.ForeignKey(
@@ -13,6 +13,8 @@
   let activeUserId = cfg.initialUserId || null;
   let pollTimer = null;
   let validUserIds = [];
+  let hasOlder = false;
+  let loadingOlder = false;
 
   function csrfHeaders() {
     return {
@@ -35,6 +37,7 @@
   function resetThread() {
     stopPolling();
     activeUserId = null;
+    hasOlder = false;
     placeholder.hidden = false;
     thread.hidden = true;
     threadHead.textContent = '';
@@ -73,54 +76,117 @@
     return div.innerHTML;
   }
 
+  function bubbleHtml(m) {
+    const cls = m.is_mine ? 'is-mine' : 'is-theirs';
+    return (
+      '<div class="crm-chat__bubble ' + cls + '" data-id="' + m.id + '">' +
+      escapeHtml(m.body) +
+      '<div class="crm-chat__bubble-time">' + formatTime(m.created_at) + '</div>' +
+      '</div>'
+    );
+  }
+
   function renderMessages(messages) {
-    messagesEl.innerHTML = messages.map(function (m) {
-      const cls = m.is_mine ? 'is-mine' : 'is-theirs';
-      return (
-        '<div class="crm-chat__bubble ' + cls + '">' +
-        escapeHtml(m.body) +
-        '<div class="crm-chat__bubble-time">' + formatTime(m.created_at) + '</div>' +
-        '</div>'
-      );
-    }).join('');
+    messagesEl.innerHTML = messages.map(bubbleHtml).join('');
     messagesEl.scrollTop = messagesEl.scrollHeight;
   }
 
-  function loadThread() {
-    if (!activeUserId) return;
-    if (cfg.currentUserId && activeUserId === cfg.currentUserId) {
-      resetThread();
-      return;
-    }
-    fetch(cfg.threadUrlBase + activeUserId + '/', { credentials: 'same-origin' })
+  function appendMessage(m) {
+    if (messagesEl.querySelector('[data-id="' + m.id + '"]')) return;
+    messagesEl.insertAdjacentHTML('beforeend', bubbleHtml(m));
+    messagesEl.scrollTop = messagesEl.scrollHeight;
+  }
+
+  function prependMessages(messages) {
+    const fromBottom = messagesEl.scrollHeight - messagesEl.scrollTop;
+    messagesEl.insertAdjacentHTML('afterbegin', messages.map(bubbleHtml).join(''));
+    messagesEl.scrollTop = messagesEl.scrollHeight - fromBottom;
+  }
+
+  function edgeMessageId(last) {
+    const bubbles = messagesEl.querySelectorAll('.crm-chat__bubble[data-id]');
+    if (!bubbles.length) return null;
+    return bubbles[last ? bubbles.length - 1 : 0].getAttribute('data-id');
+  }
+
+  function fetchThread(params) {
+    const userId = activeUserId;
+    const query = params ? '?' + new URLSearchParams(params).toString() : '';
+    return fetch(cfg.threadUrlBase + userId + '/' + query, { credentials: 'same-origin' })
       .then(function (r) {
         if (!r.ok) {
-          resetThread();
+          if (userId === activeUserId) resetThread();
           return null;
         }
         return r.json();
       })
       .then(function (data) {
-        if (!data || !data.user) return;
-        threadHead.textContent = data.user.name;
-        renderMessages(data.messages || []);
+        // Ignore answers for a thread the user has already left.
+        return data && data.user && userId === activeUserId ? data : null;
       })
       .catch(function () {
         resetThread();
+        return null;
       });
   }
 
+  function loadThread() {
+    if (!activeUserId) return;
+    if (cfg.currentUserId && activeUserId === cfg.currentUserId) {
+      resetThread();
+      return;
+    }
+    fetchThread(null).then(function (data) {
+      if (!data) return;
+      threadHead.textContent = data.user.name;
+      hasOlder = data.has_more;
+      renderMessages(data.messages || []);
+    });
+  }
+
+  function loadNewer() {
+    const lastId = edgeMessageId(true);
+    if (!lastId) {
+      loadThread();
+      return;
+    }
+    fetchThread({ after_id: lastId }).then(function (data) {
+      if (!data) return;
+      (data.messages || []).forEach(appendMessage);
+      if (data.has_more) loadNewer();
+    });
+  }
+
+  function loadOlder() {
+    const firstId = edgeMessageId(false);
+    if (!hasOlder || loadingOlder || !firstId) return;
+    loadingOlder = true;
+    fetchThread({ before_id: firstId }).then(function (data) {
+      loadingOlder = false;
+      if (!data) return;
+      hasOlder = data.has_more;
+      prependMessages(data.messages || []);
+    });
+  }
+
+  messagesEl.addEventListener('scroll', function () {
+    if (messagesEl.scrollTop < 40) loadOlder();
+  });
+
   function selectUser(userId) {
     if (!userId || (cfg.currentUserId && userId === cfg.currentUserId)) return;
     if (validUserIds.length && validUserIds.indexOf(userId) === -1) return;
 
     activeUserId = userId;
+    hasOlder = false;
+    messagesEl.innerHTML = '';
     placeholder.hidden = true;
     thread.hidden = false;
     loadUsers();
     loadThread();
     stopPolling();
-    pollTimer = setInterval(loadThread, 8000);
+    // With the notification event stream open, new messages arrive as crm:chat events.
+    if (!window.CRM_EVENTS_ACTIVE) pollTimer = setInterval(loadNewer, 8000);
   }
 
   function loadUsers() {
@@ -145,12 +211,29 @@
       .then(function (data) {
         if (data.status === 'ok') {
           input.value = '';
-          loadThread();
+          if (window.CRM_EVENTS_ACTIVE) appendMessage(data.message);
+          else loadNewer();
           loadUsers();
         }
       });
   });
 
+  window.addEventListener('crm:chat', function (e) {
+    const m = e.detail;
+    const otherId = m.is_mine ? m.recipient_id : m.sender_id;
+    if (activeUserId && otherId === activeUserId) {
+      appendMessage(m);
+      if (!m.is_mine) {
+        fetch(cfg.threadUrlBase + activeUserId + '/read/', {
+          method: 'POST',
+          headers: csrfHeaders(),
+          credentials: 'same-origin',
+        });
+      }
+    }
+    loadUsers();
+  });
+
   loadUsers().then(function () {
     if (
       activeUserId &&
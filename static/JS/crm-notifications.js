@@ -10,9 +10,13 @@
   const markAllBtn = document.getElementById('crmNotifyMarkAll');
   const broadcastForm = document.getElementById('crmNotifyBroadcast');
 
-  const COUNT_INTERVAL_MS = 90000;
   const OPEN_INTERVAL_MS = 45000;
+  // Hidden tabs poll this many times less often than the server-advertised interval.
+  const HIDDEN_BACKOFF = 4;
+  let countIntervalMs = 90000;
   let countTimer = null;
+  let streaming = false;
+  let countGeneration = 0;
   let openTimer = null;
   let listLoaded = false;
   let pushSubscribed = false;
@@ -83,13 +87,24 @@
   }
 
   function countUrl() {
+    if (cfg.countUrl) return cfg.countUrl;
     const sep = cfg.listUrl.indexOf('?') >= 0 ? '&' : '?';
     return cfg.listUrl + sep + 'count_only=1';
   }
 
+  function applyPollInterval(seconds) {
+    const value = Number(seconds);
+    if (value > 0) countIntervalMs = value * 1000;
+  }
+
+  // The endpoint sends an ETag with no-cache, so the browser revalidates and
+  // an unchanged count comes back as a bodiless 304 served from its cache.
   function fetchCount() {
     return fetch(countUrl(), { credentials: 'same-origin' })
-      .then(function (r) { return r.json(); })
+      .then(function (r) {
+        applyPollInterval(r.headers.get('X-Poll-Interval'));
+        return r.json();
+      })
       .then(function (data) {
         setBadge((data.unread_count || 0) + (data.unread_messages || 0));
       })
@@ -112,14 +127,25 @@
       });
   }
 
+  function nextCountDelay() {
+    return document.visibilityState === 'hidden' ? countIntervalMs * HIDDEN_BACKOFF : countIntervalMs;
+  }
+
   function startCountPolling() {
     stopCountPolling();
-    countTimer = setInterval(fetchCount, COUNT_INTERVAL_MS);
+    if (streaming) return;
+    const generation = countGeneration;
+    countTimer = setTimeout(function tick() {
+      fetchCount().then(function () {
+        if (generation === countGeneration) countTimer = setTimeout(tick, nextCountDelay());
+      });
+    }, nextCountDelay());
   }
 
   function stopCountPolling() {
+    countGeneration += 1;
     if (countTimer) {
-      clearInterval(countTimer);
+      clearTimeout(countTimer);
       countTimer = null;
     }
   }
@@ -356,9 +382,31 @@
     }).catch(function () {});
   }
 
-  // Collapsed by default: lightweight badge poll only.
-  fetchCount();
-  startCountPolling();
+  // Server-sent events replace the badge poll: counts, new notifications and
+  // chat messages arrive as they happen (chat pages listen for crm:chat).
+  function startEventStream() {
+    if (!cfg.eventsUrl || !window.EventSource) return false;
+    const source = new EventSource(cfg.eventsUrl, { withCredentials: true });
+    source.addEventListener('counts', function (e) {
+      const data = JSON.parse(e.data);
+      setBadge((data.unread_count || 0) + (data.unread_messages || 0));
+    });
+    source.addEventListener('notification', function () {
+      if (isOpen()) fetchNotifications();
+    });
+    source.addEventListener('chat', function (e) {
+      window.dispatchEvent(new CustomEvent('crm:chat', { detail: JSON.parse(e.data) }));
+    });
+    window.CRM_EVENTS_ACTIVE = true;
+    return true;
+  }
+
+  streaming = startEventStream();
+  if (!streaming) {
+    // Collapsed by default: lightweight badge poll only.
+    fetchCount();
+    startCountPolling();
+  }
 
   window.setTimeout(bootstrapPush, 800);
 
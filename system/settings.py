@@ -83,6 +83,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'accounting_bridge.middleware.AccountingAccessMiddleware',
+    'accounting_bridge.middleware.DeferredAccountingSyncMiddleware',
     'reporting.middleware.ReportDateDefaultsMiddleware',
 ]
 
@@ -171,6 +172,24 @@ STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesSto
 if 'test' in os.sys.argv:
     STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
+# Cache backend is configurable per host. The default is per-process memory; when
+# several workers serve the site (or invoice_sync_worker runs), point every process
+# at a shared backend, e.g.
+# CRM_CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache and
+# CRM_CACHE_LOCATION=crm_cache (then run: python manage.py createcachetable).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CRM_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CRM_CACHE_LOCATION', 'ghaith-crm'),
+    },
+}
+
+# Accounting dashboard builder results (reporting.dashboard_cache); 0 disables caching.
+DASHBOARD_CACHE_ALIAS = 'default'
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', '600'))
+if 'test' in os.sys.argv:
+    DASHBOARD_CACHE_TIMEOUT = 0
+
 # Browser push (Web Push / VAPID). Generate with: python manage.py generate_vapid_keys --write
 def _load_vapid_env():
     vapid_file = BASE_DIR / 'deploy' / 'vapid.env'
@@ -194,8 +213,48 @@ VAPID_ADMIN_EMAIL = os.environ.get('VAPID_ADMIN_EMAIL', 'mailto:admin@ghaithtrav
 CRM_SITE_URL = os.environ.get('CRM_SITE_URL', 'http://127.0.0.1:8000')
 CRM_PUSH_ICON_URL = '/static/img/favicon.svg'
 
+# Browser push outbox, drained by: python manage.py push_worker
+PUSH_WORKER_THREADS = int(os.environ.get('PUSH_WORKER_THREADS', '8'))
+PUSH_WORKER_BATCH_SIZE = int(os.environ.get('PUSH_WORKER_BATCH_SIZE', '200'))
+PUSH_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('PUSH_OUTBOX_MAX_ATTEMPTS', '6'))
+PUSH_OUTBOX_RETRY_BASE_SECONDS = 30
+PUSH_OUTBOX_RETRY_MAX_SECONDS = 3600
+PUSH_OUTBOX_LEASE_SECONDS = 300
+PUSH_OUTBOX_RETENTION_DAYS = 7
+
+# Notification badge poll: interval advertised to browsers, and max age of cached unread counters.
+NOTIFICATION_POLL_SECONDS = int(os.environ.get('NOTIFICATION_POLL_SECONDS', '90'))
+UNREAD_COUNTER_MAX_AGE_SECONDS = 600
+# Server-sent event stream (/notifications/api/events/) when served over ASGI.
+NOTIFICATION_STREAM_POLL_SECONDS = 2
+NOTIFICATION_STREAM_MAX_SECONDS = 300
+
+# Rows per page on client/supplier statements (PDF/XLSX exports are never paginated).
+STATEMENT_PAGE_SIZE = int(os.environ.get('STATEMENT_PAGE_SIZE', '200'))
+
+# Rows sampled to size XLSX export columns (the rest are streamed without being measured).
+XLSX_WIDTH_SAMPLE_ROWS = int(os.environ.get('XLSX_WIDTH_SAMPLE_ROWS', '200'))
+
+# Chat thread API page size (?limit= is capped at CHAT_PAGE_MAX).
+CHAT_PAGE_SIZE = 50
+CHAT_PAGE_MAX = 200
+
+# Reminder jobs, run by: python manage.py run_scheduler
+SCHEDULER_LOCK_SECONDS = 600
+SCHEDULER_FULL_RUN_MINUTES = int(os.environ.get('SCHEDULER_FULL_RUN_MINUTES', '60'))
+SCHEDULER_RUN_LOG_DAYS = 30
+
+# CRM → accounting invoice sync queue, drained by: python manage.py invoice_sync_worker
+ACCOUNTING_SYNC_BATCH_SIZE = int(os.environ.get('ACCOUNTING_SYNC_BATCH_SIZE', '50'))
+ACCOUNTING_SYNC_MAX_ATTEMPTS = 5
+ACCOUNTING_SYNC_RETRY_BASE_SECONDS = 60
+ACCOUNTING_SYNC_RETRY_MAX_SECONDS = 3600
+ACCOUNTING_SYNC_LEASE_SECONDS = 600
+
 # Shared secret for WhatsApp AI dashboard → CRM lead sync API (header: X-API-Key)
 EXTERNAL_API_KEY = os.environ.get('EXTERNAL_API_KEY', 'GhaithDashboard-2026-xK9mP2vL7nQ4wR8sT')
+# Max lead payloads accepted by POST /api/leads/sync-batch/ in one request.
+LEAD_SYNC_BATCH_LIMIT = int(os.environ.get('LEAD_SYNC_BATCH_LIMIT', '500'))
 
 # Embedded accounting module (Ghaith branding — no Sama references)
 COMPANY_LEGAL_NAME = os.environ.get('COMPANY_LEGAL_NAME', 'Ghaith Travel')
@@ -1,119 +1,213 @@
 """Sync dashboard Event records with LeadTask services and client payments."""
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Q
 from django.urls import reverse
 
 from dashboard.models import Event
+from display.models import Lead
+from tasks.models import LeadTask
+
+
+# Event columns derived from the source rows; reconcile_events never touches the others.
+SYNCED_FIELDS = (
+    'event_type', 'user_id', 'title', 'description', 'when', 'leadtask_id', 'done', 'service_id', 'payment_id',
+)
+
+
+@dataclass
+class EventSyncStats:
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+    def __iadd__(self, other):
+        self.created += other.created
+        self.updated += other.updated
+        self.deleted += other.deleted
+        return self
 
 
 def _invoice_url(leadtask_id):
     return reverse('edit_lead_tasks', kwargs={'pk': leadtask_id})
 
 
-def sync_service_event(service):
-    """Create or update supplier purchase calendar event for a service."""
-    if not service.due_time:
-        if hasattr(service, 'calendar_event'):
-            try:
-                service.calendar_event.delete()
-            except Event.DoesNotExist:
-                pass
-        return
+def _as_date(value):
+    return value.date() if hasattr(value, 'date') else value
+
 
-    leadtask = service.leadtask
+def _service_event(service, leadtask, invoice_url):
+    """Desired supplier purchase event for a service, or None when it has no due time."""
+    if not service.due_time:
+        return None
     lead = leadtask.lead
-    when_date = service.due_time.date() if hasattr(service.due_time, 'date') else service.due_time
     net = service.issue_price or service.net or ''
-    description = (
-        f"Service: {service.service_name}\n"
-        f"Supplier: {service.supplier}\n"
-        f"Net: ${net}\n"
-        f"Client: {lead.name} ({lead.phone})\n"
-        f"Invoice: {_invoice_url(leadtask.pk)}"
-    )
-    title = f"{service.supplier or 'Supplier'} — {lead.name} (${net})"
-    defaults = {
+    return {
         'event_type': 'followup',
-        'user': leadtask.assigned_to,
-        'title': title,
-        'description': description,
-        'when': when_date,
-        'leadtask': leadtask,
+        'user_id': leadtask.assigned_to_id,
+        'title': f"{service.supplier or 'Supplier'} — {lead.name} (${net})",
+        'description': (
+            f"Service: {service.service_name}\n"
+            f"Supplier: {service.supplier}\n"
+            f"Net: ${net}\n"
+            f"Client: {lead.name} ({lead.phone})\n"
+            f"Invoice: {invoice_url}"
+        ),
+        'when': _as_date(service.due_time),
+        'leadtask_id': leadtask.pk,
         'done': service.is_checked,
+        'service_id': service.pk,
+        'payment_id': None,
     }
-    try:
-        event = service.calendar_event
-        for key, val in defaults.items():
-            setattr(event, key, val)
-        event.save()
-    except Event.DoesNotExist:
-        Event.objects.create(service=service, **defaults)
 
 
-def sync_payment_event(payment):
-    """Create or update client payment calendar event."""
-    leadtask = payment.leadtask
+def _payment_event(payment, leadtask, invoice_url):
+    """Desired client payment (or refund) event for a payment."""
     lead = leadtask.lead
-    when_date = payment.date.date() if hasattr(payment.date, 'date') else payment.date
     label = 'Refund' if payment.is_refund else 'Client payment'
-    description = (
-        f"{label}: ${payment.amount}\n"
-        f"Client: {lead.name} ({lead.phone})\n"
-        f"Invoice: {_invoice_url(leadtask.pk)}"
-    )
-    title = f"{label}: {lead.name} (${payment.amount})"
-    defaults = {
+    return {
         'event_type': 'task',
-        'user': leadtask.assigned_to,
-        'title': title,
-        'description': description,
-        'when': when_date,
-        'leadtask': leadtask,
-        'payment': payment,
+        'user_id': leadtask.assigned_to_id,
+        'title': f"{label}: {lead.name} (${payment.amount})",
+        'description': (
+            f"{label}: ${payment.amount}\n"
+            f"Client: {lead.name} ({lead.phone})\n"
+            f"Invoice: {invoice_url}"
+        ),
+        'when': _as_date(payment.date),
+        'leadtask_id': leadtask.pk,
         'done': payment.is_checked,
+        'service_id': None,
+        'payment_id': payment.pk,
     }
-    try:
-        event = payment.calendar_event
-        for key, val in defaults.items():
-            setattr(event, key, val)
-        event.save()
-    except Event.DoesNotExist:
-        Event.objects.create(**defaults)
 
 
-def sync_travel_event(leadtask):
-    """Create or update calendar event when a client has a travel date on an order."""
+def _travel_event(leadtask, invoice_url):
+    """Desired travel event for an order, or None without a travel date or when cancelled."""
     if not leadtask.travel_date or leadtask.status == 'cancelled':
-        Event.objects.filter(leadtask=leadtask, event_type='user').delete()
-        return
-
+        return None
     lead = leadtask.lead
-    when_date = (
-        leadtask.travel_date.date()
-        if hasattr(leadtask.travel_date, 'date')
-        else leadtask.travel_date
-    )
-    title = f"Travelling: {lead.name}"
-    description = (
-        f"Client: {lead.name}\n"
-        f"Destination: {lead.destination or '—'}\n"
-        f"Phone: {lead.phone}\n"
-        f"Invoice: {_invoice_url(leadtask.pk)}"
-    )
-    defaults = {
-        'user': leadtask.assigned_to,
-        'title': title,
-        'description': description,
-        'when': when_date,
+    return {
+        'event_type': 'user',
+        'user_id': leadtask.assigned_to_id,
+        'title': f"Travelling: {lead.name}",
+        'description': (
+            f"Client: {lead.name}\n"
+            f"Destination: {lead.destination or '—'}\n"
+            f"Phone: {lead.phone}\n"
+            f"Invoice: {invoice_url}"
+        ),
+        'when': _as_date(leadtask.travel_date),
+        'leadtask_id': leadtask.pk,
         'done': leadtask.status == 'done',
+        'service_id': None,
+        'payment_id': None,
     }
-    event, created = Event.objects.get_or_create(
-        leadtask=leadtask,
-        event_type='user',
-        defaults=defaults,
-    )
-    if not created:
-        for key, val in defaults.items():
-            setattr(event, key, val)
-        event.save()
+
+
+def reconcile_events(*, services=(), payments=(), leadtasks=()):
+    """Bring the calendar events of a batch of services, payments and orders in line with them.
+
+    Computes the desired event for each row (travel events for `leadtasks`),
+    loads the existing ones in one query and applies only the differences
+    with bulk_create / bulk_update / a single delete. Orders and their leads
+    are loaded once for the whole batch. Returns EventSyncStats.
+    """
+    services = [s for s in services if s.pk]
+    payments = [p for p in payments if p.pk]
+    leadtask_ids = {s.leadtask_id for s in services} | {p.leadtask_id for p in payments}
+    leadtask_ids |= {lt.pk for lt in leadtasks}
+    if not leadtask_ids:
+        return EventSyncStats()
+
+    # Orders passed in are used as-is (signal handlers pass the instance just saved); the rest load with their leads.
+    orders = {lt.pk: lt for lt in leadtasks}
+    missing = leadtask_ids - orders.keys()
+    if missing:
+        orders.update(LeadTask.objects.select_related('lead').in_bulk(missing))
+    uncached = {lt.lead_id for lt in leadtasks if not LeadTask.lead.is_cached(lt)}
+    if uncached:
+        leads = Lead.objects.in_bulk(uncached)
+        for lt in leadtasks:
+            if lt.lead_id in leads:
+                lt.lead = leads[lt.lead_id]
+    urls = {pk: _invoice_url(pk) for pk in orders}
+
+    desired = {}
+    for service in services:
+        if service.leadtask_id in orders:
+            desired[('service', service.pk)] = _service_event(service, orders[service.leadtask_id], urls[service.leadtask_id])
+    for payment in payments:
+        if payment.leadtask_id in orders:
+            desired[('payment', payment.pk)] = _payment_event(payment, orders[payment.leadtask_id], urls[payment.leadtask_id])
+    for leadtask in leadtasks:
+        if leadtask.pk in orders:
+            desired[('travel', leadtask.pk)] = _travel_event(orders[leadtask.pk], urls[leadtask.pk])
+
+    scope = Q()
+    if services:
+        scope |= Q(service_id__in=[s.pk for s in services])
+    if payments:
+        scope |= Q(payment_id__in=[p.pk for p in payments])
+    if leadtasks:
+        scope |= Q(leadtask_id__in=[lt.pk for lt in leadtasks], event_type='user')
+
+    existing, stale = {}, []
+    for event in Event.objects.filter(scope).order_by('pk'):
+        if event.service_id:
+            key = ('service', event.service_id)
+        elif event.payment_id:
+            key = ('payment', event.payment_id)
+        else:
+            key = ('travel', event.leadtask_id)
+        if key in existing:
+            stale.append(event.pk)  # duplicate travel event
+        else:
+            existing[key] = event
+
+    to_create, to_update, changed_fields = [], [], set()
+    for key, fields in desired.items():
+        event = existing.pop(key, None)
+        if fields is None:
+            if event is not None:
+                stale.append(event.pk)
+            continue
+        if event is None:
+            to_create.append(Event(**fields))
+            continue
+        changed = [name for name in SYNCED_FIELDS if getattr(event, name) != fields[name]]
+        if changed:
+            for name in changed:
+                setattr(event, name, fields[name])
+            to_update.append(event)
+            changed_fields.update(changed)
+
+    if not (stale or to_update or to_create):
+        return EventSyncStats()
+    with transaction.atomic():
+        if stale:
+            Event.objects.filter(pk__in=stale).delete()
+        if to_update:
+            Event.objects.bulk_update(to_update, sorted(changed_fields), batch_size=500)
+        if to_create:
+            Event.objects.bulk_create(to_create, batch_size=500)
+    return EventSyncStats(created=len(to_create), updated=len(to_update), deleted=len(stale))
+
+
+def sync_service_event(service):
+    """Create, update or delete the supplier purchase calendar event for a service."""
+    return reconcile_events(services=[service])
+
+
+def sync_payment_event(payment):
+    """Create or update client payment calendar event."""
+    return reconcile_events(payments=[payment])
+
+
+def sync_travel_event(leadtask):
+    """Create or update calendar event when a client has a travel date on an order."""
+    return reconcile_events(leadtasks=[leadtask])
 
 
 def sync_followup_event(lead, user=None):
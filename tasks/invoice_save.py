@@ -1,12 +1,13 @@
 """Unified save helpers for edit leadtask / invoice page."""
 from django.shortcuts import get_object_or_404
 
-from .calendar_sync import sync_payment_event, sync_service_event
+from .calendar_sync import reconcile_events, sync_payment_event
 from .forms import LeadTaskForm, ServiceForm
 from .models import LeadTask, Payment, Service
 
 
 def _save_existing_services(request, leadtask, seen_ids):
+    saved_services = []
     for pk in seen_ids:
         try:
             service = Service.objects.get(pk=pk, leadtask=leadtask)
@@ -25,14 +26,14 @@ def _save_existing_services(request, leadtask, seen_ids):
             'send_to_client': request.POST.get(f'service_{pk}_send_to_client') == 'on',
         }, instance=service)
         if form.is_valid():
-            saved = form.save()
-            sync_service_event(saved)
+            saved_services.append(form.save())
+    return saved_services
 
 
 def _save_new_services(request, leadtask):
     names = request.POST.getlist('service_name[]')
     if not names:
-        return
+        return []
     suppliers = request.POST.getlist('supplier[]')
     details = request.POST.getlist('details[]')
     nets = request.POST.getlist('net[]')
@@ -41,6 +42,7 @@ def _save_new_services(request, leadtask):
     due_times = request.POST.getlist('due_time[]')
     voucher_ids = request.POST.getlist('voucher_id[]')
     send_to_clients = request.POST.getlist('send_to_client[]')
+    created = []
     for i in range(len(names)):
         form = ServiceForm({
             'service_name': names[i] if i < len(names) else '',
@@ -57,7 +59,8 @@ def _save_new_services(request, leadtask):
             service = form.save(commit=False)
             service.leadtask = leadtask
             service.save()
-            sync_service_event(service)
+            created.append(service)
+    return created
 
 
 def save_invoice_from_post(request, leadtask):
@@ -115,8 +118,9 @@ def save_invoice_from_post(request, leadtask):
             sid = key[len(prefix):].split('_')[0]
             if sid.isdigit():
                 seen_ids.add(int(sid))
-    _save_existing_services(request, updated, seen_ids)
-    _save_new_services(request, updated)
+    services = _save_existing_services(request, updated, seen_ids)
+    services += _save_new_services(request, updated)
+    reconcile_events(services=services)
 
     if old_status != 'cancelled' and updated.status == 'cancelled':
         refund_amount = request.POST.get('refund_amount', '').strip()
@@ -144,6 +148,7 @@ def save_invoice_from_post(request, leadtask):
 
 def sync_accounting_after_crm_invoice_save(leadtask):
     """Push CRM order totals (including lead.selling_price) to linked accounting invoice."""
-    from accounting_bridge.services.invoices import sync_crm_leadtask_to_accounting
+    from accounting_bridge.services.deferred_sync import mark_leadtask_dirty
 
-    sync_crm_leadtask_to_accounting(leadtask)
+    # Joins the sync already queued by this request's order/service saves.
+    mark_leadtask_dirty(leadtask.pk)
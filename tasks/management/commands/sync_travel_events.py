@@ -1,16 +1,48 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 
-from tasks.calendar_sync import sync_travel_event
-from tasks.models import LeadTask
+from tasks.calendar_sync import EventSyncStats, reconcile_events
+from tasks.models import LeadTask, Payment, Service
 
 
 class Command(BaseCommand):
-    help = 'Create/update calendar travel events for orders with a travel date.'
+    help = (
+        'Reconcile calendar travel events with orders (creates, updates and removes only what changed). '
+        'Use --all to also reconcile supplier-payment and client-payment events.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Also reconcile service and payment events')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per reconcile batch (default 500)')
 
     def handle(self, *args, **options):
-        qs = LeadTask.objects.filter(travel_date__isnull=False).select_related('lead', 'assigned_to')
+        batch_size = max(1, options['batch_size'])
+        stats = EventSyncStats()
+        # Orders with a travel date, plus those still holding a travel event that may now be stale.
+        orders = LeadTask.objects.filter(
+            Q(travel_date__isnull=False) | Q(calendar_events__event_type='user')
+        ).distinct().order_by('pk')
+        count = self._run(orders, 'leadtasks', batch_size, stats)
+        self.stdout.write(f'Checked {count} order(s).')
+        if options['all']:
+            count = self._run(Service.objects.order_by('pk'), 'services', batch_size, stats)
+            self.stdout.write(f'Checked {count} service(s).')
+            count = self._run(Payment.objects.order_by('pk'), 'payments', batch_size, stats)
+            self.stdout.write(f'Checked {count} payment(s).')
+        self.stdout.write(self.style.SUCCESS(
+            f'Calendar events: {stats.created} created, {stats.updated} updated, {stats.deleted} deleted.'
+        ))
+
+    def _run(self, queryset, kind, batch_size, stats):
         count = 0
-        for leadtask in qs:
-            sync_travel_event(leadtask)
-            count += 1
-        self.stdout.write(self.style.SUCCESS(f'Synced travel calendar events for {count} order(s).'))
+        batch = []
+        for row in queryset.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                stats += reconcile_events(**{kind: batch})
+                count += len(batch)
+                batch = []
+        if batch:
+            stats += reconcile_events(**{kind: batch})
+            count += len(batch)
+        return count
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-17 18:29
+
+from django.db import migrations, models
+
+from display.money import backfill_money_amounts
+
+
+def backfill_amounts(apps, schema_editor):
+    backfill_money_amounts(
+        apps.get_model('tasks', 'Service'),
+        {'net': 'net_amount', 'issue_price': 'issue_price_amount', 'selling': 'selling_amount'},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_leadtask_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='issue_price_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='net_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='selling_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.RunPython(backfill_amounts, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,9 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from common.field_tracking import TrackedFieldsMixin
+from display.money import sync_money_amounts
+
 
 class Tag(models.Model):
     tag_name = models.CharField(max_length=200)
@@ -37,7 +40,9 @@ class Task(models.Model):
 # installment ??
 # checklist
 
-class LeadTask(models.Model):
+class LeadTask(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('assigned_to_id',)
+
     PAYMENT_CH = [
         ('installment', 'Installment'),
         ('full', 'Full'),
@@ -99,6 +104,32 @@ class Service(models.Model):
     processed = models.BooleanField(default=False)
     send_to_client = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True, null=True)  # Add this line
+    net_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False)
+    issue_price_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False)
+    selling_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False)
+
+    # Free-text money field -> its numeric column, kept in sync on save (see display.money).
+    MONEY_FIELDS = {
+        'net': 'net_amount',
+        'issue_price': 'issue_price_amount',
+        'selling': 'selling_amount',
+    }
+
+    def save(self, *args, **kwargs):
+        sync_money_amounts(self, self.MONEY_FIELDS)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = [self.MONEY_FIELDS[name] for name in update_fields if name in self.MONEY_FIELDS]
+            if derived:
+                kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+
+    @property
+    def effective_net_amount(self):
+        """Issue price overrides net when set (numeric twin of tasks.constants.effective_service_net)."""
+        if (self.issue_price or '').strip():
+            return self.issue_price_amount
+        return self.net_amount
 
     def __str__(self):
         return self.service_name
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from dashboard.models import Event
+from display.models import Lead
+from tasks.calendar_sync import reconcile_events
+from tasks.models import LeadTask, Payment, Service
+
+
+class CalendarReconcileTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="agent", password="pw")
+        self.travel = timezone.make_aware(datetime(2026, 7, 1, 9, 0))
+        self.orders = []
+        for i in range(3):
+            lead = Lead.objects.create(name=f"Client {i}", phone="70111222", country_code="+961", assigned_to=self.user)
+            self.orders.append(
+                LeadTask.objects.create(lead=lead, assigned_to=self.user, status="progress", travel_date=self.travel)
+            )
+
+    def test_batch_creates_then_only_applies_differences(self):
+        Event.objects.all().delete()
+        services = Service.objects.bulk_create([
+            Service(leadtask=order, supplier="Air", net="100", due_time=self.travel) for order in self.orders
+        ])
+        payment = Payment.objects.create(leadtask=self.orders[0], amount=50, date=self.travel)
+
+        stats = reconcile_events(services=services, payments=[payment], leadtasks=self.orders)
+        self.assertEqual((stats.created, stats.updated, stats.deleted), (7, 0, 0))
+        self.assertEqual(Event.objects.get(service=services[0]).title, "Air — Client 0 ($100)")
+
+        with self.assertNumQueries(1):  # existing events only: orders and leads are already loaded, nothing to write
+            stats = reconcile_events(services=services, payments=[payment], leadtasks=self.orders)
+        self.assertEqual((stats.created, stats.updated, stats.deleted), (0, 0, 0))
+
+        services[1].is_checked = True
+        services[2].due_time = None
+        stats = reconcile_events(services=services)
+        self.assertEqual((stats.created, stats.updated, stats.deleted), (0, 1, 1))
+        self.assertTrue(Event.objects.get(service=services[1]).done)
+        self.assertFalse(Event.objects.filter(service=services[2]).exists())
+
+    def test_travel_signal_and_duplicate_cleanup(self):
+        order = self.orders[0]
+        self.assertEqual(Event.objects.filter(leadtask=order, event_type="user").count(), 1)
+        Event.objects.create(user=self.user, title="dup", description="", when=self.travel.date(),
+                             leadtask=order, event_type="user")
+
+        order.travel_date = self.travel + timedelta(days=3)
+        order.save()
+        event = Event.objects.get(leadtask=order, event_type="user")
+        self.assertEqual(event.when, (self.travel + timedelta(days=3)).date())
+
+        order.status = "cancelled"
+        order.save()
+        self.assertFalse(Event.objects.filter(leadtask=order, event_type="user").exists())
+
+    def test_command_reconciles_stale_and_missing_events(self):
+        Event.objects.filter(leadtask=self.orders[0]).delete()
+        LeadTask.objects.filter(pk=self.orders[1].pk).update(travel_date=None)
+
+        out = StringIO()
+        call_command("sync_travel_events", "--batch-size", "2", stdout=out)
+        self.assertIn("1 created, 0 updated, 1 deleted", out.getvalue())
+        self.assertEqual(
+            set(Event.objects.filter(event_type="user").values_list("leadtask_id", flat=True)),
+            {self.orders[0].pk, self.orders[2].pk},
+        )
@@ -7,6 +7,7 @@ from .models import (
     Task, LeadTask, Attachment, Service, Payment, TaskAttachment,
     Supplier, ClientMediaUploadLink, ClientMediaFile,
 )
+from display.money import sync_money_amounts
 from .forms import (
     TaskForm, LeadTaskForm, PaymentForm, AttachmentForm, ServiceForm,
     TaskAttachmentForm, SupplierForm,
@@ -30,7 +31,7 @@ from django.http import HttpResponse
 from datetime import datetime  # Make sure this line is included
 from dashboard.models import Event
 from .constants import get_supplier_choices, get_service_choices, effective_service_net, parse_money, service_has_issue_override
-from .calendar_sync import sync_payment_event, sync_service_event
+from .calendar_sync import reconcile_events, sync_payment_event, sync_service_event
 from .invoice_save import save_invoice_from_post
 from .datetime_safety import get_leadtask_for_edit, services_for_leadtask
 from django.db.models.signals import post_save
@@ -256,6 +257,7 @@ def save_all_services(request, leadid):
             sid = key[len(prefix):].split('_')[0]
             if sid.isdigit():
                 seen_ids.add(int(sid))
+    saved_services = []
     for pk in seen_ids:
         try:
             service = Service.objects.get(pk=pk, leadtask=leadtask)
@@ -274,8 +276,7 @@ def save_all_services(request, leadid):
             'send_to_client': request.POST.get('service_%s_send_to_client' % pk) == 'on',
         }, instance=service)
         if form.is_valid():
-            saved = form.save()
-            sync_service_event(saved)
+            saved_services.append(form.save())
     # New rows: service_name[], supplier[], ...
     names = request.POST.getlist('service_name[]')
     suppliers = request.POST.getlist('supplier[]')
@@ -302,9 +303,10 @@ def save_all_services(request, leadid):
             service.leadtask = leadtask
             new_services.append(service)
     if new_services:
-        Service.objects.bulk_create(new_services)
         for service in new_services:
-            create_event_for_service(service)
+            sync_money_amounts(service, Service.MONEY_FIELDS)
+        Service.objects.bulk_create(new_services)
+    reconcile_events(services=saved_services + new_services)
     return redirect('edit_lead_tasks', leadid)
 
 
@@ -338,9 +340,10 @@ def add_multiple_services(request, leadid):
             service.leadtask = leadtask
             services.append(service)
 
-    Service.objects.bulk_create(services)
     for service in services:
-        create_event_for_service(service)  # Manually trigger what the signal would do
+        sync_money_amounts(service, Service.MONEY_FIELDS)
+    Service.objects.bulk_create(services)
+    reconcile_events(services=services)  # bulk_create skips signals, so sync events here
 
     return redirect('edit_lead_tasks', leadid)
 
@@ -6,6 +6,8 @@ from django.db import models
 from django.db.models import Sum
 from django.utils import timezone
 
+from common.field_tracking import TrackedFieldsMixin
+
 
 class MoneyAccount(models.Model):
     class AccountType(models.TextChoices):
@@ -22,7 +24,9 @@ class MoneyAccount(models.Model):
         return self.name
 
 
-class Payment(models.Model):
+class Payment(TrackedFieldsMixin, models.Model):
+    tracked_fields = ("client_id", "supplier_id")
+
     class Direction(models.TextChoices):
         IN = "IN", "In"
         OUT = "OUT", "Out"